@@ -7,6 +7,7 @@ import httpx
 import json
 import uvicorn
 import asyncio
+import random
 from uuid import getnode as get_mac
 from datetime import datetime
 
@@ -18,7 +19,10 @@ from fastapi.middleware.cors import CORSMiddleware
 BACKEND_API_URL = "http://172.31.176.1:8000"  # Update this with your backend server IP
 AGENT_HOST = "0.0.0.0"  # Listen on ALL interfaces
 AGENT_PORT = 8081
-HEARTBEAT_INTERVAL = 30  # seconds
+HEARTBEAT_INTERVAL = 30  # seconds (default, backend may suggest another)
+HEARTBEAT_JITTER = 0.2  # +/- fraction of the interval randomized per beat
+HEARTBEAT_MIN_INTERVAL = 5  # never beat faster than this, whatever the backend says
+HEARTBEAT_MAX_INTERVAL = 600
 
 # Auto-detect agent's IP (set at startup)
 AGENT_IP = None
@@ -218,8 +222,11 @@ class APIClient:
         except Exception as e:
             return False, f"Failed to update asset metrics: {e}"
 
-    async def send_heartbeat(self, serial_number: str, agent_url: str) -> bool:
-        """Send heartbeat to backend to indicate agent is online."""
+    async def send_heartbeat(self, serial_number: str, agent_url: str) -> tuple[bool, float | None]:
+        """
+        Send heartbeat to backend to indicate agent is online.
+        Returns success and the next interval suggested by the backend (if any).
+        """
         try:
             response = await self._client.post(
                 "/api/agent/heartbeat",
@@ -228,36 +235,53 @@ class APIClient:
                     "agent_url": agent_url
                 }
             )
-            return response.status_code == 200
+            if response.status_code != 200:
+                return False, None
+            try:
+                next_interval = response.json().get("next_interval")
+                return True, float(next_interval) if next_interval else None
+            except (ValueError, TypeError):
+                return True, None
         except Exception as e:
             print(f"Failed to send heartbeat: {e}")
-            return False
+            return False, None
 
 # Global API client for heartbeat
 heartbeat_client = APIClient(base_url=BACKEND_API_URL)
 
 # --- Background task for heartbeat ---
+def jittered_delay(interval: float) -> float:
+    """Randomize an interval by +/- HEARTBEAT_JITTER so agents drift apart."""
+    return interval * random.uniform(1 - HEARTBEAT_JITTER, 1 + HEARTBEAT_JITTER)
+
 async def heartbeat_task():
     """Background task to send periodic heartbeats."""
     serial = get_serial_number()
     agent_url = f"http://{AGENT_IP}:{AGENT_PORT}"
+    interval = HEARTBEAT_INTERVAL
     
     print(f"Starting heartbeat task...")
     print(f"  Serial: {serial}")
     print(f"  Agent URL: {agent_url}")
-    print(f"  Interval: {HEARTBEAT_INTERVAL}s")
+    print(f"  Interval: {HEARTBEAT_INTERVAL}s (±{int(HEARTBEAT_JITTER * 100)}% jitter)")
+    
+    # Random phase offset so agents booting together (e.g. after a power event)
+    # don't send their heartbeats in synchronized waves
+    await asyncio.sleep(random.uniform(0, HEARTBEAT_INTERVAL))
     
     while True:
         try:
-            success = await heartbeat_client.send_heartbeat(serial, agent_url)
+            success, suggested = await heartbeat_client.send_heartbeat(serial, agent_url)
             if success:
                 print(f"✓ Heartbeat sent at {datetime.utcnow().strftime('%H:%M:%S')}")
+                if suggested:
+                    interval = min(HEARTBEAT_MAX_INTERVAL, max(HEARTBEAT_MIN_INTERVAL, suggested))
             else:
                 print(f"✗ Heartbeat failed at {datetime.utcnow().strftime('%H:%M:%S')}")
-            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await asyncio.sleep(jittered_delay(interval))
         except Exception as e:
             print(f"Heartbeat error: {e}")
-            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await asyncio.sleep(jittered_delay(interval))
 
 # --- FastAPI Endpoints ---
 @app.on_event("startup")
@@ -1,47 +1,148 @@
 # ai_agent_service.py
 """
-AI Agent Service using OpenRouter for:
+AI Agent Service for:
 1. Vision-based text extraction from device images
 2. Device information enrichment (manufacturer, model, specs)
 3. User assignment suggestions based on device type
+
+Extraction and enrichment run on a pluggable provider (see ai_providers.py);
+OpenRouter is the default.
 """
 
 import os
-import re
 import json
+import time
 import base64
+import asyncio
+import hashlib
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List, Tuple
-import httpx
 from datetime import datetime
 
-# OpenRouter Configuration
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY","your_openrouter_api_key_here")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+from config import AI_CACHE_MEMORY_SIZE, USER_SUGGEST_LLM_RERANK, USER_SUGGEST_RERANK_TOP_K
+from database import get_database
+from device_catalog import normalize_model_key, lookup_device, record_observation
+from user_scoring import score_users
+from ai_providers import (
+    AIProvider, create_provider, create_openrouter_client, parse_json_content,
+    OPENROUTER_API_KEY, OPENROUTER_BASE_URL,
+    AI_EXTRACT_PROVIDER, AI_ENRICH_PROVIDER
+)
+
+# Per-stage time budgets (seconds) for the scan workflow
+STAGE_TIMEOUTS = {
+    "extract": float(os.getenv("SCAN_EXTRACT_TIMEOUT", "60")),
+    "enrich": float(os.getenv("SCAN_ENRICH_TIMEOUT", "20")),
+    "suggest_users": float(os.getenv("SCAN_SUGGEST_TIMEOUT", "20")),
+}
+
 
-# Free models available on OpenRouter
-VISION_MODEL = "mistralai/mistral-small-3.2-24b-instruct:free"  # Free vision model
-TEXT_MODEL = "meta-llama/llama-3.2-3b-instruct:free"  # Free text model
+def image_cache_key(image_data: str) -> str:
+    """SHA-256 of the decoded image bytes (data URL prefix and encoding ignored)"""
+    payload = image_data.split(",", 1)[1] if image_data.startswith("data:") else image_data
+    try:
+        raw = base64.b64decode(payload, validate=False)
+    except Exception:
+        raw = payload.encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class AIResultCache:
+    """
+    Two-tier cache for AI results.
+    Entries live in an in-memory LRU and in the `ai_cache` collection, which
+    expires them through a TTL index on `createdAt`.
+    """
+    
+    def __init__(self, max_memory_entries: int = AI_CACHE_MEMORY_SIZE):
+        self.max_memory_entries = max_memory_entries
+        self._memory: OrderedDict = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def _count(self, kind: str, outcome: str):
+        kind_stats = self._stats.setdefault(kind, {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0})
+        kind_stats[outcome] += 1
+    
+    def _remember(self, cache_id: Tuple[str, str], value: Dict[str, Any]):
+        self._memory[cache_id] = value
+        self._memory.move_to_end(cache_id)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    async def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        cache_id = (kind, key)
+        if cache_id in self._memory:
+            self._memory.move_to_end(cache_id)
+            self._count(kind, "memory_hits")
+            return dict(self._memory[cache_id])
+        
+        db = get_database()
+        if db is not None:
+            try:
+                entry = await db.ai_cache.find_one({"kind": kind, "key": key})
+                if entry:
+                    self._remember(cache_id, entry["value"])
+                    self._count(kind, "db_hits")
+                    return dict(entry["value"])
+            except Exception as e:
+                print(f"AI cache read failed: {e}")
+        
+        self._count(kind, "misses")
+        return None
+    
+    async def set(self, kind: str, key: str, value: Dict[str, Any]):
+        value = dict(value)
+        self._remember((kind, key), value)
+        self._count(kind, "writes")
+        
+        db = get_database()
+        if db is None:
+            return
+        try:
+            await db.ai_cache.update_one(
+                {"kind": kind, "key": key},
+                {"$set": {"kind": kind, "key": key, "value": value, "createdAt": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"AI cache write failed: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        by_kind = {}
+        for kind, kind_stats in self._stats.items():
+            hits = kind_stats["memory_hits"] + kind_stats["db_hits"]
+            lookups = hits + kind_stats["misses"]
+            by_kind[kind] = {
+                **kind_stats,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+            }
+        return {
+            "memory_entries": len(self._memory),
+            "memory_capacity": self.max_memory_entries,
+            "by_kind": by_kind
+        }
 
 
 class AIAgentService:
     """AI Agent for intelligent device scanning and data enrichment"""
     
-    def __init__(self, api_key: str = OPENROUTER_API_KEY):
+    def __init__(
+        self,
+        api_key: str = OPENROUTER_API_KEY,
+        extract_provider: Optional[AIProvider] = None,
+        enrich_provider: Optional[AIProvider] = None
+    ):
         self.api_key = api_key
         self.base_url = OPENROUTER_BASE_URL
-        self.client = httpx.AsyncClient(
-            timeout=60.0,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "HTTP-Referer": "http://localhost:8000",
-                "X-Title": "ITAM System"
-            }
-        )
+        self.client = create_openrouter_client(api_key)
+        self.extract_provider = extract_provider or create_provider(AI_EXTRACT_PROVIDER, self.client)
+        self.enrich_provider = enrich_provider or create_provider(AI_ENRICH_PROVIDER, self.client)
+        self.cache = AIResultCache()
     
     async def extract_device_info_from_image(self, image_data: str) -> Dict[str, Any]:
         """
-        Extract device information from image using vision model
-        Replaces traditional OCR with AI-powered image analysis
+        Extract device information from image using the extraction provider
+        (vision model by default)
         
         Args:
             image_data: Base64 encoded image string (data:image/jpeg;base64,...)
@@ -49,91 +150,20 @@ class AIAgentService:
         Returns:
             Dictionary with extracted information
         """
-        try:
-            # Prepare the prompt for device information extraction
-            prompt = """Analyze this device image and extract ALL visible text and information. Focus on:
-
-1. Serial Number (S/N, Serial, SN, etc.)
-2. Model Number/Name
-3. Manufacturer/Brand name
-4. Asset Tag or ID numbers
-5. Any other identifiable text (MAC address, barcodes, QR codes if readable)
-
-Return ONLY a JSON object with this exact structure (use null for missing fields):
-{
-    "serial_number": "extracted serial number",
-    "model": "model name/number",
-    "manufacturer": "brand/manufacturer name",
-    "asset_tag": "asset tag if visible",
-    "additional_ids": ["any other IDs found"],
-    "all_text": "all visible text in the image",
-    "confidence": "high/medium/low"
-}
-
-Be thorough - extract ALL text you can see, even if partially visible."""
-
-            # Call OpenRouter vision API
-            response = await self.client.post(
-                f"{self.base_url}/chat/completions",
-                json={
-                    "model": VISION_MODEL,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": prompt
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": image_data
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 1000
-                }
-            )
-            
-            if response.status_code != 200:
-                return {
-                    "error": f"OpenRouter API error: {response.status_code}",
-                    "details": response.text
-                }
-            
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-            
-            # Parse JSON from response
-            try:
-                # Extract JSON from markdown code blocks if present
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                
-                extracted_data = json.loads(content)
-                extracted_data["extraction_timestamp"] = datetime.utcnow().isoformat()
-                extracted_data["model_used"] = VISION_MODEL
-                
-                return extracted_data
-            except json.JSONDecodeError:
-                # Fallback: extract key information from text
-                return {
-                    "raw_text": content,
-                    "error": "Could not parse structured data",
-                    "extraction_timestamp": datetime.utcnow().isoformat()
-                }
-                
-        except Exception as e:
-            return {
-                "error": f"Image analysis failed: {str(e)}",
-                "extraction_timestamp": datetime.utcnow().isoformat()
-            }
+        provider = self.extract_provider
+        cache_key = image_cache_key(image_data) if provider.cacheable else None
+        if cache_key:
+            cached = await self.cache.get("extraction", cache_key)
+            if cached:
+                cached["cache_hit"] = True
+                return cached
+        
+        extracted_data = await provider.extract(image_data)
+        extracted_data["provider"] = provider.name
+        
+        if cache_key and "error" not in extracted_data:
+            await self.cache.set("extraction", cache_key, extracted_data)
+        return extracted_data
     
     async def enrich_device_data(
         self, 
@@ -141,7 +171,7 @@ Be thorough - extract ALL text you can see, even if partially visible."""
         context: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Enrich device data with additional information using AI
+        Enrich device data with additional information
         Determines device type, category, and suggests additional metadata
         
         Args:
@@ -151,161 +181,149 @@ Be thorough - extract ALL text you can see, even if partially visible."""
         Returns:
             Enriched device information
         """
-        try:
-            # Build enrichment prompt
-            prompt = f"""You are an IT asset management specialist. Based on the following device information, provide detailed metadata:
-
-Extracted Information:
-{json.dumps(extracted_info, indent=2)}
-
-{f'Context: {context}' if context else ''}
-
-Analyze this information and return ONLY a JSON object with:
-{{
-    "device_type": "Laptop/Desktop/Server/Monitor/Printer/Phone/Tablet/Network Device/Other",
-    "category": "Hardware/Software/Network/Peripheral",
-    "likely_manufacturer": "best guess for manufacturer if not clear",
-    "suggested_name": "human-readable device name",
-    "device_specs": "any specifications you can infer",
-    "estimated_age": "approximate age if model suggests it",
-    "recommendations": ["any setup or categorization recommendations"],
-    "confidence_score": 0.0-1.0
-}}
-
-Be practical and conservative in your assessments."""
-
-            response = await self.client.post(
-                f"{self.base_url}/chat/completions",
-                json={
-                    "model": TEXT_MODEL,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.4,
-                    "max_tokens": 800
-                }
+        # Known models come straight from the device catalog
+        catalog_entry = await lookup_device(
+            get_database(), extracted_info.get("manufacturer"), extracted_info.get("model")
+        )
+        if catalog_entry:
+            catalog_entry["provider"] = "catalog"
+            return catalog_entry
+        
+        provider = self.enrich_provider
+        cache_key = None
+        if provider.cacheable:
+            cache_key = normalize_model_key(
+                extracted_info.get("manufacturer"), extracted_info.get("model")
             )
-            
-            if response.status_code != 200:
-                return {"error": f"Enrichment API error: {response.status_code}"}
-            
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-            
-            # Parse JSON
+        if cache_key:
+            cached = await self.cache.get("enrichment", cache_key)
+            if cached:
+                cached["cache_hit"] = True
+                return cached
+        
+        enriched_data = await provider.enrich(extracted_info, context)
+        enriched_data["provider"] = provider.name
+        
+        if "error" not in enriched_data:
+            if cache_key:
+                await self.cache.set("enrichment", cache_key, enriched_data)
             try:
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                
-                enriched_data = json.loads(content)
-                enriched_data["enrichment_timestamp"] = datetime.utcnow().isoformat()
-                
-                return enriched_data
-            except json.JSONDecodeError:
-                return {
-                    "raw_response": content,
-                    "error": "Could not parse enrichment data"
-                }
-                
-        except Exception as e:
-            return {"error": f"Enrichment failed: {str(e)}"}
+                await record_observation(
+                    get_database(),
+                    extracted_info.get("manufacturer"),
+                    extracted_info.get("model"),
+                    enriched_data.get("device_type"),
+                    enriched_data.get("category"),
+                    source="enrichment",
+                    device_specs=enriched_data.get("device_specs"),
+                    suggested_name=enriched_data.get("suggested_name")
+                )
+            except Exception as e:
+                print(f"Device catalog update failed: {e}")
+        return enriched_data
     
     async def suggest_user_assignment(
         self,
         device_info: Dict[str, Any],
         available_users: List[Dict[str, Any]],
-        department: Optional[str] = None
+        department: Optional[str] = None,
+        top_k: int = 3
     ) -> List[Dict[str, Any]]:
         """
-        Suggest user assignments based on device type and user profiles
+        Suggest user assignments based on device type and user profiles.
+        All users are ranked by the local scorer (department, role/device
+        affinity, current load); the enrichment provider's text model
+        optionally re-ranks the top few. Providers without one (local_ocr,
+        stub) keep the scorer order.
         
         Args:
             device_info: Device information
             available_users: List of users in system
-            department: Optional department filter
+            department: Optional department to prefer
+            top_k: Number of suggestions to return
         
         Returns:
             List of suggested user assignments with confidence scores
         """
         try:
-            # Filter users by department if specified
-            if department:
-                available_users = [
-                    u for u in available_users 
-                    if u.get("department") == department
-                ]
-            
-            if not available_users:
-                return []
-            
-            # Create user summary
-            user_summary = []
-            for user in available_users[:20]:  # Limit to 20 users to stay within token limits
-                user_summary.append({
-                    "name": user.get("name"),
-                    "department": user.get("department"),
-                    "role": user.get("role"),
-                    "current_assets": user.get("assetsCount", 0)
-                })
+            rerank = USER_SUGGEST_LLM_RERANK and self.enrich_provider.completes_text
+            candidates = score_users(
+                device_info,
+                available_users,
+                department,
+                top_k=max(top_k, USER_SUGGEST_RERANK_TOP_K) if rerank else top_k
+            )
+            if not rerank or len(candidates) <= 1:
+                return candidates[:top_k]
             
-            prompt = f"""Given this device and list of users, suggest the top 3 most appropriate user assignments:
+            return (await self._rerank_user_suggestions(device_info, candidates))[:top_k]
+                
+        except Exception as e:
+            print(f"User suggestion error: {e}")
+            return []
+    
+    async def _rerank_user_suggestions(
+        self,
+        device_info: Dict[str, Any],
+        candidates: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Ask the enrichment provider's text model to re-order the scorer's top candidates; keep scorer order on failure"""
+        prompt = f"""Given this device and a shortlist of users already ranked by a scoring engine, re-order the shortlist from most to least appropriate assignee:
 
 Device:
-{json.dumps(device_info, indent=2)}
-
-Available Users:
-{json.dumps(user_summary, indent=2)}
+{json.dumps(device_info, indent=2, default=str)}
 
-Consider:
-- Device type vs user role
-- Department match
-- Current asset load (prefer users with fewer assets for better distribution)
-- Device specifications vs likely user needs
+Shortlist:
+{json.dumps([{"user_name": c["user_name"], "score": c["confidence"], "reason": c["reason"]} for c in candidates], indent=2)}
 
-Return ONLY a JSON array of top 3 suggestions:
-[
-    {{
-        "user_name": "exact name from list",
-        "confidence": 0.0-1.0,
-        "reason": "brief explanation"
-    }}
-]"""
+Return ONLY a JSON array of user names from the shortlist, best first."""
 
-            response = await self.client.post(
-                f"{self.base_url}/chat/completions",
-                json={
-                    "model": TEXT_MODEL,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.3,
-                    "max_tokens": 500
-                }
-            )
-            
-            if response.status_code != 200:
-                return []
-            
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+        try:
+            content = await self.enrich_provider.complete_text(prompt, temperature=0.0, max_tokens=300)
+            if content is None:
+                return candidates
             
-            try:
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                
-                suggestions = json.loads(content)
-                return suggestions if isinstance(suggestions, list) else []
-            except json.JSONDecodeError:
-                return []
-                
+            ranked_names = parse_json_content(content)
+            if not isinstance(ranked_names, list):
+                return candidates
         except Exception as e:
-            print(f"User suggestion error: {e}")
-            return []
+            print(f"User suggestion re-rank skipped: {e}")
+            return candidates
+        
+        by_name = {c["user_name"]: c for c in candidates}
+        reranked = [by_name.pop(name) for name in ranked_names if isinstance(name, str) and name in by_name]
+        # Anything the model dropped keeps its scorer order at the end
+        return reranked + [c for c in candidates if c["user_name"] in by_name]
+    
+    async def _run_stage(
+        self,
+        name: str,
+        coro,
+        fallback: Any,
+        timings: Dict[str, Dict[str, Any]]
+    ) -> Any:
+        """
+        Run one workflow stage under its own timeout.
+        On timeout or error the stage degrades to `fallback` instead of failing the scan.
+        """
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            result = await asyncio.wait_for(coro, timeout=STAGE_TIMEOUTS[name])
+        except asyncio.TimeoutError:
+            print(f"⏱ Stage '{name}' timed out after {STAGE_TIMEOUTS[name]}s")
+            status = "timeout"
+            result = fallback
+        except Exception as e:
+            print(f"Stage '{name}' failed: {e}")
+            status = "error"
+            result = fallback
+        
+        timings[name] = {
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "status": status
+        }
+        return result
     
     async def process_scan_workflow(
         self,
@@ -314,10 +332,13 @@ Return ONLY a JSON array of top 3 suggestions:
         context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
-        Complete end-to-end scan workflow:
+        Complete end-to-end scan workflow, run as a small DAG:
         1. Extract device info from image
-        2. Enrich with additional data
-        3. Suggest user assignment
+        2. Enrich with additional data  } run concurrently,
+        3. Suggest user assignment      } both depend only on step 1
+        
+        Each stage has its own timeout; enrichment and suggestions degrade
+        to empty results rather than failing the whole scan.
         
         Args:
             image_data: Base64 image
@@ -327,40 +348,66 @@ Return ONLY a JSON array of top 3 suggestions:
         Returns:
             Complete processed device information ready for database insertion
         """
+        timings: Dict[str, Dict[str, Any]] = {}
+        workflow_started = time.perf_counter()
+        
         try:
             # Step 1: Extract from image
             print("🔍 Extracting device information from image...")
-            extracted = await self.extract_device_info_from_image(image_data)
+            extracted = await self._run_stage(
+                "extract",
+                self.extract_device_info_from_image(image_data),
+                {"error": "Extraction timed out or failed"},
+                timings
+            )
             
             if "error" in extracted:
                 return {
                     "status": "error",
                     "message": extracted.get("error", "Extraction failed"),
-                    "details": extracted
+                    "details": extracted,
+                    "stage_timings": timings
                 }
             
-            # Step 2: Enrich data
-            print("🧠 Enriching device data with AI...")
+            # Steps 2 & 3: Enrich and suggest users concurrently
             context_str = None
             if context:
                 context_str = f"Department: {context.get('department', 'Unknown')}, Location: {context.get('location', 'Unknown')}"
             
-            enriched = await self.enrich_device_data(extracted, context_str)
-            
-            # Step 3: Suggest user assignment
-            user_suggestions = []
-            if available_users:
-                print("👥 Generating user assignment suggestions...")
-                user_suggestions = await self.suggest_user_assignment(
-                    {**extracted, **enriched},
-                    available_users,
-                    context.get("department") if context else None
+            print("🧠 Enriching device data and 👥 generating user suggestions...")
+            stages = [
+                self._run_stage(
+                    "enrich",
+                    self.enrich_device_data(extracted, context_str),
+                    {},
+                    timings
                 )
+            ]
+            if available_users:
+                stages.append(self._run_stage(
+                    "suggest_users",
+                    self.suggest_user_assignment(
+                        extracted,
+                        available_users,
+                        context.get("department") if context else None
+                    ),
+                    [],
+                    timings
+                ))
+            
+            results = await asyncio.gather(*stages)
+            enriched = results[0]
+            user_suggestions = results[1] if len(results) > 1 else []
+            
+            # A failed enrichment falls back to the extracted fields alone
+            if "error" in enriched:
+                timings["enrich"]["status"] = "error"
+                enriched = {}
             
             # Step 4: Build complete device record
             device_record = {
                 "serial_number": extracted.get("serial_number") or extracted.get("asset_tag"),
-                "name": enriched.get("suggested_name") or f"Device {extracted.get('serial_number', 'Unknown')[:8]}",
+                "name": enriched.get("suggested_name") or f"Device {(extracted.get('serial_number') or 'Unknown')[:8]}",
                 "type": enriched.get("device_type", "Other"),
                 "category": enriched.get("category", "Hardware"),
                 "manufacturer": extracted.get("manufacturer") or enriched.get("likely_manufacturer"),
@@ -382,19 +429,23 @@ Return ONLY a JSON array of top 3 suggestions:
                 if context.get("location"):
                     device_record["location"] = context["location"]
             
+            timings["total"] = {"ms": round((time.perf_counter() - workflow_started) * 1000, 1)}
+            
             return {
                 "status": "success",
                 "device_record": device_record,
                 "user_suggestions": user_suggestions,
                 "confidence": enriched.get("confidence_score", 0.5),
                 "extracted_text": extracted.get("all_text", ""),
-                "recommendations": enriched.get("recommendations", [])
+                "recommendations": enriched.get("recommendations", []),
+                "stage_timings": timings
             }
             
         except Exception as e:
             return {
                 "status": "error",
-                "message": f"Workflow processing failed: {str(e)}"
+                "message": f"Workflow processing failed: {str(e)}",
+                "stage_timings": timings
             }
     
     def _build_notes(self, extracted: Dict, enriched: Dict) -> str:
@@ -419,7 +470,9 @@ Return ONLY a JSON array of top 3 suggestions:
         return "\n".join(notes)
     
     async def close(self):
-        """Close the HTTP client"""
+        """Close the HTTP client and providers"""
+        await self.extract_provider.close()
+        await self.enrich_provider.close()
         await self.client.aclose()
 
 
@@ -0,0 +1,421 @@
+# ai_providers.py
+"""
+Inference providers for the AI scan stages (extraction and enrichment).
+
+- openrouter:    hosted models via OpenRouter (default)
+- local_openai:  any local OpenAI-compatible server (llama.cpp, Ollama, vLLM...)
+- local_ocr:     CPU-only Tesseract OCR plus regex/keyword rules, no LLM at all
+- stub:          deterministic results for tests and offline benchmarks
+
+Select with AI_PROVIDER, or per stage with AI_EXTRACT_PROVIDER / AI_ENRICH_PROVIDER.
+"""
+
+import os
+import io
+import re
+import json
+import asyncio
+import hashlib
+from datetime import datetime
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any
+
+import httpx
+
+from openrouter_client import RateLimitedClient
+from barcode_decoder import get_executor, image_bytes_from_data_url
+
+try:
+    from PIL import Image
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+# OpenRouter Configuration
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "your_openrouter_api_key_here")
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Free models available on OpenRouter
+VISION_MODEL = "mistralai/mistral-small-3.2-24b-instruct:free"  # Free vision model
+TEXT_MODEL = "meta-llama/llama-3.2-3b-instruct:free"  # Free text model
+
+# Local OpenAI-compatible server
+LOCAL_LLM_BASE_URL = os.getenv("LOCAL_LLM_BASE_URL", "http://localhost:11434/v1")
+LOCAL_LLM_API_KEY = os.getenv("LOCAL_LLM_API_KEY", "local")
+LOCAL_VISION_MODEL = os.getenv("LOCAL_VISION_MODEL", "llava")
+LOCAL_TEXT_MODEL = os.getenv("LOCAL_TEXT_MODEL", "llama3.2:3b")
+
+AI_PROVIDER = os.getenv("AI_PROVIDER", "openrouter")
+AI_EXTRACT_PROVIDER = os.getenv("AI_EXTRACT_PROVIDER", AI_PROVIDER)
+AI_ENRICH_PROVIDER = os.getenv("AI_ENRICH_PROVIDER", AI_PROVIDER)
+
+EXTRACTION_PROMPT = """Analyze this device image and extract ALL visible text and information. Focus on:
+
+1. Serial Number (S/N, Serial, SN, etc.)
+2. Model Number/Name
+3. Manufacturer/Brand name
+4. Asset Tag or ID numbers
+5. Any other identifiable text (MAC address, barcodes, QR codes if readable)
+
+Return ONLY a JSON object with this exact structure (use null for missing fields):
+{
+    "serial_number": "extracted serial number",
+    "model": "model name/number",
+    "manufacturer": "brand/manufacturer name",
+    "asset_tag": "asset tag if visible",
+    "additional_ids": ["any other IDs found"],
+    "all_text": "all visible text in the image",
+    "confidence": "high/medium/low"
+}
+
+Be thorough - extract ALL text you can see, even if partially visible."""
+
+
+def build_enrichment_prompt(extracted_info: Dict[str, Any], context: Optional[str] = None) -> str:
+    return f"""You are an IT asset management specialist. Based on the following device information, provide detailed metadata:
+
+Extracted Information:
+{json.dumps(extracted_info, indent=2)}
+
+{f'Context: {context}' if context else ''}
+
+Analyze this information and return ONLY a JSON object with:
+{{
+    "device_type": "Laptop/Desktop/Server/Monitor/Printer/Phone/Tablet/Network Device/Other",
+    "category": "Hardware/Software/Network/Peripheral",
+    "likely_manufacturer": "best guess for manufacturer if not clear",
+    "suggested_name": "human-readable device name",
+    "device_specs": "any specifications you can infer",
+    "estimated_age": "approximate age if model suggests it",
+    "recommendations": ["any setup or categorization recommendations"],
+    "confidence_score": 0.0-1.0
+}}
+
+Be practical and conservative in your assessments."""
+
+
+def parse_json_content(content: str) -> Any:
+    """Parse JSON from a model response, stripping markdown code fences if present"""
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    return json.loads(content)
+
+
+class AIProvider(ABC):
+    """Base class for scan-stage providers"""
+
+    name = "base"
+    # Remote, paid or rate-limited providers are worth caching; local ones are not
+    cacheable = False
+
+    @abstractmethod
+    async def extract(self, image_data: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def enrich(self, extracted_info: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
+        ...
+
+    # Whether complete_text is backed by a text model
+    completes_text = False
+
+    async def complete_text(self, prompt: str, temperature: float = 0.0, max_tokens: int = 300) -> Optional[str]:
+        """Free-form text completion; None if the provider has no text model or the call failed"""
+        return None
+
+    async def close(self):
+        pass
+
+
+class OpenAICompatibleProvider(AIProvider):
+    """Chat-completions provider (OpenRouter or a local OpenAI-compatible server)"""
+
+    completes_text = True
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        client,
+        vision_model: str,
+        text_model: str,
+        cacheable: bool,
+        owns_client: bool = True
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.client = client
+        self.vision_model = vision_model
+        self.text_model = text_model
+        self.cacheable = cacheable
+        self.owns_client = owns_client
+
+    async def chat(self, model: str, content: Any, temperature: float, max_tokens: int) -> httpx.Response:
+        return await self.client.post(
+            f"{self.base_url}/chat/completions",
+            json={
+                "model": model,
+                "messages": [{"role": "user", "content": content}],
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            }
+        )
+
+    async def complete_text(self, prompt: str, temperature: float = 0.0, max_tokens: int = 300) -> Optional[str]:
+        response = await self.chat(self.text_model, prompt, temperature=temperature, max_tokens=max_tokens)
+        if response.status_code != 200:
+            return None
+        return response.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+
+    async def extract(self, image_data: str) -> Dict[str, Any]:
+        try:
+            response = await self.chat(
+                self.vision_model,
+                [
+                    {"type": "text", "text": EXTRACTION_PROMPT},
+                    {"type": "image_url", "image_url": {"url": image_data}}
+                ],
+                temperature=0.3,
+                max_tokens=1000
+            )
+
+            if response.status_code != 200:
+                return {
+                    "error": f"{self.name} API error: {response.status_code}",
+                    "details": response.text
+                }
+
+            result = response.json()
+            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+            try:
+                extracted_data = parse_json_content(content)
+                extracted_data["extraction_timestamp"] = datetime.utcnow().isoformat()
+                extracted_data["model_used"] = self.vision_model
+                return extracted_data
+            except json.JSONDecodeError:
+                # Fallback: extract key information from text
+                return {
+                    "raw_text": content,
+                    "error": "Could not parse structured data",
+                    "extraction_timestamp": datetime.utcnow().isoformat()
+                }
+
+        except Exception as e:
+            return {
+                "error": f"Image analysis failed: {str(e)}",
+                "extraction_timestamp": datetime.utcnow().isoformat()
+            }
+
+    async def enrich(self, extracted_info: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            response = await self.chat(
+                self.text_model,
+                build_enrichment_prompt(extracted_info, context),
+                temperature=0.4,
+                max_tokens=800
+            )
+
+            if response.status_code != 200:
+                return {"error": f"Enrichment API error: {response.status_code}"}
+
+            result = response.json()
+            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+            try:
+                enriched_data = parse_json_content(content)
+                enriched_data["enrichment_timestamp"] = datetime.utcnow().isoformat()
+                return enriched_data
+            except json.JSONDecodeError:
+                return {
+                    "raw_response": content,
+                    "error": "Could not parse enrichment data"
+                }
+
+        except Exception as e:
+            return {"error": f"Enrichment failed: {str(e)}"}
+
+    async def close(self):
+        if self.owns_client:
+            await self.client.aclose()
+
+
+# --- Rule-based helpers shared by the local OCR provider ---
+
+KNOWN_MANUFACTURERS = [
+    "Apple", "Dell", "HP", "Hewlett Packard", "Lenovo", "Microsoft", "Asus", "Acer",
+    "Samsung", "LG", "Cisco", "Ubiquiti", "Netgear", "Brother", "Canon", "Epson",
+    "Xerox", "Logitech", "Toshiba", "Fujitsu", "Sony", "Google", "Huawei", "Juniper"
+]
+
+DEVICE_TYPE_KEYWORDS = [
+    ("Laptop", ["laptop", "notebook", "thinkpad", "latitude", "macbook", "elitebook", "probook", "xps", "zenbook", "surface laptop"]),
+    ("Desktop", ["desktop", "optiplex", "thinkcentre", "prodesk", "imac", "mac mini", "workstation"]),
+    ("Server", ["server", "poweredge", "proliant", "thinksystem"]),
+    ("Monitor", ["monitor", "display", "ultrasharp"]),
+    ("Printer", ["printer", "laserjet", "officejet", "pixma", "workforce", "mfp"]),
+    ("Phone", ["iphone", "phone", "galaxy s", "pixel"]),
+    ("Tablet", ["ipad", "tablet", "galaxy tab", "surface pro"]),
+    ("Network Device", ["switch", "router", "access point", "catalyst", "unifi", "firewall"]),
+]
+
+CATEGORY_BY_TYPE = {
+    "Network Device": "Network",
+    "Monitor": "Peripheral",
+    "Printer": "Peripheral",
+}
+
+SERIAL_PATTERN = re.compile(r"(?:S/?N|SERIAL(?:\s*(?:NO|NUMBER))?)[\s:#.]*([A-Z0-9][A-Z0-9\-]{4,})", re.IGNORECASE)
+MODEL_PATTERN = re.compile(r"(?:MODEL|MOD|P/?N)[\s:#.]*([A-Z0-9][A-Z0-9\- ]{2,30})", re.IGNORECASE)
+ASSET_TAG_PATTERN = re.compile(r"(?:ASSET(?:\s*TAG)?)[\s:#.]*([A-Z0-9][A-Z0-9\-]{2,})", re.IGNORECASE)
+
+
+def extract_fields_from_text(text: str) -> Dict[str, Any]:
+    """Pull serial/model/manufacturer/asset tag out of label text with regexes"""
+    def first(pattern):
+        match = pattern.search(text)
+        return match.group(1).strip() if match else None
+
+    manufacturer = next(
+        (m for m in KNOWN_MANUFACTURERS if re.search(rf"\b{re.escape(m)}\b", text, re.IGNORECASE)),
+        None
+    )
+    return {
+        "serial_number": first(SERIAL_PATTERN),
+        "model": first(MODEL_PATTERN),
+        "manufacturer": manufacturer,
+        "asset_tag": first(ASSET_TAG_PATTERN),
+        "additional_ids": [],
+        "all_text": text.strip()
+    }
+
+
+def classify_device(extracted_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword-based device classification"""
+    haystack = " ".join(
+        str(extracted_info.get(k) or "") for k in ("model", "manufacturer", "all_text")
+    ).lower()
+    device_type = next(
+        (dtype for dtype, keywords in DEVICE_TYPE_KEYWORDS if any(k in haystack for k in keywords)),
+        "Other"
+    )
+    manufacturer = extracted_info.get("manufacturer")
+    model = extracted_info.get("model")
+    return {
+        "device_type": device_type,
+        "category": CATEGORY_BY_TYPE.get(device_type, "Hardware"),
+        "likely_manufacturer": manufacturer,
+        "suggested_name": " ".join(p for p in [manufacturer, model] if p) or None,
+        "device_specs": None,
+        "estimated_age": None,
+        "recommendations": [],
+        "confidence_score": 0.6 if device_type != "Other" else 0.3
+    }
+
+
+class LocalOCRProvider(AIProvider):
+    """CPU-only Tesseract OCR with regex extraction and keyword rules for enrichment"""
+
+    name = "local_ocr"
+
+    async def extract(self, image_data: str) -> Dict[str, Any]:
+        if not TESSERACT_AVAILABLE:
+            return {"error": "Local OCR requires pillow and pytesseract"}
+
+        try:
+            image_bytes = image_bytes_from_data_url(image_data)
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(get_executor(), ocr_image_bytes, image_bytes)
+        except Exception as e:
+            return {
+                "error": f"Local OCR failed: {str(e)}",
+                "extraction_timestamp": datetime.utcnow().isoformat()
+            }
+
+        extracted = extract_fields_from_text(text)
+        extracted["confidence"] = "medium" if extracted["serial_number"] else "low"
+        extracted["extraction_timestamp"] = datetime.utcnow().isoformat()
+        extracted["model_used"] = "tesseract"
+        return extracted
+
+    async def enrich(self, extracted_info: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
+        enriched = classify_device(extracted_info)
+        enriched["enrichment_timestamp"] = datetime.utcnow().isoformat()
+        return enriched
+
+
+def ocr_image_bytes(image_bytes: bytes) -> str:
+    """Run Tesseract on an image (inside a worker process)"""
+    image = Image.open(io.BytesIO(image_bytes)).convert("L")
+    return pytesseract.image_to_string(image)
+
+
+class StubProvider(AIProvider):
+    """Deterministic provider: the same image always yields the same device"""
+
+    name = "stub"
+
+    async def extract(self, image_data: str) -> Dict[str, Any]:
+        digest = hashlib.sha256(image_data.encode("utf-8")).hexdigest()
+        return {
+            "serial_number": f"STUB{digest[:10].upper()}",
+            "model": "Latitude 5420",
+            "manufacturer": "Dell",
+            "asset_tag": None,
+            "additional_ids": [],
+            "all_text": f"Dell Latitude 5420 S/N: STUB{digest[:10].upper()}",
+            "confidence": "high",
+            "extraction_timestamp": datetime.utcnow().isoformat(),
+            "model_used": "stub"
+        }
+
+    async def enrich(self, extracted_info: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
+        enriched = classify_device(extracted_info)
+        enriched["confidence_score"] = 0.9
+        enriched["enrichment_timestamp"] = datetime.utcnow().isoformat()
+        return enriched
+
+
+def create_openrouter_client(api_key: str = OPENROUTER_API_KEY) -> RateLimitedClient:
+    return RateLimitedClient(httpx.AsyncClient(
+        timeout=60.0,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "HTTP-Referer": "http://localhost:8000",
+            "X-Title": "ITAM System"
+        }
+    ))
+
+
+def create_provider(name: str, openrouter_client: Optional[RateLimitedClient] = None) -> AIProvider:
+    """Build a provider by name. The OpenRouter client is shared so rate limits apply globally."""
+    if name == "openrouter":
+        return OpenAICompatibleProvider(
+            name="openrouter",
+            base_url=OPENROUTER_BASE_URL,
+            client=openrouter_client or create_openrouter_client(),
+            vision_model=VISION_MODEL,
+            text_model=TEXT_MODEL,
+            cacheable=True,
+            owns_client=openrouter_client is None
+        )
+    if name == "local_openai":
+        return OpenAICompatibleProvider(
+            name="local_openai",
+            base_url=LOCAL_LLM_BASE_URL,
+            client=httpx.AsyncClient(
+                timeout=120.0,
+                headers={"Authorization": f"Bearer {LOCAL_LLM_API_KEY}"}
+            ),
+            vision_model=LOCAL_VISION_MODEL,
+            text_model=LOCAL_TEXT_MODEL,
+            cacheable=False
+        )
+    if name == "local_ocr":
+        return LocalOCRProvider()
+    if name == "stub":
+        return StubProvider()
+    raise ValueError(f"Unknown AI provider: {name}")
@@ -0,0 +1,47 @@
+# asset_counts.py
+"""
+Periodic reconciliation of users.assetsCount.
+Routes keep the counts current with $inc on every assign/unassign; this
+job recounts from the assets collection to repair any drift (failed
+writes, manual edits, renamed users).
+"""
+
+import os
+import asyncio
+from typing import Optional
+
+from utils.helpers import reconcile_user_asset_counts
+
+ASSET_COUNT_RECONCILE_HOURS = float(os.getenv("ASSET_COUNT_RECONCILE_HOURS", "6"))  # 0 disables
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+
+async def _reconcile_loop(get_db):
+    while True:
+        await asyncio.sleep(ASSET_COUNT_RECONCILE_HOURS * 3600)
+        db = get_db()
+        if db is None:
+            continue
+        try:
+            corrected = await reconcile_user_asset_counts(db)
+            if corrected:
+                print(f"Corrected assetsCount for {corrected} users")
+        except Exception as e:
+            print(f"Asset count reconciliation failed: {e}")
+
+
+def start_asset_count_reconciler(get_db):
+    """Reconcile user asset counts every ASSET_COUNT_RECONCILE_HOURS"""
+    global _reconcile_task
+    if ASSET_COUNT_RECONCILE_HOURS <= 0 or _reconcile_task is not None:
+        return
+    _reconcile_task = asyncio.create_task(_reconcile_loop(get_db))
+
+
+async def shutdown_asset_count_reconciler():
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        await asyncio.gather(_reconcile_task, return_exceptions=True)
+        _reconcile_task = None
@@ -0,0 +1,258 @@
+# audit_anchoring.py
+"""
+Merkle-tree anchoring for the audit chain.
+Records appended since the last anchor are periodically combined into a
+Merkle tree whose root is stored in audit_anchors. Any single record can
+then be proven with O(log n) sibling hashes instead of replaying its
+asset's whole chain.
+"""
+
+import os
+import uuid
+import hashlib
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+AUDIT_ANCHOR_INTERVAL_SECONDS = int(os.getenv("AUDIT_ANCHOR_INTERVAL_SECONDS", "300"))
+AUDIT_ANCHOR_MAX_LEAVES = int(os.getenv("AUDIT_ANCHOR_MAX_LEAVES", "10000"))
+
+# Domain separation so a leaf can never be passed off as an internal node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+_instance_id = uuid.uuid4().hex
+_anchor_task: Optional[asyncio.Task] = None
+
+
+def leaf_hash(record_hash: str) -> str:
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(record_hash)).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def merkle_levels(leaves: List[str]) -> List[List[str]]:
+    """Every level of the tree, leaves first; an odd node is carried up to the next level unchanged"""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ])
+    return levels
+
+
+def merkle_root(leaves: List[str]) -> str:
+    return merkle_levels(leaves)[-1][0]
+
+
+def proof_path(level_sizes: List[int], index: int) -> List[Dict[str, Any]]:
+    """Which stored node each proof step needs: [{"level", "index", "position"}]"""
+    path = []
+    for level, size in enumerate(level_sizes[:-1]):
+        sibling = index ^ 1
+        if sibling < size:
+            path.append({"level": level, "index": sibling, "position": "left" if sibling < index else "right"})
+        index //= 2
+    return path
+
+
+def merkle_proof(leaves: List[str], index: int) -> List[Dict[str, str]]:
+    """Sibling hashes from leaf to root as [{"hash", "position": "left"|"right"}]"""
+    proof = []
+    level = leaves
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"hash": level[sibling], "position": "left" if sibling < index else "right"})
+        level = [
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        index //= 2
+    return proof
+
+
+def verify_inclusion(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    current = leaf
+    for step in proof:
+        if step["position"] == "left":
+            current = node_hash(step["hash"], current)
+        else:
+            current = node_hash(current, step["hash"])
+    return current == root
+
+
+async def _acquire_lease(db, seconds: int) -> bool:
+    """Only one worker anchors at a time; the lease expires if it dies"""
+    now = datetime.utcnow()
+    try:
+        await db.audit_anchor_state.find_one_and_update(
+            {"_id": "lease", "$or": [{"expires_at": {"$lt": now}}, {"holder": _instance_id}]},
+            {"$set": {"holder": _instance_id, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def _release_lease(db):
+    await db.audit_anchor_state.update_one(
+        {"_id": "lease", "holder": _instance_id}, {"$set": {"expires_at": datetime.utcnow()}}
+    )
+
+
+async def anchor_pending_records(db) -> Optional[Dict[str, Any]]:
+    """
+    Anchor up to AUDIT_ANCHOR_MAX_LEAVES unanchored records in one Merkle
+    tree. Returns the new anchor, or None if nothing was pending or another
+    worker holds the lease.
+    """
+    if not await _acquire_lease(db, max(60, AUDIT_ANCHOR_INTERVAL_SECONDS)):
+        return None
+    try:
+        records = await db.audit_chain.find(
+            {"anchor_id": None}, {"current_hash": 1, "timestamp": 1}
+        ).sort([("timestamp", 1), ("_id", 1)]).limit(AUDIT_ANCHOR_MAX_LEAVES).to_list(length=AUDIT_ANCHOR_MAX_LEAVES)
+        if not records:
+            return None
+
+        levels = merkle_levels([leaf_hash(r["current_hash"]) for r in records])
+        previous = await db.audit_anchors.find_one({}, {"merkle_root": 1}, sort=[("created_at", -1)])
+        anchor = {
+            "merkle_root": levels[-1][0],
+            "previous_root": previous["merkle_root"] if previous else None,
+            "leaf_count": len(records),
+            # Stored so a proof is a lookup of its sibling nodes, not a rebuild
+            "levels": levels,
+            "level_sizes": [len(level) for level in levels],
+            "record_ids": [r["_id"] for r in records],
+            "first_timestamp": records[0]["timestamp"],
+            "last_timestamp": records[-1]["timestamp"],
+            "created_at": datetime.utcnow()
+        }
+        result = await db.audit_anchors.insert_one(anchor)
+        anchor["_id"] = result.inserted_id
+
+        await db.audit_chain.bulk_write([
+            UpdateOne({"_id": r["_id"]}, {"$set": {"anchor_id": result.inserted_id, "leaf_index": i}})
+            for i, r in enumerate(records)
+        ], ordered=False)
+        return anchor
+    finally:
+        await _release_lease(db)
+
+
+async def _load_proof_nodes(db, anchor_id, index: int, path: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Fetch only the leaf and its sibling nodes from the stored levels"""
+    def node(level: int, position: int):
+        return {"$arrayElemAt": [{"$arrayElemAt": ["$levels", level]}, position]}
+
+    nodes = await db.audit_anchors.aggregate([
+        {"$match": {"_id": anchor_id}},
+        {"$project": {
+            "_id": 0,
+            "leaf": node(0, index),
+            "siblings": [node(step["level"], step["index"]) for step in path]
+        }}
+    ]).to_list(length=1)
+    return nodes[0] if nodes else None
+
+
+async def get_inclusion_proof(db, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Inclusion proof for an audit record, or None if it is not anchored yet"""
+    if not record.get("anchor_id"):
+        return None
+    anchor = await db.audit_anchors.find_one(
+        {"_id": record["anchor_id"]}, {"levels": 0, "leaves": 0, "record_ids": 0}
+    )
+    if not anchor:
+        return None
+
+    if "leaf_index" in record and "level_sizes" in anchor:
+        index = record["leaf_index"]
+        path = proof_path(anchor["level_sizes"], index)
+        nodes = await _load_proof_nodes(db, anchor["_id"], index, path)
+        if not nodes:
+            return None
+        leaf = nodes["leaf"]
+        proof = [
+            {"hash": sibling, "position": step["position"]}
+            for step, sibling in zip(path, nodes["siblings"])
+        ]
+    else:
+        # Anchored before leaf_index/levels were stored
+        legacy = await db.audit_anchors.find_one(
+            {"_id": anchor["_id"]}, {"leaves": 1, "levels": {"$slice": 1}, "record_ids": 1}
+        )
+        leaves = legacy["leaves"] if "leaves" in legacy else legacy["levels"][0]
+        index = legacy["record_ids"].index(record["_id"])
+        leaf = leaves[index]
+        proof = merkle_proof(leaves, index)
+
+    return {
+        "record_id": str(record["_id"]),
+        "asset_id": record["asset_id"],
+        "chain_index": record["chain_index"],
+        "record_hash": record["current_hash"],
+        "leaf_hash": leaf,
+        "leaf_index": index,
+        "leaf_count": anchor["leaf_count"],
+        "proof": proof,
+        "merkle_root": anchor["merkle_root"],
+        "anchor_id": str(anchor["_id"]),
+        "anchored_at": anchor["created_at"],
+        # Leaf must match the stored record, and the proof must reach the root
+        "verified": leaf == leaf_hash(record["current_hash"]) and verify_inclusion(leaf, proof, anchor["merkle_root"])
+    }
+
+
+def anchor_helper(anchor) -> dict:
+    return {
+        "id": str(anchor["_id"]),
+        "merkle_root": anchor["merkle_root"],
+        "previous_root": anchor.get("previous_root"),
+        "leaf_count": anchor["leaf_count"],
+        "first_timestamp": anchor.get("first_timestamp"),
+        "last_timestamp": anchor.get("last_timestamp"),
+        "created_at": anchor["created_at"]
+    }
+
+
+async def _anchor_loop(get_db):
+    while True:
+        await asyncio.sleep(AUDIT_ANCHOR_INTERVAL_SECONDS)
+        db = get_db()
+        if db is None:
+            continue
+        try:
+            # Drain the backlog in full batches before waiting again
+            while True:
+                anchor = await anchor_pending_records(db)
+                if not anchor or anchor["leaf_count"] < AUDIT_ANCHOR_MAX_LEAVES:
+                    break
+        except Exception as e:
+            print(f"Audit anchoring failed: {e}")
+
+
+def start_anchoring(get_db):
+    """Anchor new audit records every AUDIT_ANCHOR_INTERVAL_SECONDS (0 disables)"""
+    global _anchor_task
+    if AUDIT_ANCHOR_INTERVAL_SECONDS <= 0 or _anchor_task is not None:
+        return
+    _anchor_task = asyncio.create_task(_anchor_loop(get_db))
+
+
+async def shutdown_anchoring():
+    global _anchor_task
+    if _anchor_task is not None:
+        _anchor_task.cancel()
+        await asyncio.gather(_anchor_task, return_exceptions=True)
+        _anchor_task = None
@@ -0,0 +1,275 @@
+# audit_archive.py
+"""
+Cold-storage tier for the audit chain.
+Records older than the retention horizon are moved out of audit_chain into
+zlib-compressed, per-asset segments in audit_chain_archive. The chain head
+and everything from the verification checkpoint onwards always stay hot,
+so incremental verification and appends never touch the archive; full
+verification and chain reads fall through to it transparently.
+"""
+
+import os
+import zlib
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+import bson
+from bson import Binary, ObjectId
+from pymongo.errors import DuplicateKeyError
+
+AUDIT_ARCHIVE_RETENTION_DAYS = int(os.getenv("AUDIT_ARCHIVE_RETENTION_DAYS", "365"))
+AUDIT_ARCHIVE_SEGMENT_SIZE = int(os.getenv("AUDIT_ARCHIVE_SEGMENT_SIZE", "1000"))
+AUDIT_ARCHIVE_INTERVAL_HOURS = float(os.getenv("AUDIT_ARCHIVE_INTERVAL_HOURS", "24"))  # 0 disables
+# Records waiting for a Merkle anchor stay hot unless anchoring is switched off
+AUDIT_ARCHIVE_REQUIRE_ANCHOR = int(os.getenv("AUDIT_ANCHOR_INTERVAL_SECONDS", "300")) > 0
+AUDIT_ARCHIVE_LEASE_SECONDS = 3600
+AUDIT_ARCHIVE_LEASE_RENEW_SECONDS = 300
+
+_instance_id = uuid.uuid4().hex
+_archive_task: Optional[asyncio.Task] = None
+
+
+def compress_records(records: List[Dict[str, Any]]) -> Binary:
+    return Binary(zlib.compress(bson.encode({"records": records})))
+
+
+def decompress_records(payload: bytes) -> List[Dict[str, Any]]:
+    return bson.decode(zlib.decompress(payload))["records"]
+
+
+async def load_archived_records(
+    db,
+    asset_id: str,
+    min_index: Optional[int] = None,
+    max_index: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    descending: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Archived records of an asset, optionally within a chain_index range and
+    timestamp window, sorted by chain_index (newest first if `descending`).
+    Only the segments overlapping the range are decompressed.
+    """
+    query: Dict[str, Any] = {"asset_id": asset_id}
+    if min_index is not None:
+        query["last_index"] = {"$gte": min_index}
+    if max_index is not None:
+        query["first_index"] = {"$lte": max_index}
+    if since is not None:
+        query["last_timestamp"] = {"$gte": since}
+    if until is not None:
+        query["first_timestamp"] = {"$lte": until}
+
+    records = []
+    async for segment in db.audit_chain_archive.find(query).sort("first_index", -1 if descending else 1):
+        segment_records = decompress_records(segment["payload"])
+        if descending:
+            segment_records.reverse()
+        for record in segment_records:
+            if min_index is not None and record["chain_index"] < min_index:
+                continue
+            if max_index is not None and record["chain_index"] > max_index:
+                continue
+            if since is not None and record["timestamp"] < since:
+                continue
+            if until is not None and record["timestamp"] > until:
+                continue
+            records.append(record)
+            if limit is not None and len(records) >= limit:
+                return records
+    return records
+
+
+async def has_archived_records(db, asset_id: str) -> bool:
+    return await db.audit_chain_archive.find_one({"asset_id": asset_id}, {"_id": 1}) is not None
+
+
+async def find_archived_record(db, record_id: ObjectId) -> Optional[Dict[str, Any]]:
+    segment = await db.audit_chain_archive.find_one({"record_ids": record_id})
+    if not segment:
+        return None
+    return next((r for r in decompress_records(segment["payload"]) if r["_id"] == record_id), None)
+
+
+async def find_audit_record(db, record_id: ObjectId) -> Optional[Dict[str, Any]]:
+    """An audit record by id from the hot collection, else the archive"""
+    record = await db.audit_chain.find_one({"_id": record_id})
+    return record or await find_archived_record(db, record_id)
+
+
+async def _archive_limit(db, asset_id: str) -> int:
+    """Records at or above this chain_index must stay hot"""
+    head = await db.audit_chain_heads.find_one({"asset_id": asset_id})
+    if head is None:
+        latest = await db.audit_chain.find_one({"asset_id": asset_id}, {"chain_index": 1}, sort=[("chain_index", -1)])
+        limit = latest["chain_index"] if latest else 0
+    else:
+        limit = head["last_index"]
+    checkpoint = await db.audit_checkpoints.find_one({"asset_id": asset_id}, {"last_index": 1})
+    if checkpoint:
+        limit = min(limit, checkpoint["last_index"])
+    return limit
+
+
+async def archive_asset(db, asset_id: str, cutoff: datetime) -> int:
+    """Move this asset's eligible old records to the archive; returns how many moved"""
+    # A run that stopped between writing a segment and deleting its hot
+    # copies left them behind; each run finishes that first, so only the
+    # newest segment can be affected
+    newest = await db.audit_chain_archive.find_one(
+        {"asset_id": asset_id}, {"record_ids": 1}, sort=[("first_index", -1)]
+    )
+    if newest:
+        await db.audit_chain.delete_many({"_id": {"$in": newest["record_ids"]}})
+
+    limit = await _archive_limit(db, asset_id)
+    query: Dict[str, Any] = {"asset_id": asset_id, "timestamp": {"$lt": cutoff}, "chain_index": {"$lt": limit}}
+    if AUDIT_ARCHIVE_REQUIRE_ANCHOR:
+        query["anchor_id"] = {"$ne": None}
+
+    moved = 0
+    while True:
+        records = await db.audit_chain.find(query).sort("chain_index", 1).limit(
+            AUDIT_ARCHIVE_SEGMENT_SIZE
+        ).to_list(length=AUDIT_ARCHIVE_SEGMENT_SIZE)
+        # Only archive a contiguous run starting right after what is already archived
+        previous = await db.audit_chain_archive.find_one(
+            {"asset_id": asset_id}, {"last_index": 1}, sort=[("first_index", -1)]
+        )
+        expected = previous["last_index"] + 1 if previous else 0
+        contiguous = []
+        for record in records:
+            if record["chain_index"] != expected:
+                break
+            contiguous.append(record)
+            expected += 1
+        if not contiguous:
+            return moved
+
+        record_ids = [r["_id"] for r in contiguous]
+        await db.audit_chain_archive.insert_one({
+            "asset_id": asset_id,
+            "first_index": contiguous[0]["chain_index"],
+            "last_index": contiguous[-1]["chain_index"],
+            "first_timestamp": contiguous[0]["timestamp"],
+            "last_timestamp": contiguous[-1]["timestamp"],
+            "last_hash": contiguous[-1]["current_hash"],
+            "record_count": len(contiguous),
+            "record_ids": record_ids,
+            "payload": compress_records(contiguous),
+            "archived_at": datetime.utcnow()
+        })
+        await db.audit_chain.delete_many({"_id": {"$in": record_ids}})
+        moved += len(contiguous)
+        if len(contiguous) < len(records) or len(records) < AUDIT_ARCHIVE_SEGMENT_SIZE:
+            return moved
+
+
+async def _acquire_lease(db, seconds: int) -> bool:
+    """Only one worker archives at a time; the lease expires if it dies"""
+    now = datetime.utcnow()
+    try:
+        await db.audit_archive_state.find_one_and_update(
+            {"_id": "lease", "$or": [{"expires_at": {"$lt": now}}, {"holder": _instance_id}]},
+            {"$set": {"holder": _instance_id, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def _release_lease(db):
+    await db.audit_archive_state.update_one(
+        {"_id": "lease", "holder": _instance_id}, {"$set": {"expires_at": datetime.utcnow()}}
+    )
+
+
+async def run_archival(db, retention_days: int = AUDIT_ARCHIVE_RETENTION_DAYS) -> Optional[Dict[str, Any]]:
+    """
+    Archive every asset's records older than `retention_days`.
+    Returns a summary, or None if another worker is already archiving.
+    """
+    if not await _acquire_lease(db, AUDIT_ARCHIVE_LEASE_SECONDS):
+        return None
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        started = renewed = datetime.utcnow()
+        assets = records = 0
+        async for group in db.audit_chain.aggregate([
+            {"$match": {"timestamp": {"$lt": cutoff}}},
+            {"$group": {"_id": "$asset_id"}}
+        ]):
+            # Keep the lease alive on long runs; stop if another worker took it over
+            if (datetime.utcnow() - renewed).total_seconds() > AUDIT_ARCHIVE_LEASE_RENEW_SECONDS:
+                if not await _acquire_lease(db, AUDIT_ARCHIVE_LEASE_SECONDS):
+                    print("Audit archival stopped: lease taken over by another worker")
+                    break
+                renewed = datetime.utcnow()
+            moved = await archive_asset(db, group["_id"], cutoff)
+            if moved:
+                assets += 1
+                records += moved
+        summary = {
+            "cutoff": cutoff,
+            "assets_archived": assets,
+            "records_archived": records,
+            "started_at": started,
+            "finished_at": datetime.utcnow()
+        }
+        await db.audit_archive_state.update_one({"_id": "last_run"}, {"$set": summary}, upsert=True)
+        return summary
+    finally:
+        await _release_lease(db)
+
+
+async def get_archive_stats(db) -> Dict[str, Any]:
+    totals = await db.audit_chain_archive.aggregate([
+        {"$group": {
+            "_id": None,
+            "segments": {"$sum": 1},
+            "records": {"$sum": "$record_count"},
+            "compressed_bytes": {"$sum": {"$binarySize": "$payload"}}
+        }}
+    ]).to_list(length=1)
+    last_run = await db.audit_archive_state.find_one({"_id": "last_run"}, {"_id": 0})
+    return {
+        "hot_records": await db.audit_chain.estimated_document_count(),
+        "archived_segments": totals[0]["segments"] if totals else 0,
+        "archived_records": totals[0]["records"] if totals else 0,
+        "archived_compressed_bytes": totals[0]["compressed_bytes"] if totals else 0,
+        "retention_days": AUDIT_ARCHIVE_RETENTION_DAYS,
+        "last_run": last_run
+    }
+
+
+async def _archive_loop(get_db):
+    while True:
+        await asyncio.sleep(AUDIT_ARCHIVE_INTERVAL_HOURS * 3600)
+        db = get_db()
+        if db is None:
+            continue
+        try:
+            await run_archival(db)
+        except Exception as e:
+            print(f"Audit archival failed: {e}")
+
+
+def start_archival(get_db):
+    """Archive old audit records every AUDIT_ARCHIVE_INTERVAL_HOURS"""
+    global _archive_task
+    if AUDIT_ARCHIVE_INTERVAL_HOURS <= 0 or _archive_task is not None:
+        return
+    _archive_task = asyncio.create_task(_archive_loop(get_db))
+
+
+async def shutdown_archival():
+    global _archive_task
+    if _archive_task is not None:
+        _archive_task.cancel()
+        await asyncio.gather(_archive_task, return_exceptions=True)
+        _archive_task = None
@@ -0,0 +1,332 @@
+# audit_verifier.py
+"""
+Fleet-wide audit-chain verification.
+Streams audit_chain sorted by (asset_id, chain_index) in a single cursor,
+completes chains with their archived records, hands batches of whole
+chains to a process pool for rehashing, and records progress, broken
+chains and refreshed checkpoints as it goes. Jobs that stop part-way can
+be resumed from the last fully verified asset.
+"""
+
+import os
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils.audit import verify_records, sign_checkpoint
+from audit_archive import load_archived_records
+
+AUDIT_VERIFY_WORKERS = int(os.getenv("AUDIT_VERIFY_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Chains per process-pool task, and how many tasks may be outstanding at once
+AUDIT_VERIFY_BATCH_ASSETS = int(os.getenv("AUDIT_VERIFY_BATCH_ASSETS", "500"))
+AUDIT_VERIFY_MAX_IN_FLIGHT = int(os.getenv("AUDIT_VERIFY_MAX_IN_FLIGHT", str(AUDIT_VERIFY_WORKERS * 2)))
+# UTC hour for the nightly run; empty disables the schedule
+AUDIT_VERIFY_SCHEDULE_HOUR = os.getenv("AUDIT_VERIFY_SCHEDULE_HOUR", "2")
+# A running job not updated for this long is considered dead and may be resumed
+AUDIT_VERIFY_STALE_SECONDS = int(os.getenv("AUDIT_VERIFY_STALE_SECONDS", "600"))
+
+RECORD_PROJECTION = {
+    "_id": 0, "timestamp": 1, "asset_id": 1, "field_changed": 1, "old_value": 1,
+    "new_value": 1, "changed_by_user_id": 1, "previous_hash": 1, "current_hash": 1, "chain_index": 1
+}
+
+
+class VerificationJobStatus:
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    INTERRUPTED = "interrupted"
+
+    RESUMABLE = (FAILED, INTERRUPTED)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_tasks: Dict[str, asyncio.Task] = {}
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Get or create the verification process pool"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=AUDIT_VERIFY_WORKERS)
+    return _executor
+
+
+def verify_chain_batch(chains: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Verify complete chains from genesis (runs in a worker process)"""
+    results = []
+    for records in chains:
+        verified_count, broken_at_index, error_message = verify_records(records, None)
+        results.append({
+            "asset_id": records[0]["asset_id"],
+            "total_records": len(records),
+            "is_valid": broken_at_index is None,
+            "broken_at_index": broken_at_index,
+            "error_message": error_message,
+            "head_index": records[-1]["chain_index"],
+            "head_hash": records[-1]["current_hash"]
+        })
+    return results
+
+
+def verification_job_helper(job) -> dict:
+    total = job.get("total_records") or 0
+    return {
+        "id": str(job["_id"]),
+        "status": job["status"],
+        "trigger": job.get("trigger"),
+        "started_at": job.get("started_at"),
+        "updated_at": job.get("updated_at"),
+        "finished_at": job.get("finished_at"),
+        "assets_verified": job.get("assets_verified", 0),
+        "records_verified": job.get("records_verified", 0),
+        "broken_chains": job.get("broken_chains", 0),
+        "total_records": total,
+        "progress": round(min(1.0, job.get("records_verified", 0) / total), 4) if total else None,
+        "cursor_asset_id": job.get("cursor_asset_id"),
+        "error": job.get("error")
+    }
+
+
+async def _refresh_checkpoints(db, results: List[Dict[str, Any]]):
+    """Store checkpoints for valid chains unless a newer one already exists"""
+    valid = {r["asset_id"]: r for r in results if r["is_valid"]}
+    if not valid:
+        return
+    current = {}
+    async for checkpoint in db.audit_checkpoints.find(
+        {"asset_id": {"$in": list(valid)}}, {"asset_id": 1, "last_index": 1}
+    ):
+        current[checkpoint["asset_id"]] = checkpoint["last_index"]
+
+    now = datetime.utcnow()
+    updates = [
+        UpdateOne(
+            {"asset_id": asset_id},
+            {"$set": {
+                "asset_id": asset_id,
+                "last_index": r["head_index"],
+                "last_hash": r["head_hash"],
+                "signature": sign_checkpoint(asset_id, r["head_index"], r["head_hash"]),
+                "verified_at": now
+            }},
+            upsert=True
+        )
+        for asset_id, r in valid.items()
+        if current.get(asset_id, -1) < r["head_index"]
+    ]
+    if updates:
+        await db.audit_checkpoints.bulk_write(updates, ordered=False)
+
+
+async def _record_batch(db, job_id: ObjectId, last_asset_id: str, results: List[Dict[str, Any]]):
+    """Persist one finished batch and advance the resume cursor past it"""
+    broken = [r for r in results if not r["is_valid"]]
+    if broken:
+        now = datetime.utcnow()
+        await db.audit_verification_failures.insert_many([
+            {
+                "job_id": job_id,
+                "asset_id": r["asset_id"],
+                "total_records": r["total_records"],
+                "broken_at_index": r["broken_at_index"],
+                "error_message": r["error_message"],
+                "detected_at": now
+            }
+            for r in broken
+        ])
+        # Broken chains must not keep a checkpoint incremental runs would trust
+        await db.audit_checkpoints.delete_many({"asset_id": {"$in": [r["asset_id"] for r in broken]}})
+    await _refresh_checkpoints(db, results)
+    await db.audit_verification_jobs.update_one(
+        {"_id": job_id},
+        {
+            "$inc": {
+                "assets_verified": len(results),
+                "records_verified": sum(r["total_records"] for r in results),
+                "broken_chains": len(broken)
+            },
+            "$set": {"cursor_asset_id": last_asset_id, "updated_at": datetime.utcnow()}
+        }
+    )
+
+
+async def run_verification_job(db, job_id: ObjectId):
+    """Verify every chain after the job's cursor; safe to call again to resume"""
+    job = await db.audit_verification_jobs.find_one({"_id": job_id})
+    query = {}
+    if job.get("cursor_asset_id"):
+        query["asset_id"] = {"$gt": job["cursor_asset_id"]}
+
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    # Batches finish in submission order so the cursor only moves past whole batches
+    pending = deque()
+
+    async def complete_oldest():
+        last_asset_id, future = pending.popleft()
+        await _record_batch(db, job_id, last_asset_id, await future)
+
+    async def submit(batch):
+        # Chains whose oldest records were archived are completed from the archive
+        for chain in batch:
+            if chain[0]["chain_index"] > 0:
+                archived = await load_archived_records(db, chain[0]["asset_id"], max_index=chain[0]["chain_index"] - 1)
+                chain[:0] = [{k: r.get(k) for k in RECORD_PROJECTION if k != "_id"} for r in archived]
+        pending.append((batch[-1][0]["asset_id"], loop.run_in_executor(executor, verify_chain_batch, batch)))
+        while len(pending) >= AUDIT_VERIFY_MAX_IN_FLIGHT:
+            await complete_oldest()
+
+    try:
+        batch: List[List[Dict[str, Any]]] = []
+        chain: List[Dict[str, Any]] = []
+        cursor = db.audit_chain.find(query, RECORD_PROJECTION).sort(
+            [("asset_id", 1), ("chain_index", 1)]
+        ).batch_size(5000)
+        async for record in cursor:
+            if chain and record["asset_id"] != chain[0]["asset_id"]:
+                batch.append(chain)
+                chain = []
+                if len(batch) >= AUDIT_VERIFY_BATCH_ASSETS:
+                    await submit(batch)
+                    batch = []
+            chain.append(record)
+        if chain:
+            batch.append(chain)
+        if batch:
+            await submit(batch)
+        while pending:
+            await complete_oldest()
+    except asyncio.CancelledError:
+        await db.audit_verification_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": VerificationJobStatus.INTERRUPTED, "updated_at": datetime.utcnow()}}
+        )
+        raise
+    except Exception as e:
+        print(f"Audit verification job {job_id} failed: {e}")
+        await db.audit_verification_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": VerificationJobStatus.FAILED, "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+        return
+
+    now = datetime.utcnow()
+    await db.audit_verification_jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"status": VerificationJobStatus.COMPLETED, "finished_at": now, "updated_at": now}}
+    )
+    job = await db.audit_verification_jobs.find_one({"_id": job_id})
+    if job.get("broken_chains"):
+        print(f" SECURITY ALERT: Audit verification job {job_id} found {job['broken_chains']} broken chains")
+
+
+def _launch(db, job_id: ObjectId):
+    task = asyncio.create_task(run_verification_job(db, job_id))
+    _tasks[str(job_id)] = task
+    task.add_done_callback(lambda _: _tasks.pop(str(job_id), None))
+
+
+async def start_verification_job(db, trigger: str = "manual", scheduled_for: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create a job and run it in the background. Raises DuplicateKeyError if
+    a scheduled job for the same day already exists (another worker won).
+    """
+    now = datetime.utcnow()
+    job = {
+        "status": VerificationJobStatus.RUNNING,
+        "trigger": trigger,
+        "started_at": now,
+        "updated_at": now,
+        "finished_at": None,
+        "assets_verified": 0,
+        "records_verified": 0,
+        "broken_chains": 0,
+        "total_records": await db.audit_chain.estimated_document_count(),
+        "cursor_asset_id": None
+    }
+    if scheduled_for:
+        job["scheduled_for"] = scheduled_for
+    result = await db.audit_verification_jobs.insert_one(job)
+    job["_id"] = result.inserted_id
+    _launch(db, result.inserted_id)
+    return job
+
+
+async def resume_verification_job(db, job_id: ObjectId) -> Optional[Dict[str, Any]]:
+    """
+    Continue a failed, interrupted or stale job from its cursor.
+    Returns the job, or None if it cannot be resumed.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=AUDIT_VERIFY_STALE_SECONDS)
+    job = await db.audit_verification_jobs.find_one_and_update(
+        {
+            "_id": job_id,
+            "$or": [
+                {"status": {"$in": list(VerificationJobStatus.RESUMABLE)}},
+                {"status": VerificationJobStatus.RUNNING, "updated_at": {"$lt": stale_before}}
+            ]
+        },
+        {
+            "$set": {"status": VerificationJobStatus.RUNNING, "updated_at": datetime.utcnow(), "error": None},
+            "$inc": {"resume_count": 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if job is None or str(job_id) in _tasks:
+        return None
+    _launch(db, job_id)
+    return job
+
+
+def _seconds_until_hour(hour: int) -> float:
+    now = datetime.utcnow()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def _nightly_schedule(get_db, hour: int):
+    while True:
+        await asyncio.sleep(_seconds_until_hour(hour))
+        db = get_db()
+        if db is None:
+            continue
+        try:
+            # The unique scheduled_for index lets exactly one worker start the run
+            await start_verification_job(db, trigger="scheduled", scheduled_for=datetime.utcnow().date().isoformat())
+        except DuplicateKeyError:
+            pass
+        except Exception as e:
+            print(f"Could not start scheduled audit verification: {e}")
+
+
+def start_verification_scheduler(get_db):
+    """Start the nightly verification schedule (AUDIT_VERIFY_SCHEDULE_HOUR, UTC)"""
+    global _scheduler_task
+    if AUDIT_VERIFY_SCHEDULE_HOUR == "" or _scheduler_task is not None:
+        return
+    _scheduler_task = asyncio.create_task(_nightly_schedule(get_db, int(AUDIT_VERIFY_SCHEDULE_HOUR)))
+
+
+async def shutdown_audit_verifier():
+    """Stop the schedule and running jobs (they are marked interrupted), then the pool"""
+    global _executor, _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        _scheduler_task = None
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -7,15 +7,20 @@ from config import CORS_ORIGINS
 from database import startup_db_client, shutdown_db_client, get_database
 from routes import (
     auth_router, assets_router, users_router, procurement_router,
-    analytics_router, audit_router, agent_router
+    analytics_router, audit_router, agent_router, events_router
 )
 from utils import asset_helper
 from auth import get_current_user
 from models import UserResponse
+from audit_verifier import start_verification_scheduler, shutdown_audit_verifier
+from audit_anchoring import start_anchoring, shutdown_anchoring
+from audit_archive import start_archival, shutdown_archival
+from asset_counts import start_asset_count_reconciler, shutdown_asset_count_reconciler
+from event_bus import start_change_streams, shutdown_change_streams
 
 # Import scanner API if available
 try:
-    from scanner_api_simple import create_scanner_router
+    from scanner_api_simple import create_scanner_router, shutdown_scanner
     SCANNER_AVAILABLE = True
 except ImportError:
     SCANNER_AVAILABLE = False
@@ -26,8 +31,20 @@ except ImportError:
 async def lifespan(app: FastAPI):
     # Startup
     await startup_db_client()
+    start_verification_scheduler(get_database)
+    start_anchoring(get_database)
+    start_archival(get_database)
+    start_asset_count_reconciler(get_database)
+    start_change_streams(get_database)
     yield
     # Shutdown
+    await shutdown_change_streams()
+    await shutdown_asset_count_reconciler()
+    await shutdown_archival()
+    await shutdown_anchoring()
+    await shutdown_audit_verifier()
+    if SCANNER_AVAILABLE:
+        await shutdown_scanner()
     await shutdown_db_client()
 
 # Initialize FastAPI app
@@ -55,6 +72,7 @@ app.include_router(procurement_router)
 app.include_router(analytics_router)
 app.include_router(audit_router)
 app.include_router(agent_router)
+app.include_router(events_router)
 
 # Include scanner router if available
 if SCANNER_AVAILABLE:
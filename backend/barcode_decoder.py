@@ -0,0 +1,111 @@
+# barcode_decoder.py
+"""
+Local barcode/QR decoding for the scanner.
+Decoding is CPU-bound, so it runs in a process pool to keep the event loop free.
+Uses pyzbar when available and falls back to OpenCV's QR detector.
+"""
+
+import os
+import io
+import base64
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict
+
+try:
+    from PIL import Image
+    from pyzbar import pyzbar
+    PYZBAR_AVAILABLE = True
+except ImportError:
+    PYZBAR_AVAILABLE = False
+
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+DECODER_AVAILABLE = PYZBAR_AVAILABLE or OPENCV_AVAILABLE
+DECODER_WORKERS = int(os.getenv("DECODER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def image_bytes_from_data_url(image_data: str) -> bytes:
+    """Decode a base64 image string, with or without the data:...;base64, prefix"""
+    payload = image_data.split(",", 1)[1] if image_data.startswith("data:") else image_data
+    return base64.b64decode(payload)
+
+
+def decode_codes(image_bytes: bytes) -> List[Dict[str, str]]:
+    """
+    Decode all barcodes/QR codes in an image (runs inside a worker process).
+    Returns [{"data": ..., "type": ...}] in the order found, de-duplicated.
+    """
+    codes = []
+
+    if PYZBAR_AVAILABLE:
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            image = image.convert("L")
+            for symbol in pyzbar.decode(image):
+                codes.append({
+                    "data": symbol.data.decode("utf-8", errors="replace").strip(),
+                    "type": symbol.type
+                })
+        except Exception as e:
+            print(f"pyzbar decode failed: {e}")
+
+    if not codes and OPENCV_AVAILABLE:
+        try:
+            array = np.frombuffer(image_bytes, dtype=np.uint8)
+            image = cv2.imdecode(array, cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                data, _, _ = cv2.QRCodeDetector().detectAndDecode(image)
+                if data:
+                    codes.append({"data": data.strip(), "type": "QRCODE"})
+        except Exception as e:
+            print(f"OpenCV decode failed: {e}")
+
+    seen = set()
+    unique = []
+    for code in codes:
+        if code["data"] and code["data"] not in seen:
+            seen.add(code["data"])
+            unique.append(code)
+    return unique
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Get or create the shared image-processing process pool"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=DECODER_WORKERS)
+    return _executor
+
+
+async def decode_image_bytes(image_bytes: bytes) -> List[Dict[str, str]]:
+    """Decode barcodes/QR codes from raw image bytes without blocking the event loop"""
+    if not DECODER_AVAILABLE or not image_bytes:
+        return []
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), decode_codes, image_bytes)
+
+
+async def decode_image(image_data: str) -> List[Dict[str, str]]:
+    """Decode barcodes/QR codes from a base64 image without blocking the event loop"""
+    try:
+        image_bytes = image_bytes_from_data_url(image_data)
+    except Exception:
+        return []
+    return await decode_image_bytes(image_bytes)
+
+
+def shutdown_decoder():
+    """Shut down the decoder process pool"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
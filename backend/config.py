@@ -12,3 +12,44 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 # CORS Configuration
 CORS_ORIGINS = ["*"]
+
+# Agent heartbeat scheduling (seconds)
+HEARTBEAT_BASE_INTERVAL = int(os.getenv("HEARTBEAT_BASE_INTERVAL", "30"))
+HEARTBEAT_MIN_INTERVAL = int(os.getenv("HEARTBEAT_MIN_INTERVAL", "15"))
+HEARTBEAT_MAX_INTERVAL = int(os.getenv("HEARTBEAT_MAX_INTERVAL", "240"))
+# Heartbeats per second the backend is comfortable ingesting
+HEARTBEAT_TARGET_RATE = float(os.getenv("HEARTBEAT_TARGET_RATE", "20"))
+
+# AI result cache
+AI_CACHE_MEMORY_SIZE = int(os.getenv("AI_CACHE_MEMORY_SIZE", "1000"))
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Batch scanning
+BATCH_SCAN_CONCURRENCY = int(os.getenv("BATCH_SCAN_CONCURRENCY", "4"))
+BATCH_SCAN_MAX_IMAGES = int(os.getenv("BATCH_SCAN_MAX_IMAGES", "100"))
+
+# Device catalog: skip LLM enrichment for well-known manufacturer/model pairs
+CATALOG_MIN_OBSERVATIONS = int(os.getenv("CATALOG_MIN_OBSERVATIONS", "2"))
+CATALOG_MIN_CONFIDENCE = float(os.getenv("CATALOG_MIN_CONFIDENCE", "0.8"))
+
+# User assignment suggestions: local scorer, LLM only as an optional re-ranker
+USER_SUGGEST_LLM_RERANK = os.getenv("USER_SUGGEST_LLM_RERANK", "false").lower() == "true"
+USER_SUGGEST_RERANK_TOP_K = int(os.getenv("USER_SUGGEST_RERANK_TOP_K", "5"))
+
+# Audit chain verification checkpoints (HMAC key; defaults to the JWT secret)
+AUDIT_CHECKPOINT_KEY = os.getenv("AUDIT_CHECKPOINT_KEY", SECRET_KEY)
+
+# Audit chain appends: retries on a chain_index conflict, cached chain heads
+AUDIT_APPEND_MAX_RETRIES = int(os.getenv("AUDIT_APPEND_MAX_RETRIES", "5"))
+AUDIT_HEAD_CACHE_SIZE = int(os.getenv("AUDIT_HEAD_CACHE_SIZE", "10000"))
+
+# Asset fields recorded in the audit chain when they change (plus create/delete events)
+AUDIT_TRACKED_FIELDS = [
+    field.strip()
+    for field in os.getenv(
+        "AUDIT_TRACKED_FIELDS",
+        "name,type,category,status,assignedTo,assignedToUserId,department,location,cost,serialNumber,"
+        "vendor,warranty,lifecycle,tags,complianceStatus,maintenanceSchedule"
+    ).split(",")
+    if field.strip()
+]
@@ -1,12 +1,174 @@
+from collections import Counter
+from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
-from config import MONGODB_URL, DATABASE_NAME
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config import MONGODB_URL, DATABASE_NAME, AI_CACHE_TTL_SECONDS
+from utils.helpers import normalize_serial
+from utils.audit import audit_stat_increments, AUDIT_STATS_TOTAL, AUDIT_STATS_FIELD, AUDIT_STATS_USER
+from audit_archive import decompress_records
 
 # Global variables for database
 mongodb_client: AsyncIOMotorClient = None
 database = None
+# False while duplicate serials keep the unique serialNormalized index from being built
+serial_unique_enforced = False
+
+MIGRATION_BATCH_SIZE = 1000
+
+async def migrate_normalized_serials(db) -> list:
+    """
+    Backfill assets.serialNormalized and report serials that collide once
+    normalized (see find_serial_duplicates).
+    """
+    updates = []
+    backfilled = 0
+    async for asset in db.assets.find(
+        {"serialNormalized": {"$exists": False}, "serialNumber": {"$nin": [None, ""]}},
+        {"serialNumber": 1}
+    ):
+        updates.append(UpdateOne(
+            {"_id": asset["_id"]},
+            {"$set": {"serialNormalized": normalize_serial(asset["serialNumber"])}}
+        ))
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            await db.assets.bulk_write(updates, ordered=False)
+            backfilled += len(updates)
+            updates = []
+    if updates:
+        await db.assets.bulk_write(updates, ordered=False)
+        backfilled += len(updates)
+    if backfilled:
+        print(f"Backfilled serialNormalized on {backfilled} assets")
+    return await find_serial_duplicates(db)
+
+async def find_serial_duplicates(db) -> list:
+    """
+    Serials that collide once normalized (read-only).
+    Returns [{"serialNormalized", "asset_ids", "serialNumbers"}].
+    """
+    duplicates = await db.assets.aggregate([
+        {"$match": {"serialNormalized": {"$type": "string"}}},
+        {"$group": {
+            "_id": "$serialNormalized",
+            "asset_ids": {"$push": {"$toString": "$_id"}},
+            "serialNumbers": {"$push": "$serialNumber"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]).to_list(length=None)
+
+    return [
+        {"serialNormalized": d["_id"], "asset_ids": d["asset_ids"], "serialNumbers": d["serialNumbers"]}
+        for d in duplicates
+    ]
+
+async def ensure_serial_available(db, serial_normalized, exclude_id=None):
+    """
+    Raise DuplicateKeyError if another asset already has this normalized
+    serial. The unique index does this atomically; this lookup only stands
+    in for it while the index is absent, so existing duplicates can't grow.
+    """
+    if serial_unique_enforced or not serial_normalized:
+        return
+    query = {"serialNormalized": serial_normalized}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+    if await db.assets.find_one(query, {"_id": 1}):
+        raise DuplicateKeyError(f"serialNormalized {serial_normalized!r} already exists")
+
+async def migrate_assignee_ids(db) -> int:
+    """
+    Backfill assets.assignedToUserId from the assignedTo name. Names that
+    match no user, or several, are left unresolved (and retried on the
+    next startup). Returns the number of unresolved assets.
+    """
+    user_ids = {}  # name -> id, None when the name is ambiguous
+    async for user in db.users.find({}, {"name": 1}):
+        name = user.get("name")
+        user_ids[name] = None if name in user_ids else str(user["_id"])
+
+    updates = []
+    resolved = unresolved = 0
+    async for asset in db.assets.find(
+        # Missing, or left null when the name couldn't be resolved at write time
+        {"assignedToUserId": None, "assignedTo": {"$nin": [None, ""]}},
+        {"assignedTo": 1}
+    ):
+        user_id = user_ids.get(asset["assignedTo"])
+        if not user_id:
+            unresolved += 1
+            continue
+        updates.append(UpdateOne({"_id": asset["_id"]}, {"$set": {"assignedToUserId": user_id}}))
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            await db.assets.bulk_write(updates, ordered=False)
+            resolved += len(updates)
+            updates = []
+    if updates:
+        await db.assets.bulk_write(updates, ordered=False)
+        resolved += len(updates)
+    if resolved:
+        print(f"Backfilled assignedToUserId on {resolved} assets")
+    if unresolved:
+        print(f"WARNING: {unresolved} assets are assigned to a name that matches no single user")
+    return unresolved
+
+async def migrate_audit_statistics(db) -> int:
+    """
+    Build the daily audit statistics buckets from records (hot and archived)
+    written before live counting started. The cutoff is fixed by the first
+    startup, before it serves any append, and every later append adds to
+    `count` itself; the backfill only $sets a separate `backfilled` count for
+    older records, so it can be re-run after a crash and never overwrites
+    live increments. Returns the buckets written.
+    """
+    state = await db.audit_stats_state.find_one_and_update(
+        {"_id": "backfill"},
+        {"$setOnInsert": {"cutoff": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if state.get("completed_at"):
+        return 0
+    cutoff = state["cutoff"]
+
+    increments = Counter()
+    async for group in db.audit_chain.aggregate([
+        {"$match": {"timestamp": {"$lt": cutoff}}},
+        {"$group": {
+            "_id": {
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                "field": "$field_changed",
+                "user": "$changed_by_email"
+            },
+            "count": {"$sum": 1}
+        }}
+    ], allowDiskUse=True):
+        day = group["_id"]["day"]
+        increments[(AUDIT_STATS_TOTAL, day, None)] += group["count"]
+        increments[(AUDIT_STATS_FIELD, day, group["_id"]["field"])] += group["count"]
+        increments[(AUDIT_STATS_USER, day, group["_id"].get("user"))] += group["count"]
+    async for segment in db.audit_chain_archive.find({"first_timestamp": {"$lt": cutoff}}, {"payload": 1}):
+        records = [r for r in decompress_records(segment["payload"]) if r["timestamp"] < cutoff]
+        increments.update(audit_stat_increments(records))
+
+    updates = [
+        UpdateOne(
+            {"dimension": dimension, "day": day, "key": key},
+            {"$set": {"backfilled": count}},
+            upsert=True
+        )
+        for (dimension, day, key), count in increments.items()
+    ]
+    for start in range(0, len(updates), MIGRATION_BATCH_SIZE):
+        await db.audit_stats_daily.bulk_write(updates[start:start + MIGRATION_BATCH_SIZE], ordered=False)
+    await db.audit_stats_state.update_one({"_id": "backfill"}, {"$set": {"completed_at": datetime.utcnow()}})
+    if updates:
+        print(f"Built {len(updates)} daily audit statistics buckets")
+    return len(updates)
 
 async def startup_db_client():
-    global mongodb_client, database
+    global mongodb_client, database, serial_unique_enforced
     mongodb_client = AsyncIOMotorClient(MONGODB_URL)
     database = mongodb_client[DATABASE_NAME]
     
@@ -15,8 +177,34 @@ async def startup_db_client():
     await database.users.create_index("email", unique=True)
     await database.users.create_index("status")
     await database.users.create_index("role")
+    await database.users.create_index([("status", 1), ("department", 1)])
+    await database.users.create_index("name")
     await database.assets.create_index("serialNumber")
+    
+    # Unique normalized serial; only enforced once existing duplicates are resolved
+    duplicates = await migrate_normalized_serials(database)
+    if duplicates:
+        print(f"WARNING: {len(duplicates)} serial numbers are duplicated after normalization; "
+              "unique serial index not created")
+        for duplicate in duplicates:
+            print(f"  {duplicate['serialNormalized']}: assets {', '.join(duplicate['asset_ids'])}")
+        await database.assets.create_index("serialNormalized")
+        serial_unique_enforced = False
+    else:
+        # The plain index from a run that still had duplicates is now redundant
+        if "serialNormalized_1" in await database.assets.index_information():
+            await database.assets.drop_index("serialNormalized_1")
+        await database.assets.create_index(
+            "serialNormalized",
+            name="serialNormalized_unique",
+            unique=True,
+            partialFilterExpression={"serialNormalized": {"$type": "string"}}
+        )
+        serial_unique_enforced = True
     await database.assets.create_index("department")
+    await database.assets.create_index("assignedTo")
+    await database.assets.create_index("assignedToUserId")
+    await migrate_assignee_ids(database)
     
     # Add index for agent status
     await database.agent_status.create_index("serial_number", unique=True)
@@ -27,6 +215,29 @@ async def startup_db_client():
     await database.audit_chain.create_index("asset_id")
     await database.audit_chain.create_index("timestamp")
     await database.audit_chain.create_index("changed_by_user_id")
+    await database.audit_chain_heads.create_index("asset_id", unique=True)
+    await database.audit_checkpoints.create_index("asset_id", unique=True)
+    await database.audit_chain.create_index([("anchor_id", 1), ("timestamp", 1)])
+    await database.audit_anchors.create_index("created_at")
+    await database.audit_chain_archive.create_index([("asset_id", 1), ("first_index", 1)], unique=True)
+    await database.audit_chain_archive.create_index("record_ids")
+    await database.audit_verification_jobs.create_index("started_at")
+    await database.audit_verification_jobs.create_index(
+        "scheduled_for",
+        unique=True,
+        partialFilterExpression={"scheduled_for": {"$type": "string"}}
+    )
+    await database.audit_verification_failures.create_index("job_id")
+    await database.audit_verification_failures.create_index([("asset_id", 1), ("detected_at", -1)])
+    await database.audit_stats_daily.create_index([("dimension", 1), ("day", 1), ("key", 1)], unique=True)
+    await migrate_audit_statistics(database)
+    
+    # Add indexes for AI result cache (entries expire via TTL index)
+    await database.ai_cache.create_index([("kind", 1), ("key", 1)], unique=True)
+    await database.ai_cache.create_index("createdAt", expireAfterSeconds=AI_CACHE_TTL_SECONDS)
+    
+    # Add index for device catalog
+    await database.device_catalog.create_index("key", unique=True)
     
     # Add indexes for procurement requests
     await database.procurement_requests.create_index("requestor_id")
@@ -0,0 +1,247 @@
+# device_catalog.py
+"""
+Device catalog keyed by normalized manufacturer + model.
+Built from existing assets and past enrichment results so enrichment of
+models we have already seen can skip the LLM entirely.
+"""
+
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from pymongo.errors import DuplicateKeyError
+
+from config import CATALOG_MIN_OBSERVATIONS, CATALOG_MIN_CONFIDENCE
+
+# Rebuilds are written here, then renamed over device_catalog
+CATALOG_STAGING_COLLECTION = "device_catalog_rebuild"
+# A rebuild that dies stops mirroring live observations after this long
+CATALOG_REBUILD_LEASE_SECONDS = 600
+
+_instance_id = uuid.uuid4().hex
+
+
+def normalize_model_key(manufacturer: Optional[str], model: Optional[str]) -> Optional[str]:
+    """Normalized 'manufacturer|model' key, or None if either is missing"""
+    def norm(value: Optional[str]) -> str:
+        return re.sub(r"[^a-z0-9]+", " ", (value or "").lower()).strip()
+
+    manufacturer, model = norm(manufacturer), norm(model)
+    if not manufacturer or not model:
+        return None
+    return f"{manufacturer}|{model}"
+
+
+def _count_field(value: str) -> str:
+    """Make a value safe to use as a sub-document key"""
+    return value.replace(".", "_").replace("$", "_")
+
+
+def _display_form(normalized: str, *texts: Optional[str]) -> str:
+    """How a normalized value is spelled (cased) inside one of `texts`, else the value itself"""
+    words = r"[^a-z0-9]+".join(re.escape(word) for word in normalized.split())
+    pattern = re.compile(rf"(?<![a-z0-9]){words}(?![a-z0-9])", re.IGNORECASE)
+    for text in texts:
+        match = pattern.search(text or "")
+        if match:
+            return match.group(0)
+    return normalized
+
+
+async def record_observation(
+    db,
+    manufacturer: Optional[str],
+    model: Optional[str],
+    device_type: Optional[str],
+    category: Optional[str],
+    source: str,
+    device_specs: Optional[str] = None,
+    suggested_name: Optional[str] = None,
+    weight: int = 1,
+    catalog=None
+):
+    """
+    Add one (or `weight`) sightings of a manufacturer/model classification
+    to `catalog` (db.device_catalog by default). While a rebuild is running,
+    live observations are mirrored into its staging collection so the swap
+    does not lose them.
+    """
+    key = normalize_model_key(manufacturer, model)
+    if not key or not device_type or db is None:
+        return
+    live = catalog is None
+    if live:
+        catalog = db.device_catalog
+
+    update: Dict[str, Any] = {
+        "$inc": {
+            f"type_counts.{_count_field(device_type)}": weight,
+            f"sources.{source}": weight,
+            "observations": weight
+        },
+        "$set": {"updatedAt": datetime.utcnow()},
+        "$setOnInsert": {"key": key, "manufacturer": manufacturer, "model": model}
+    }
+    if category:
+        update["$inc"][f"category_counts.{_count_field(category)}"] = weight
+    if device_specs:
+        update["$set"]["device_specs"] = device_specs
+    if suggested_name:
+        update["$set"]["suggested_name"] = suggested_name
+
+    await catalog.update_one({"key": key}, update, upsert=True)
+    if live and await _rebuild_started_at(db):
+        await db[CATALOG_STAGING_COLLECTION].update_one({"key": key}, update, upsert=True)
+
+
+def _top(counts: Dict[str, int]):
+    if not counts:
+        return None, 0.0
+    value, count = max(counts.items(), key=lambda item: item[1])
+    return value, count / sum(counts.values())
+
+
+async def lookup_device(db, manufacturer: Optional[str], model: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Return enrichment data from the catalog when the classification is
+    well established (enough observations that mostly agree), else None.
+    """
+    key = normalize_model_key(manufacturer, model)
+    if not key or db is None:
+        return None
+
+    entry = await db.device_catalog.find_one({"key": key})
+    if not entry or entry.get("observations", 0) < CATALOG_MIN_OBSERVATIONS:
+        return None
+
+    device_type, agreement = _top(entry.get("type_counts", {}))
+    if not device_type or agreement < CATALOG_MIN_CONFIDENCE:
+        return None
+
+    category, _ = _top(entry.get("category_counts", {}))
+    return {
+        "device_type": device_type,
+        "category": category or "Hardware",
+        "likely_manufacturer": entry.get("manufacturer"),
+        "suggested_name": entry.get("suggested_name") or f"{entry.get('manufacturer')} {entry.get('model')}",
+        "device_specs": entry.get("device_specs"),
+        "estimated_age": None,
+        "recommendations": [],
+        "confidence_score": round(agreement, 2),
+        "catalog_observations": entry.get("observations", 0),
+        "enrichment_timestamp": datetime.utcnow().isoformat()
+    }
+
+
+async def _acquire_rebuild_lease(db) -> bool:
+    """Only one rebuild at a time; the lease expires if its worker dies"""
+    now = datetime.utcnow()
+    try:
+        await db.device_catalog_state.find_one_and_update(
+            {"_id": "rebuild", "$or": [{"expires_at": {"$lt": now}}, {"holder": _instance_id}]},
+            {"$set": {
+                "holder": _instance_id,
+                "started_at": None,
+                "expires_at": now + timedelta(seconds=CATALOG_REBUILD_LEASE_SECONDS)
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def _release_rebuild_lease(db):
+    await db.device_catalog_state.update_one(
+        {"_id": "rebuild", "holder": _instance_id},
+        {"$set": {"started_at": None, "expires_at": datetime.utcnow()}}
+    )
+
+
+async def _rebuild_started_at(db) -> Optional[datetime]:
+    """Snapshot time of the running rebuild, or None if none is running"""
+    state = await db.device_catalog_state.find_one(
+        {"_id": "rebuild", "expires_at": {"$gt": datetime.utcnow()}}, {"started_at": 1}
+    )
+    return state.get("started_at") if state else None
+
+
+async def rebuild_device_catalog(db) -> Optional[Dict[str, int]]:
+    """
+    Rebuild the catalog from scratch out of existing assets and cached
+    enrichment results. It is built in a staging collection and renamed
+    over the live one, so lookups never see it empty or half-built.
+
+    The sources are read as of the rebuild's start time; observations
+    recorded after it are mirrored into staging by record_observation,
+    so nothing seen during the rebuild is lost by the swap.
+    Returns how many entries each source contributed, or None if another
+    rebuild holds the lease.
+    """
+    if not await _acquire_rebuild_lease(db):
+        return None
+    try:
+        return await _rebuild_into_staging(db)
+    finally:
+        await _release_rebuild_lease(db)
+
+
+async def _rebuild_into_staging(db) -> Dict[str, int]:
+    staging = db[CATALOG_STAGING_COLLECTION]
+    await staging.drop()
+    await staging.create_index("key", unique=True)
+
+    # From here on live observations are mirrored into staging
+    started = datetime.utcnow()
+    await db.device_catalog_state.update_one(
+        {"_id": "rebuild", "holder": _instance_id}, {"$set": {"started_at": started}}
+    )
+
+    asset_groups = await db.assets.aggregate([
+        {"$match": {
+            "manufacturer": {"$nin": [None, ""]},
+            "model": {"$nin": [None, ""]},
+            "type": {"$nin": [None, ""]},
+            # Assets without createdAt predate the field, so they count
+            "createdAt": {"$not": {"$gte": started}}
+        }},
+        {"$group": {
+            "_id": {"manufacturer": "$manufacturer", "model": "$model", "type": "$type", "category": "$category"},
+            "count": {"$sum": 1}
+        }}
+    ]).to_list(length=None)
+
+    for group in asset_groups:
+        ids = group["_id"]
+        await record_observation(
+            db, ids["manufacturer"], ids["model"], ids["type"], ids.get("category"),
+            source="assets", weight=group["count"], catalog=staging
+        )
+
+    enrichment_count = 0
+    async for entry in db.ai_cache.find({"kind": "enrichment", "createdAt": {"$not": {"$gte": started}}}):
+        value = entry.get("value", {})
+        # Cache keys are normalized; recover the display spelling from the result
+        manufacturer, _, model = entry["key"].partition("|")
+        suggested_name = value.get("suggested_name")
+        await record_observation(
+            db,
+            _display_form(manufacturer, value.get("likely_manufacturer"), suggested_name),
+            _display_form(model, suggested_name),
+            value.get("device_type"),
+            value.get("category"),
+            source="enrichment",
+            device_specs=value.get("device_specs"),
+            suggested_name=suggested_name,
+            catalog=staging
+        )
+        enrichment_count += 1
+
+    catalog_entries = await staging.count_documents({})
+    await staging.rename("device_catalog", dropTarget=True)
+    return {
+        "asset_groups": len(asset_groups),
+        "enrichment_results": enrichment_count,
+        "catalog_entries": catalog_entries
+    }
@@ -0,0 +1,202 @@
+# event_bus.py
+"""
+In-process change feed.
+Mutation routes publish asset, audit and procurement events to a bus that
+fans them out to subscribers (SSE / WebSocket clients) through bounded
+queues. A subscriber whose queue fills up is dropped rather than slowing
+down the publisher or growing memory.
+
+With CHANGE_FEED_SOURCE=changestream the bus is fed from MongoDB change
+streams instead (requires a replica set), so every worker sees writes
+made by the others; route-level publishing is then switched off.
+"""
+
+import os
+import asyncio
+import itertools
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Set
+
+CHANGE_FEED_SOURCE = os.getenv("CHANGE_FEED_SOURCE", "bus")  # "bus" or "changestream"
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "256"))
+CHANGE_FEED_MAX_SUBSCRIBERS = int(os.getenv("CHANGE_FEED_MAX_SUBSCRIBERS", "500"))
+
+
+class EventType:
+    ASSET_CREATED = "asset.created"
+    ASSET_UPDATED = "asset.updated"
+    ASSET_DELETED = "asset.deleted"
+    AUDIT_APPENDED = "audit.appended"
+    PROCUREMENT_STATUS_CHANGED = "procurement.status_changed"
+
+
+class Subscription:
+    """One client's filtered view of the bus"""
+
+    def __init__(
+        self,
+        types: Optional[List[str]] = None,
+        asset_id: Optional[str] = None,
+        department: Optional[str] = None,
+        max_queue: int = CHANGE_FEED_QUEUE_SIZE
+    ):
+        # "asset" matches every asset.* event
+        self.types = types or []
+        self.asset_id = asset_id
+        self.department = department
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped_reason: Optional[str] = None
+        self._dropped = asyncio.Event()
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.types and not any(
+            event["type"] == t or event["type"].startswith(f"{t}.") for t in self.types
+        ):
+            return False
+        if self.asset_id and event.get("asset_id") != self.asset_id:
+            return False
+        if self.department and event.get("department") != self.department:
+            return False
+        return True
+
+    def drop(self, reason: str):
+        self.dropped_reason = reason
+        self._dropped.set()
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None on timeout. Raises ConnectionAbortedError once dropped."""
+        if self._dropped.is_set():
+            raise ConnectionAbortedError(self.dropped_reason)
+        get = asyncio.ensure_future(self.queue.get())
+        dropped = asyncio.ensure_future(self._dropped.wait())
+        done, _ = await asyncio.wait({get, dropped}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        dropped.cancel()
+        if get in done:
+            return get.result()
+        get.cancel()
+        if self._dropped.is_set():
+            raise ConnectionAbortedError(self.dropped_reason)
+        return None
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers: Set[Subscription] = set()
+        self._sequence = itertools.count(1)
+        self._counters = {"published": 0, "delivered": 0, "dropped_subscribers": 0}
+
+    def subscribe(self, **filters) -> Subscription:
+        if len(self._subscribers) >= CHANGE_FEED_MAX_SUBSCRIBERS:
+            raise ConnectionRefusedError("Too many change feed subscribers")
+        subscription = Subscription(**filters)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, **fields):
+        """Fan an event out without ever blocking the caller"""
+        event = {
+            "id": next(self._sequence),
+            "type": event_type,
+            "timestamp": datetime.utcnow().isoformat(),
+            **fields
+        }
+        self._counters["published"] += 1
+        for subscription in list(self._subscribers):
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                self._counters["delivered"] += 1
+            except asyncio.QueueFull:
+                # Slow consumer - cut it loose instead of buffering without bound
+                self._subscribers.discard(subscription)
+                subscription.drop("slow consumer")
+                self._counters["dropped_subscribers"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"source": CHANGE_FEED_SOURCE, "subscribers": len(self._subscribers), **self._counters}
+
+
+event_bus = EventBus()
+
+
+def publish_event(event_type: str, **fields):
+    """Publish from a mutation route (no-op when change streams feed the bus)"""
+    if CHANGE_FEED_SOURCE == "bus":
+        event_bus.publish(event_type, **fields)
+
+
+def _event_from_change(collection: str, change: Dict[str, Any]) -> Optional[tuple]:
+    operation = change["operationType"]
+    document = change.get("fullDocument") or {}
+    document_id = str(change["documentKey"]["_id"])
+
+    if collection == "assets":
+        event_type = {
+            "insert": EventType.ASSET_CREATED,
+            "update": EventType.ASSET_UPDATED,
+            "replace": EventType.ASSET_UPDATED,
+            "delete": EventType.ASSET_DELETED
+        }.get(operation)
+        if not event_type:
+            return None
+        fields = {"asset_id": document_id, "name": document.get("name"), "department": document.get("department")}
+        if operation == "update":
+            fields["changes"] = list((change.get("updateDescription") or {}).get("updatedFields", {}))
+        return event_type, fields
+
+    if collection == "audit_chain" and operation == "insert":
+        return EventType.AUDIT_APPENDED, {
+            "asset_id": document.get("asset_id"),
+            "field_changed": document.get("field_changed"),
+            "chain_index": document.get("chain_index"),
+            "changed_by_email": document.get("changed_by_email")
+        }
+
+    if collection == "procurement_requests" and operation in ("insert", "update", "replace"):
+        updated = (change.get("updateDescription") or {}).get("updatedFields", {})
+        if operation == "update" and "status" not in updated:
+            return None
+        return EventType.PROCUREMENT_STATUS_CHANGED, {
+            "request_id": document_id,
+            "status": document.get("status"),
+            "department": document.get("department")
+        }
+    return None
+
+
+async def _watch_collection(db, collection: str):
+    while True:
+        try:
+            async with db[collection].watch(full_document="updateLookup") as stream:
+                async for change in stream:
+                    event = _event_from_change(collection, change)
+                    if event:
+                        event_bus.publish(event[0], **event[1])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Change stream on {collection} failed, retrying: {e}")
+            await asyncio.sleep(5)
+
+
+_watch_tasks: List[asyncio.Task] = []
+
+
+def start_change_streams(get_db):
+    """Feed the bus from MongoDB change streams when CHANGE_FEED_SOURCE=changestream"""
+    if CHANGE_FEED_SOURCE != "changestream" or _watch_tasks:
+        return
+    db = get_db()
+    for collection in ("assets", "audit_chain", "procurement_requests"):
+        _watch_tasks.append(asyncio.create_task(_watch_collection(db, collection)))
+
+
+async def shutdown_change_streams():
+    for task in _watch_tasks:
+        task.cancel()
+    await asyncio.gather(*_watch_tasks, return_exceptions=True)
+    _watch_tasks.clear()
@@ -0,0 +1,94 @@
+# image_preprocessor.py
+"""
+Image preprocessing before AI vision upload.
+Phone photos are decoded, downscaled, converted to high-contrast grayscale
+and recompressed as JPEG so uploads and model latency stay small.
+Runs in the shared image-processing process pool.
+"""
+
+import os
+import io
+import base64
+import asyncio
+from typing import Dict, Any, Tuple
+
+from barcode_decoder import get_executor
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1600"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "80"))
+IMAGE_GRAYSCALE = os.getenv("IMAGE_GRAYSCALE", "true").lower() == "true"
+
+
+def preprocess_image_bytes(
+    image_bytes: bytes,
+    max_dimension: int = IMAGE_MAX_DIMENSION,
+    quality: int = IMAGE_JPEG_QUALITY,
+    grayscale: bool = IMAGE_GRAYSCALE
+) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Downscale, enhance and recompress an image (runs inside a worker process).
+    Returns the JPEG bytes and a summary of what was done.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    original_size = image.size
+
+    # Respect camera orientation before resizing
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    if grayscale:
+        # Label text reads better in high-contrast grayscale
+        image = ImageOps.autocontrast(image.convert("L"), cutoff=1)
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    processed = output.getvalue()
+
+    return processed, {
+        "original_size": list(original_size),
+        "processed_size": list(image.size),
+        "original_bytes": len(image_bytes),
+        "processed_bytes": len(processed),
+        "grayscale": grayscale
+    }
+
+
+async def preprocess_image(image_bytes: bytes) -> Tuple[str, Dict[str, Any]]:
+    """
+    Preprocess an image off the event loop and return it as a JPEG data URL.
+    Falls back to the original bytes if PIL is unavailable or decoding fails.
+    """
+    info: Dict[str, Any] = {"original_bytes": len(image_bytes)}
+    if PIL_AVAILABLE:
+        try:
+            loop = asyncio.get_running_loop()
+            image_bytes, info = await loop.run_in_executor(
+                get_executor(), preprocess_image_bytes, image_bytes
+            )
+            mime_type = "image/jpeg"
+        except Exception as e:
+            print(f"Image preprocessing failed, sending original: {e}")
+            info["error"] = str(e)
+            mime_type = guess_mime_type(image_bytes)
+    else:
+        mime_type = guess_mime_type(image_bytes)
+
+    encoded = base64.b64encode(image_bytes).decode("ascii")
+    return f"data:{mime_type};base64,{encoded}", info
+
+
+def guess_mime_type(image_bytes: bytes) -> str:
+    """Best-effort MIME type from the file signature"""
+    if image_bytes.startswith(b"\x89PNG"):
+        return "image/png"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
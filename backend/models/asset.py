@@ -17,6 +17,7 @@ class AssetModel(BaseModel):
     category: str = "Hardware"
     status: str = "Active"
     assignedTo: Optional[str] = None
+    assignedToUserId: Optional[str] = None
     department: Optional[str] = None
     location: Optional[str] = None
     purchaseDate: Optional[str] = None
@@ -39,6 +40,7 @@ class AssetCreate(BaseModel):
     category: str = "Hardware"
     status: str = "Active"
     assignedTo: Optional[str] = None
+    assignedToUserId: Optional[str] = None
     department: Optional[str] = None
     location: Optional[str] = None
     purchaseDate: Optional[str] = None
@@ -58,6 +60,7 @@ class AssetUpdate(BaseModel):
     category: Optional[str] = None
     status: Optional[str] = None
     assignedTo: Optional[str] = None
+    assignedToUserId: Optional[str] = None
     department: Optional[str] = None
     location: Optional[str] = None
     cost: Optional[float] = None
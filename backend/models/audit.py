@@ -27,11 +27,13 @@ class AuditChainRecord(BaseModel):
     
 class AuditChainVerification(BaseModel):
     """Model for audit chain verification response"""
-    is_valid: bool
+    is_valid: Optional[bool]  # None: never verified (stored status only)
     total_records: int
     verified_records: int
     broken_at_index: Optional[int] = None
     error_message: Optional[str] = None
+    mode: str = "full"  # "incremental" (from the signed checkpoint), "full" or "stored" (not recomputed)
+    verified_at: Optional[datetime] = None
     
 class AuditChainResponse(BaseModel):
     """Model for audit chain query response"""
@@ -39,3 +41,8 @@ class AuditChainResponse(BaseModel):
     asset_name: str
     total_changes: int
     records: List[Dict[str, Any]]
+    # Keyset paging: pass next_before_index / next_after_index back as before_index / after_index
+    has_more: bool = False
+    next_before_index: Optional[int] = None
+    next_after_index: Optional[int] = None
+    verification: Optional[AuditChainVerification] = None
@@ -0,0 +1,236 @@
+# openrouter_client.py
+"""
+Rate-limit-aware wrapper around httpx.AsyncClient for OpenRouter:
+- token bucket limiter matching provider limits, paused by Retry-After
+- retries with exponential backoff + jitter for 429 / 5xx / transport errors
+- circuit breaker that fails fast while the provider is down
+"""
+
+import os
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+import httpx
+
+OPENROUTER_RATE_PER_SECOND = float(os.getenv("OPENROUTER_RATE_PER_SECOND", "0.33"))  # ~20 requests/minute
+OPENROUTER_BURST = int(os.getenv("OPENROUTER_BURST", "5"))
+OPENROUTER_MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", "3"))
+OPENROUTER_BACKOFF_BASE = float(os.getenv("OPENROUTER_BACKOFF_BASE", "1.0"))
+OPENROUTER_BACKOFF_MAX = float(os.getenv("OPENROUTER_BACKOFF_MAX", "30"))
+OPENROUTER_BREAKER_THRESHOLD = int(os.getenv("OPENROUTER_BREAKER_THRESHOLD", "5"))
+OPENROUTER_BREAKER_RESET = float(os.getenv("OPENROUTER_BREAKER_RESET", "30"))
+# Upper bound on a provider's Retry-After so one response cannot stall the bucket for hours
+OPENROUTER_RETRY_AFTER_MAX = float(os.getenv("OPENROUTER_RETRY_AFTER_MAX", "120"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is open and requests fail fast"""
+
+
+class TokenBucket:
+    """Async token bucket. `pause_for` stops all issuance (used for Retry-After)."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause_for(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self._paused_until:
+                        await asyncio.sleep(self._paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_request(self):
+        state = self.state
+        if state == self.OPEN:
+            retry_in = self.reset_timeout - (time.monotonic() - self._opened_at)
+            raise CircuitOpenError(f"OpenRouter circuit open, retry in {retry_in:.0f}s")
+        if state == self.HALF_OPEN:
+            # Let a single trial request through
+            if self._trial_in_flight:
+                raise CircuitOpenError("OpenRouter circuit half-open, trial request in flight")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give up a trial slot without a verdict (the request never went out)"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self._trial_in_flight or self.consecutive_failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+def parse_retry_after(value: Optional[str], cap: float = OPENROUTER_RETRY_AFTER_MAX) -> Optional[float]:
+    """Retry-After as seconds, clamped to [0, cap]; accepts delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+            seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    if seconds != seconds:  # NaN
+        return None
+    return min(cap, max(0.0, seconds))
+
+
+class RateLimitedClient:
+    """Drop-in replacement for the parts of httpx.AsyncClient the AI agent uses"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        rate_per_second: float = OPENROUTER_RATE_PER_SECOND,
+        burst: int = OPENROUTER_BURST,
+        max_retries: int = OPENROUTER_MAX_RETRIES,
+        breaker_threshold: int = OPENROUTER_BREAKER_THRESHOLD,
+        breaker_reset: float = OPENROUTER_BREAKER_RESET
+    ):
+        self.client = client
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self._counters = {"requests": 0, "retries": 0, "rate_limited": 0, "failures": 0, "short_circuited": 0}
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(OPENROUTER_BACKOFF_MAX, OPENROUTER_BACKOFF_BASE * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """
+        POST with rate limiting, retries and circuit breaking.
+        Returns the last response once retries are exhausted so callers can
+        keep checking status codes; raises CircuitOpenError when failing fast.
+        """
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                self._counters["short_circuited"] += 1
+                raise
+
+            response = None
+            error = None
+            sent = False
+            try:
+                await self.bucket.acquire()
+                self.in_flight += 1
+                self._counters["requests"] += 1
+                sent = True
+                try:
+                    response = await self.client.post(url, **kwargs)
+                finally:
+                    self.in_flight -= 1
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                # Cancelled (stage timeout) or unexpected: never leave a
+                # half-open trial marked in flight. Only a request that
+                # reached the provider counts against it.
+                if sent:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release_trial()
+                raise
+
+            if response is not None and response.status_code not in RETRYABLE_STATUS_CODES:
+                # 4xx other than 429 is the caller's problem, not the provider's
+                self.breaker.record_success()
+                return response
+
+            self.breaker.record_failure()
+            self._counters["failures"] += 1
+
+            delay = self._backoff(attempt)
+            if response is not None and response.status_code == 429:
+                self._counters["rate_limited"] += 1
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    delay = retry_after
+                    # Everyone waits, not just this request
+                    self.bucket.pause_for(retry_after)
+
+            if attempt >= self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            self._counters["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.bucket.waiting,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            **self._counters
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -5,6 +5,7 @@ from .procurement import router as procurement_router
 from .analytics import router as analytics_router
 from .audit import router as audit_router
 from .agent import router as agent_router
+from .events import router as events_router
 
 __all__ = [
     "auth_router",
@@ -13,5 +14,6 @@ __all__ = [
     "procurement_router",
     "analytics_router",
     "audit_router",
-    "agent_router"
+    "agent_router",
+    "events_router"
 ]
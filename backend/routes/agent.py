@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Form
+from typing import Optional
 from datetime import datetime, timedelta
 from bson import ObjectId
+import asyncio
 import aiohttp
 
 from database import get_database
-from models import AgentMetricsResponse, LiveMetrics
+from models import AgentMetricsResponse, LiveMetrics, UserResponse, UserRole
+from auth import require_role
+from utils import heartbeat_tracker
 
 router = APIRouter(prefix="/api", tags=["Agent"])
 
@@ -115,6 +119,7 @@ async def agent_heartbeat(
     db=Depends(get_database)
 ):
     """Endpoint for agents to register their presence"""
+    heartbeat_tracker.record()
     
     print(f"Heartbeat received:")
     print(f"  Serial: {serial_number}")
@@ -143,7 +148,30 @@ async def agent_heartbeat(
         "status": "heartbeat_recorded",
         "timestamp": datetime.utcnow(),
         "serial_number": serial_number,
-        "agent_url": agent_url
+        "agent_url": agent_url,
+        "next_interval": heartbeat_tracker.suggested_interval()
+    }
+
+@router.get("/agents/heartbeat-policy")
+async def get_heartbeat_policy():
+    """Get current heartbeat ingest load and the interval suggested to agents"""
+    return {
+        "heartbeats_per_second": round(heartbeat_tracker.current_rate(), 2),
+        "override_interval": heartbeat_tracker.override_interval,
+        "suggested_interval": heartbeat_tracker.suggested_interval()
+    }
+
+@router.put("/agents/heartbeat-policy")
+async def set_heartbeat_policy(
+    override_interval: Optional[int] = Form(None),
+    current_user: UserResponse = Depends(require_role([UserRole.ADMIN]))
+):
+    """Force a fleet-wide heartbeat interval (e.g. during incidents). Omit to clear."""
+    heartbeat_tracker.override_interval = override_interval
+    return {
+        "status": "success",
+        "override_interval": heartbeat_tracker.override_interval,
+        "suggested_interval": heartbeat_tracker.suggested_interval()
     }
 
 @router.get("/agents/online")
@@ -3,14 +3,19 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from database import get_database
+from database import get_database, find_serial_duplicates, ensure_serial_available
 from models import AssetCreate, AssetUpdate, UserResponse, UserRole, UserStatus
-from auth import get_current_user, verify_token
+from auth import get_current_user, verify_token, require_role
+from event_bus import publish_event, EventType
 from utils import (
-    asset_helper, update_user_asset_count,
+    asset_helper, normalize_serial, resolve_assignee, adjust_user_asset_counts,
     check_and_update_expired_assets, check_and_update_compliance_status,
-    create_audit_record
+    create_audit_record, create_audit_segment, diff_asset_fields,
+    asset_snapshot, asset_audit_metadata, system_user,
+    AUDIT_EVENT_CREATED, AUDIT_EVENT_DELETED, serial_index
 )
 
 router = APIRouter(prefix="/api/assets", tags=["Assets"])
@@ -22,6 +27,7 @@ async def get_assets(
     status: Optional[str] = None,
     category: Optional[str] = None,
     department: Optional[str] = None,
+    assigned_to_user_id: Optional[str] = None,
     search: Optional[str] = None,
     db=Depends(get_database),
     current_user: UserResponse = Depends(get_current_user)
@@ -38,6 +44,8 @@ async def get_assets(
         query["category"] = category
     if department:
         query["department"] = department
+    if assigned_to_user_id:
+        query["assignedToUserId"] = assigned_to_user_id
     if search:
         query["$or"] = [
             {"name": {"$regex": search, "$options": "i"}},
@@ -48,6 +56,14 @@ async def get_assets(
     assets = await db.assets.find(query).skip(skip).limit(limit).to_list(length=limit)
     return [asset_helper(asset) for asset in assets]
 
+@router.get("/serial-duplicates", response_model=List[dict])
+async def get_serial_duplicates(
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(require_role([UserRole.ADMIN]))
+):
+    """Assets whose serial numbers collide once normalized (blocks the unique serial index)"""
+    return await find_serial_duplicates(db)
+
 @router.post("", response_model=dict)
 async def create_asset(
     asset: AssetCreate, 
@@ -58,20 +74,39 @@ async def create_asset(
     asset_dict = asset.dict()
     asset_dict["createdAt"] = datetime.utcnow()
     asset_dict["updatedAt"] = datetime.utcnow()
+    try:
+        await resolve_assignee(db, asset_dict)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Check if serial number already exists
-    if asset_dict.get("serialNumber"):
-        existing = await db.assets.find_one({"serialNumber": asset_dict["serialNumber"]})
-        if existing:
-            raise HTTPException(status_code=400, detail="Asset with this serial number already exists")
+    asset_dict["serialNormalized"] = normalize_serial(asset_dict.get("serialNumber"))
     
-    result = await db.assets.insert_one(asset_dict)
+    # The unique serialNormalized index rejects duplicates atomically
+    try:
+        await ensure_serial_available(db, asset_dict["serialNormalized"])
+        result = await db.assets.insert_one(asset_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Asset with this serial number already exists")
     new_asset = await db.assets.find_one({"_id": result.inserted_id})
+    serial_index.add(result.inserted_id, asset_dict.get("serialNumber"))
+    
+    await create_audit_record(
+        db=db,
+        asset_id=str(result.inserted_id),
+        field_changed=AUDIT_EVENT_CREATED,
+        old_value=None,
+        new_value=asset_snapshot(new_asset),
+        changed_by=current_user,
+        metadata=asset_audit_metadata(new_asset)
+    )
    
     # Update user assets count if assigned
-    if asset_dict.get("assignedTo"):
-        await update_user_asset_count(asset_dict["assignedTo"], db)
+    await adjust_user_asset_counts(db, None, asset_dict.get("assignedToUserId"))
     
+    publish_event(
+        EventType.ASSET_CREATED,
+        asset_id=str(result.inserted_id), name=new_asset.get("name"), department=new_asset.get("department")
+    )
     return asset_helper(new_asset)
 
 @router.put("/{asset_id}", response_model=dict)
@@ -115,45 +150,63 @@ async def update_asset(
     
     # If no authenticated user, create a system user for audit trail
     if not current_user:
-        current_user = UserResponse(
-            id="system",
-            name="System",
-            email="system@itam.local",
-            department="System",
-            role=UserRole.ADMIN,
-            permissions=[],
-            status=UserStatus.ACTIVE,
-            createdAt=datetime.utcnow(),
-            updatedAt=datetime.utcnow()
-        )
+        current_user = system_user()
     
     update_data = {k: v for k, v in asset.dict().items() if v is not None}
     update_data["updatedAt"] = datetime.utcnow()
+    if "serialNumber" in update_data:
+        update_data["serialNormalized"] = normalize_serial(update_data["serialNumber"])
+    if (
+        "assignedToUserId" not in update_data
+        and update_data.get("assignedTo") == existing_asset.get("assignedTo")
+    ):
+        # Same display name (e.g. a full-form save): keep the stored assignee id
+        update_data.pop("assignedTo", None)
+    if "assignedTo" in update_data or "assignedToUserId" in update_data:
+        try:
+            await resolve_assignee(db, update_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
     if len(update_data) >= 1:
-        # Track changes to assignedTo field for audit chain
-        if "assignedTo" in update_data and update_data["assignedTo"] != existing_asset.get("assignedTo"):
-            # Create audit record BEFORE updating
-            await create_audit_record(
+        # Perform the update; the document as it was tells us the real previous owner
+        try:
+            if "serialNormalized" in update_data:
+                await ensure_serial_available(db, update_data["serialNormalized"], exclude_id=ObjectId(asset_id))
+            previous = await db.assets.find_one_and_update(
+                {"_id": ObjectId(asset_id)}, {"$set": update_data}, return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Asset with this serial number already exists")
+        
+        # Audit records can't be taken back, so only changes that were
+        # actually written go on the chain; one segment per update
+        changes = diff_asset_fields(previous, update_data) if previous else []
+        if changes:
+            await create_audit_segment(
                 db=db,
                 asset_id=asset_id,
-                field_changed="assignedTo",
-                old_value=existing_asset.get("assignedTo"),
-                new_value=update_data["assignedTo"],
+                changes=changes,
                 changed_by=current_user,
-                metadata={
-                    "asset_name": existing_asset.get("name"),
-                    "asset_type": existing_asset.get("type"),
-                    "timestamp": datetime.utcnow().isoformat()
-                }
+                metadata=asset_audit_metadata(previous)
             )
         
-        # Perform the update
-        result = await db.assets.update_one(
-            {"_id": ObjectId(asset_id)}, {"$set": update_data}
-        )
-        if result.modified_count == 1:
+        if previous:
+            await adjust_user_asset_counts(
+                db,
+                previous.get("assignedToUserId"),
+                update_data.get("assignedToUserId", previous.get("assignedToUserId"))
+            )
             updated_asset = await db.assets.find_one({"_id": ObjectId(asset_id)})
+            if "serialNumber" in update_data:
+                serial_index.add(asset_id, updated_asset.get("serialNumber"))
+            publish_event(
+                EventType.ASSET_UPDATED,
+                asset_id=asset_id,
+                name=updated_asset.get("name"),
+                department=updated_asset.get("department"),
+                changes=list(update_data)
+            )
             return asset_helper(updated_asset)
     
     return asset_helper(existing_asset)
@@ -168,16 +221,24 @@ async def delete_asset(
     if not ObjectId.is_valid(asset_id):
         raise HTTPException(status_code=400, detail="Invalid asset ID")
     
-    # Get asset before deletion to update user count
-    asset = await db.assets.find_one({"_id": ObjectId(asset_id)})
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
-    result = await db.assets.delete_one({"_id": ObjectId(asset_id)})
-    if result.deleted_count == 1:
+    # The deleted document tells us whose count to update
+    asset = await db.assets.find_one_and_delete({"_id": ObjectId(asset_id)})
+    if asset:
+        serial_index.remove(asset_id)
+        publish_event(
+            EventType.ASSET_DELETED, asset_id=asset_id, name=asset.get("name"), department=asset.get("department")
+        )
+        await create_audit_record(
+            db=db,
+            asset_id=asset_id,
+            field_changed=AUDIT_EVENT_DELETED,
+            old_value=asset_snapshot(asset),
+            new_value=None,
+            changed_by=current_user,
+            metadata=asset_audit_metadata(asset)
+        )
         # Update user assets count if was assigned
-        if asset.get("assignedTo"):
-            await update_user_asset_count(asset["assignedTo"], db)
+        await adjust_user_asset_counts(db, asset.get("assignedToUserId"), None)
         return {"message": "Asset deleted successfully"}
     
     raise HTTPException(status_code=404, detail="Asset not found")
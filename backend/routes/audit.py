@@ -1,57 +1,106 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from bson import ObjectId
 
 from database import get_database
-from models import AuditChainResponse, AuditChainVerification, UserResponse
-from auth import get_current_user
-from utils import audit_record_helper, verify_audit_chain
+from models import AuditChainResponse, AuditChainVerification, UserResponse, UserRole
+from auth import get_current_user, require_role
+from utils import (
+    audit_record_helper, verify_audit_chain, load_audit_page, load_audit_head, stored_verification_status,
+    AUDIT_STATS_TOTAL, AUDIT_STATS_FIELD, AUDIT_STATS_USER
+)
+from audit_verifier import (
+    start_verification_job, resume_verification_job, verification_job_helper
+)
+from audit_anchoring import anchor_pending_records, get_inclusion_proof, anchor_helper
+from audit_archive import run_archival, get_archive_stats, find_audit_record
 
 router = APIRouter(prefix="/api/audit", tags=["Audit"])
 
+async def enrich_with_asset_names(db, records: list) -> list:
+    """
+    audit_record_helper dicts with asset_name, looked up in one $in query.
+    Falls back to the name recorded in the record's metadata (deleted assets).
+    """
+    asset_ids = {r["asset_id"] for r in records if ObjectId.is_valid(r["asset_id"])}
+    names = {}
+    if asset_ids:
+        async for asset in db.assets.find(
+            {"_id": {"$in": [ObjectId(aid) for aid in asset_ids]}}, {"name": 1}
+        ):
+            names[str(asset["_id"])] = asset.get("name")
+    
+    enriched_records = []
+    for record in records:
+        rec_dict = audit_record_helper(record)
+        rec_dict["asset_name"] = (
+            names.get(record["asset_id"])
+            or (record.get("metadata") or {}).get("asset_name")
+            or "Unknown"
+        )
+        enriched_records.append(rec_dict)
+    return enriched_records
+
 @router.get("/asset/{asset_id}", response_model=AuditChainResponse)
 async def get_asset_audit_chain(
     asset_id: str,
+    after_index: Optional[int] = Query(None, ge=-1),
+    before_index: Optional[int] = Query(None, ge=0),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    compact: bool = False,
     db=Depends(get_database)
 ):
-    """Get the complete audit chain for an asset"""
+    """
+    Get a page of an asset's audit chain, oldest first within the page.
+    Without cursors the newest `limit` records are returned; page back with
+    `before_index` or forward with `after_index`, and narrow by `since` /
+    `until`. `compact` leaves out hashes and metadata. Verification status
+    comes from the stored checkpoint (see /verify to recompute it).
+    """
     if not ObjectId.is_valid(asset_id):
         raise HTTPException(status_code=400, detail="Invalid asset ID")
     
     # Get asset info
-    asset = await db.assets.find_one({"_id": ObjectId(asset_id)})
+    asset = await db.assets.find_one({"_id": ObjectId(asset_id)}, {"name": 1})
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
     
-    # Get all audit records
-    records = await db.audit_chain.find(
-        {"asset_id": asset_id}
-    ).sort("chain_index", 1).to_list(length=None)
-    
-    # AUTO-VERIFY on every fetch
-    verification = await verify_audit_chain(db, asset_id)
-    
-    # Log security alert if tampered
-    if not verification.is_valid:
-        print(f" SECURITY ALERT: Audit chain compromised for asset {asset_id}")
-        print(f"   Broken at index: {verification.broken_at_index}")
-        print(f"   Error: {verification.error_message}")
+    records, has_more = await load_audit_page(
+        db, asset_id,
+        after_index=after_index,
+        before_index=before_index,
+        since=since,
+        until=until,
+        limit=limit
+    )
+    head_index, _ = await load_audit_head(db, asset_id)
+    verification = await stored_verification_status(db, asset_id, head_index + 1)
     
     return AuditChainResponse(
         asset_id=asset_id,
         asset_name=asset.get("name", "Unknown"),
-        total_changes=len(records),
-        records=[audit_record_helper(r) for r in records]
+        total_changes=head_index + 1,
+        records=[audit_record_helper(r, compact=compact) for r in records],
+        has_more=has_more,
+        next_before_index=records[0]["chain_index"] if records else None,
+        next_after_index=records[-1]["chain_index"] if records else None,
+        verification=verification
     )
 
 @router.get("/asset/{asset_id}/verify", response_model=AuditChainVerification)
 async def verify_asset_audit_chain(
     asset_id: str,
+    full: bool = False,
     db=Depends(get_database),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Verify the cryptographic integrity of an asset's audit chain"""
+    """
+    Verify the cryptographic integrity of an asset's audit chain.
+    Only records since the last checkpoint are rehashed unless `full` is set.
+    """
     if not ObjectId.is_valid(asset_id):
         raise HTTPException(status_code=400, detail="Invalid asset ID")
     
@@ -61,7 +110,7 @@ async def verify_asset_audit_chain(
         raise HTTPException(status_code=404, detail="Asset not found")
     
     # Verify the audit chain
-    verification = await verify_audit_chain(db, asset_id)
+    verification = await verify_audit_chain(db, asset_id, full=full)
     return verification
 
 @router.get("/user/{user_id}/changes")
@@ -81,21 +130,8 @@ async def get_user_audit_changes(
         {"changed_by_user_id": user_id}
     ).sort("timestamp", -1).skip(skip).limit(limit).to_list(length=limit)
     
-    # Get asset names
-    asset_ids = list(set([r["asset_id"] for r in records]))
-    assets = {}
-    for aid in asset_ids:
-        if ObjectId.is_valid(aid):
-            asset = await db.assets.find_one({"_id": ObjectId(aid)})
-            if asset:
-                assets[aid] = asset.get("name", "Unknown")
-    
     # Add asset names to records
-    enriched_records = []
-    for record in records:
-        rec_dict = audit_record_helper(record)
-        rec_dict["asset_name"] = assets.get(record["asset_id"], "Unknown")
-        enriched_records.append(rec_dict)
+    enriched_records = await enrich_with_asset_names(db, records)
     
     return {
         "user_id": user_id,
@@ -119,17 +155,8 @@ async def get_recent_audit_changes(
         "timestamp", -1
     ).limit(limit).to_list(length=limit)
     
-    # Enrich with asset and user names
-    enriched_records = []
-    for record in records:
-        rec_dict = audit_record_helper(record)
-        
-        # Get asset name
-        if ObjectId.is_valid(record["asset_id"]):
-            asset = await db.assets.find_one({"_id": ObjectId(record["asset_id"])})
-            rec_dict["asset_name"] = asset.get("name", "Unknown") if asset else "Unknown"
-        
-        enriched_records.append(rec_dict)
+    # Enrich with asset names
+    enriched_records = await enrich_with_asset_names(db, records)
     
     return {
         "total_changes": len(records),
@@ -138,37 +165,185 @@ async def get_recent_audit_changes(
 
 @router.get("/statistics")
 async def get_audit_statistics(
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
     db=Depends(get_database)
 ):
-    """Get audit chain statistics"""
-    
-    # Total audit records
-    total_records = await db.audit_chain.count_documents({})
-    
-    # Records by field
-    pipeline_by_field = [
-        {"$group": {"_id": "$field_changed", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}}
-    ]
-    by_field = await db.audit_chain.aggregate(pipeline_by_field).to_list(length=None)
-    
-    # Records by user
-    pipeline_by_user = [
-        {"$group": {"_id": "$changed_by_email", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 10}
-    ]
-    by_user = await db.audit_chain.aggregate(pipeline_by_user).to_list(length=None)
-    
-    # Recent activity (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_count = await db.audit_chain.count_documents({
-        "timestamp": {"$gte": seven_days_ago}
-    })
+    """
+    Get audit chain statistics for an optional UTC day window (`from`/`to`,
+    inclusive). Served from the daily buckets maintained on every append.
+    """
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    day_range = {}
+    if from_date:
+        day_range["$gte"] = from_date.isoformat()
+    if to_date:
+        day_range["$lte"] = to_date.isoformat()
+    
+    async def bucket_totals(dimension: str, day_filter: dict, limit: Optional[int] = None) -> list:
+        query = {"dimension": dimension}
+        if day_filter:
+            query["day"] = day_filter
+        pipeline = [
+            {"$match": query},
+            # `backfilled` holds records from before live counting started
+            {"$group": {"_id": "$key", "count": {"$sum": {"$add": [
+                {"$ifNull": ["$count", 0]}, {"$ifNull": ["$backfilled", 0]}
+            ]}}}},
+            {"$sort": {"count": -1}}
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        return await db.audit_stats_daily.aggregate(pipeline).to_list(length=None)
+    
+    total = await bucket_totals(AUDIT_STATS_TOTAL, day_range)
+    
+    # Recent activity (last 7 days, including today)
+    seven_days_ago = (datetime.utcnow() - timedelta(days=6)).date().isoformat()
+    recent = await bucket_totals(AUDIT_STATS_TOTAL, {"$gte": seven_days_ago})
     
     return {
-        "total_records": total_records,
-        "recent_7_days": recent_count,
-        "by_field": by_field,
-        "top_users": by_user
+        "from": from_date,
+        "to": to_date,
+        "total_records": total[0]["count"] if total else 0,
+        "recent_7_days": recent[0]["count"] if recent else 0,
+        "by_field": await bucket_totals(AUDIT_STATS_FIELD, day_range),
+        "top_users": await bucket_totals(AUDIT_STATS_USER, day_range, limit=10)
     }
+
+@router.post("/verification-jobs")
+async def create_verification_job(
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(require_role([UserRole.ADMIN]))
+):
+    """Start a background integrity check of every asset's audit chain"""
+    job = await start_verification_job(db)
+    return verification_job_helper(job)
+
+@router.get("/verification-jobs")
+async def list_verification_jobs(
+    limit: int = 20,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Most recent verification jobs, newest first"""
+    jobs = await db.audit_verification_jobs.find().sort("started_at", -1).limit(limit).to_list(length=limit)
+    return [verification_job_helper(job) for job in jobs]
+
+@router.get("/verification-jobs/{job_id}")
+async def get_verification_job(
+    job_id: str,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Progress and result of a verification job"""
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    
+    job = await db.audit_verification_jobs.find_one({"_id": ObjectId(job_id)})
+    if not job:
+        raise HTTPException(status_code=404, detail="Verification job not found")
+    return verification_job_helper(job)
+
+@router.get("/verification-jobs/{job_id}/failures")
+async def get_verification_job_failures(
+    job_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Broken chains found by a verification job"""
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    
+    failures = await db.audit_verification_failures.find(
+        {"job_id": ObjectId(job_id)}, {"_id": 0, "job_id": 0}
+    ).sort("asset_id", 1).skip(skip).limit(limit).to_list(length=limit)
+    return {"job_id": job_id, "failures": failures}
+
+@router.post("/verification-jobs/{job_id}/resume")
+async def resume_job(
+    job_id: str,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(require_role([UserRole.ADMIN]))
+):
+    """Resume a failed or interrupted verification job from its last verified asset"""
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    
+    job = await resume_verification_job(db, ObjectId(job_id))
+    if not job:
+        raise HTTPException(status_code=409, detail="Job not found or not resumable")
+    return verification_job_helper(job)
+
+@router.get("/records/{record_id}/proof")
+async def get_record_inclusion_proof(
+    record_id: str,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Merkle inclusion proof for one audit record. Starting from leaf_hash,
+    hash with each proof step (sha256(0x01 || left || right)) to reach
+    merkle_root; leaf_hash is sha256(0x00 || record_hash).
+    """
+    if not ObjectId.is_valid(record_id):
+        raise HTTPException(status_code=400, detail="Invalid record ID")
+    
+    record = await find_audit_record(db, ObjectId(record_id))
+    if not record:
+        raise HTTPException(status_code=404, detail="Audit record not found")
+    
+    proof = await get_inclusion_proof(db, record)
+    if not proof:
+        raise HTTPException(status_code=409, detail="Audit record has not been anchored yet")
+    return proof
+
+@router.get("/anchors")
+async def list_anchors(
+    skip: int = 0,
+    limit: int = 50,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Merkle anchors, newest first"""
+    anchors = await db.audit_anchors.find(
+        {}, {"levels": 0, "leaves": 0, "record_ids": 0}
+    ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    return [anchor_helper(anchor) for anchor in anchors]
+
+@router.post("/anchors")
+async def create_anchor(
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(require_role([UserRole.ADMIN]))
+):
+    """Anchor pending audit records now instead of waiting for the next window"""
+    anchor = await anchor_pending_records(db)
+    if not anchor:
+        return {"message": "No pending audit records to anchor"}
+    return anchor_helper(anchor)
+
+@router.get("/archive")
+async def get_audit_archive_stats(
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Hot vs archived audit record counts and the last archival run"""
+    return await get_archive_stats(db)
+
+@router.post("/archive")
+async def archive_audit_records(
+    retention_days: Optional[int] = None,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(require_role([UserRole.ADMIN]))
+):
+    """Move audit records older than the retention horizon to the archive now"""
+    if retention_days is not None and retention_days < 1:
+        raise HTTPException(status_code=400, detail="retention_days must be at least 1")
+    summary = await run_archival(db) if retention_days is None else await run_archival(db, retention_days)
+    if summary is None:
+        raise HTTPException(status_code=409, detail="Audit archival is already running")
+    return summary
@@ -0,0 +1,112 @@
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+import json
+
+from auth import verify_token, get_current_user
+from event_bus import event_bus
+from models import UserResponse
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+KEEPALIVE_SECONDS = 15
+
+def authenticate_stream(token: Optional[str]) -> dict:
+    """
+    Streaming clients (EventSource, browsers' WebSocket) cannot always set
+    an Authorization header, so the access token may come as ?token=.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    token_data = verify_token(token)
+    if token_data["token_type"] != "access":
+        raise HTTPException(status_code=401, detail="Invalid token type")
+    return token_data
+
+def subscription_filters(types: Optional[str], asset_id: Optional[str], department: Optional[str]) -> dict:
+    return {
+        "types": [t.strip() for t in types.split(",") if t.strip()] if types else None,
+        "asset_id": asset_id,
+        "department": department
+    }
+
+@router.get("/stream")
+async def stream_events(
+    types: Optional[str] = None,
+    asset_id: Optional[str] = None,
+    department: Optional[str] = None,
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+):
+    """
+    Server-Sent Events feed of asset, audit and procurement changes.
+    Filter with `types` (comma-separated, e.g. "asset,audit.appended"),
+    `asset_id` and `department`. Clients that fall too far behind are
+    disconnected and should reconnect.
+    """
+    authenticate_stream(credentials.credentials if credentials else token)
+    try:
+        subscription = event_bus.subscribe(**subscription_filters(types, asset_id, department))
+    except ConnectionRefusedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    event = await subscription.next(timeout=KEEPALIVE_SECONDS)
+                except ConnectionAbortedError as e:
+                    yield f"event: dropped\ndata: {json.dumps({'reason': str(e)})}\n\n"
+                    return
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    types: Optional[str] = None,
+    asset_id: Optional[str] = None,
+    department: Optional[str] = None
+):
+    """WebSocket variant of /stream; same filters, events sent as JSON text frames"""
+    try:
+        authenticate_stream(token)
+        subscription = event_bus.subscribe(**subscription_filters(types, asset_id, department))
+    except (HTTPException, ConnectionRefusedError):
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                event = await subscription.next(timeout=KEEPALIVE_SECONDS)
+            except ConnectionAbortedError as e:
+                await websocket.close(code=1013, reason=str(e))
+                return
+            if event is None:
+                await websocket.send_json({"type": "keepalive"})
+                continue
+            await websocket.send_json(jsonable_encoder(event))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_bus.unsubscribe(subscription)
+
+@router.get("/stats")
+async def get_event_stats(current_user: UserResponse = Depends(get_current_user)):
+    """Change feed subscribers and delivery counters"""
+    return event_bus.get_stats()
@@ -2,15 +2,30 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional, List
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
-from database import get_database
+from database import get_database, ensure_serial_available
 from models import (
     ProcurementRequestCreate, ProcurementRequestUpdate,
     ProcurementApprovalAction, UserResponse, UserRole,
     ProcurementStatus, AssetCreate
 )
 from auth import get_current_user, require_role
-from utils import procurement_request_helper, asset_helper
+from event_bus import publish_event, EventType
+from utils import (
+    procurement_request_helper, asset_helper, normalize_serial, serial_index,
+    resolve_assignee, adjust_user_asset_counts,
+    create_audit_record, asset_snapshot, asset_audit_metadata, AUDIT_EVENT_CREATED
+)
+
+def publish_status_change(request):
+    status = request["status"]
+    publish_event(
+        EventType.PROCUREMENT_STATUS_CHANGED,
+        request_id=str(request["_id"]),
+        status=getattr(status, "value", status),
+        department=request.get("department")
+    )
 
 router = APIRouter(prefix="/api/procurement", tags=["Procurement"])
 
@@ -112,6 +127,7 @@ async def create_procurement_request(
     
     result = await db.procurement_requests.insert_one(request_dict)
     new_request = await db.procurement_requests.find_one({"_id": result.inserted_id})
+    publish_status_change(new_request)
     
     return procurement_request_helper(new_request)
 
@@ -182,6 +198,7 @@ async def approve_procurement_request(
     )
     
     updated_request = await db.procurement_requests.find_one({"_id": ObjectId(request_id)})
+    publish_status_change(updated_request)
     return procurement_request_helper(updated_request)
 
 @router.post("/requests/{request_id}/reject", response_model=dict)
@@ -217,6 +234,7 @@ async def reject_procurement_request(
     )
     
     updated_request = await db.procurement_requests.find_one({"_id": ObjectId(request_id)})
+    publish_status_change(updated_request)
     return procurement_request_helper(updated_request)
 
 @router.post("/requests/{request_id}/mark-ordered", response_model=dict)
@@ -246,6 +264,7 @@ async def mark_request_ordered(
     )
     
     updated_request = await db.procurement_requests.find_one({"_id": ObjectId(request_id)})
+    publish_status_change(updated_request)
     return procurement_request_helper(updated_request)
 
 @router.post("/requests/{request_id}/fulfill", response_model=dict)
@@ -274,9 +293,33 @@ async def fulfill_procurement_request(
     asset_dict["createdAt"] = datetime.utcnow()
     asset_dict["updatedAt"] = datetime.utcnow()
     asset_dict["notes"] = f"Created from procurement request #{request_id}"
-    
-    result = await db.assets.insert_one(asset_dict)
+    asset_dict["serialNormalized"] = normalize_serial(asset_dict.get("serialNumber"))
+    try:
+        await resolve_assignee(db, asset_dict)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        await ensure_serial_available(db, asset_dict["serialNormalized"])
+        result = await db.assets.insert_one(asset_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Asset with this serial number already exists")
     new_asset = await db.assets.find_one({"_id": result.inserted_id})
+    serial_index.add(result.inserted_id, asset_dict.get("serialNumber"))
+    publish_event(
+        EventType.ASSET_CREATED,
+        asset_id=str(result.inserted_id), name=new_asset.get("name"), department=new_asset.get("department")
+    )
+    await create_audit_record(
+        db=db,
+        asset_id=str(result.inserted_id),
+        field_changed=AUDIT_EVENT_CREATED,
+        old_value=None,
+        new_value=asset_snapshot(new_asset),
+        changed_by=current_user,
+        metadata={**asset_audit_metadata(new_asset), "procurement_request_id": request_id}
+    )
+    await adjust_user_asset_counts(db, None, new_asset.get("assignedToUserId"))
     
     # Update procurement request
     await db.procurement_requests.update_one(
@@ -290,6 +333,7 @@ async def fulfill_procurement_request(
     )
     
     updated_request = await db.procurement_requests.find_one({"_id": ObjectId(request_id)})
+    publish_status_change(updated_request)
     
     return {
         "request": procurement_request_helper(updated_request),
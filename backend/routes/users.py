@@ -6,7 +6,7 @@ from bson import ObjectId
 from database import get_database
 from models import UserCreate, UserUpdate, UserResponse, UserRole
 from auth import get_current_user, require_role
-from utils import user_helper
+from utils import user_helper, asset_helper, reconcile_user_asset_counts
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -21,6 +21,15 @@ async def get_users(
     users = await db.users.find().skip(skip).limit(limit).to_list(length=None)
     return [user_helper(user) for user in users]
 
+@router.post("/reconcile-asset-counts")
+async def reconcile_asset_counts(
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(require_role([UserRole.ADMIN]))
+):
+    """Recount every user's assetsCount from the assets collection - Admin only"""
+    corrected = await reconcile_user_asset_counts(db)
+    return {"message": f"Corrected asset counts for {corrected} users", "corrected": corrected}
+
 @router.get("/{user_id}", response_model=dict)
 async def get_user(
     user_id: str, 
@@ -36,6 +45,19 @@ async def get_user(
         return user_helper(user)
     raise HTTPException(status_code=404, detail="User not found")
 
+@router.get("/{user_id}/assets", response_model=List[dict])
+async def get_user_assets(
+    user_id: str,
+    db=Depends(get_database),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Assets assigned to a user, looked up by id (indexed)"""
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+    
+    assets = await db.assets.find({"assignedToUserId": user_id}).to_list(length=None)
+    return [asset_helper(asset) for asset in assets]
+
 @router.post("", response_model=dict)
 async def create_user(
     user: UserCreate, 
@@ -76,6 +98,12 @@ async def update_user(
             {"_id": ObjectId(user_id)}, {"$set": update_data}
         )
         if result.modified_count == 1:
+            if "name" in update_data:
+                # Keep the denormalized assignee name on this user's assets current
+                await db.assets.update_many(
+                    {"assignedToUserId": user_id},
+                    {"$set": {"assignedTo": update_data["name"]}}
+                )
             updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
             return user_helper(updated_user)
     
@@ -0,0 +1,220 @@
+# scan_jobs.py
+"""
+Asynchronous scan job queue.
+Scan requests are stored and queued, a bounded pool of workers processes
+them in the background, and clients poll or stream the result by job id.
+
+The local backend keeps everything in-process so it runs with no outside
+services; another backend only needs to implement the same methods.
+"""
+
+import os
+import asyncio
+import time
+from uuid import uuid4
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, Awaitable, AsyncIterator
+
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "4"))
+SCAN_QUEUE_MAX_SIZE = int(os.getenv("SCAN_QUEUE_MAX_SIZE", "500"))
+SCAN_JOB_TTL_SECONDS = int(os.getenv("SCAN_JOB_TTL_SECONDS", "3600"))
+SCAN_JOB_PURGE_INTERVAL_SECONDS = float(os.getenv("SCAN_JOB_PURGE_INTERVAL_SECONDS", "60"))
+
+
+class JobStatus:
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    FINISHED = (COMPLETED, FAILED)
+
+
+class QueueFullError(Exception):
+    """Raised when the queue cannot accept more jobs"""
+
+
+class LocalScanJobQueue:
+    """In-process job queue backed by asyncio.Queue and a fixed worker pool"""
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        workers: int = SCAN_WORKERS,
+        max_size: int = SCAN_QUEUE_MAX_SIZE,
+        ttl_seconds: int = SCAN_JOB_TTL_SECONDS,
+        purge_interval: float = SCAN_JOB_PURGE_INTERVAL_SECONDS
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._tasks = []
+        self._purge_task: Optional[asyncio.Task] = None
+
+    def _ensure_workers(self):
+        """Start workers (and the expiry timer) lazily on the running event loop"""
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+        if self._purge_task is None or self._purge_task.done():
+            self._purge_task = asyncio.create_task(self._purge_loop())
+
+    async def enqueue(self, payload: Dict[str, Any]) -> str:
+        """Store a job payload and queue it. Returns the job id."""
+        self._ensure_workers()
+        self._expire_finished()
+
+        job_id = uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": JobStatus.QUEUED,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "_payload": payload,
+            "_finished_monotonic": None
+        }
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise QueueFullError("Scan queue is full, try again shortly")
+
+        self._jobs[job_id] = job
+        self._events[job_id] = asyncio.Event()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public view of a job (without the stored payload); None once it has expired"""
+        job = self._jobs.get(job_id)
+        if not job:
+            return None
+        if self._is_expired(job, time.monotonic()):
+            self._drop(job_id)
+            return None
+        view = {k: v for k, v in job.items() if not k.startswith("_")}
+        if job["status"] == JobStatus.QUEUED:
+            view["queue_position"] = self._queue_position(job_id)
+        return view
+
+    def stats(self) -> Dict[str, int]:
+        counts = {JobStatus.QUEUED: 0, JobStatus.PROCESSING: 0, JobStatus.COMPLETED: 0, JobStatus.FAILED: 0}
+        for job in self._jobs.values():
+            counts[job["status"]] += 1
+        return {**counts, "workers": self.workers}
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait until a job finishes (or timeout) and return its view"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in JobStatus.FINISHED:
+                return job
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                return job
+            await self._wait_for_change(job_id, remaining)
+
+    async def stream(self, job_id: str, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job view on each status change until the job finishes.
+        Yields None when nothing changed within `keepalive` seconds.
+        """
+        last_status = None
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield job
+            if job["status"] in JobStatus.FINISHED:
+                return
+            if not await self._wait_for_change(job_id, keepalive):
+                yield None
+
+    async def _wait_for_change(self, job_id: str, timeout: Optional[float]) -> bool:
+        event = self._events.get(job_id)
+        if event is None:
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _queue_position(self, job_id: str) -> Optional[int]:
+        try:
+            return list(self._queue._queue).index(job_id) + 1
+        except ValueError:
+            return None
+
+    def _is_expired(self, job: Dict[str, Any], now: float) -> bool:
+        return bool(job["_finished_monotonic"]) and now - job["_finished_monotonic"] > self.ttl_seconds
+
+    def _drop(self, job_id: str):
+        self._jobs.pop(job_id, None)
+        self._events.pop(job_id, None)
+
+    def _expire_finished(self):
+        """Drop finished jobs (and their stored images) past their TTL"""
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items() if self._is_expired(job, now)]
+        for job_id in expired:
+            self._drop(job_id)
+
+    async def _purge_loop(self):
+        """Expire finished jobs even when nobody enqueues or polls"""
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            self._expire_finished()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is None:
+                    continue
+                job["status"] = JobStatus.PROCESSING
+                job["started_at"] = datetime.utcnow()
+                self._notify(job_id)
+
+                try:
+                    job["result"] = await self.handler(job["_payload"])
+                    job["status"] = JobStatus.COMPLETED
+                except Exception as e:
+                    print(f"Scan job {job_id} failed: {e}")
+                    job["error"] = str(e)
+                    job["status"] = JobStatus.FAILED
+
+                job["finished_at"] = datetime.utcnow()
+                job["_finished_monotonic"] = time.monotonic()
+                # Release the image as soon as the job is done
+                job["_payload"] = None
+                self._notify(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _notify(self, job_id: str):
+        """Wake up anyone waiting on this job, then re-arm for the next change"""
+        event = self._events.get(job_id)
+        if event is None:
+            return
+        event.set()
+        job = self._jobs.get(job_id)
+        if job and job["status"] not in JobStatus.FINISHED:
+            self._events[job_id] = asyncio.Event()
+
+    async def close(self):
+        tasks = self._tasks + ([self._purge_task] if self._purge_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._purge_task = None
@@ -4,24 +4,48 @@ Scanner API with AI Agent Integration
 Uses OpenRouter for vision-based device scanning and intelligent data enrichment
 """
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 import base64
 import io
 import re
+import json
+import time
+import asyncio
 from enum import Enum
 
 # Import AI Agent
 from ai_agent_service import get_ai_agent
+from config import BATCH_SCAN_CONCURRENCY, BATCH_SCAN_MAX_IMAGES
+from database import ensure_serial_available
+from device_catalog import record_observation, rebuild_device_catalog
+from user_scoring import load_eligible_users
+from scan_jobs import LocalScanJobQueue, QueueFullError, JobStatus
+from utils.helpers import normalize_serial, resolve_assignee, adjust_user_asset_counts
+from utils.serial_index import serial_index
+from event_bus import publish_event, EventType
+from utils.audit import (
+    create_audit_record, asset_snapshot, asset_audit_metadata, system_user, AUDIT_EVENT_CREATED
+)
+from barcode_decoder import (
+    decode_image_bytes, image_bytes_from_data_url, shutdown_decoder, DECODER_AVAILABLE
+)
+from image_preprocessor import preprocess_image
+
+# Background scan queue (created with the router)
+_scan_job_queue: Optional[LocalScanJobQueue] = None
 
 # Simple models for scanner
 class ScanType(str, Enum):
-    AI_VISION = "ai_vision"  # New: AI-powered image scanning
+    AI_VISION = "ai_vision"  # New: AI-powered image scanning (tries local barcode decode first)
     MANUAL = "manual"
-    BARCODE = "barcode"  # Legacy support
-    QR_CODE = "qr_code"   # Legacy support
+    BARCODE = "barcode"  # Decoded locally from image_data
+    QR_CODE = "qr_code"   # Decoded locally from image_data
 
 class ScanStatus(str, Enum):
     SUCCESS = "success"
@@ -50,6 +74,21 @@ class DeviceScanResult(BaseModel):
     extracted_text: Optional[str] = None  # New: all extracted text
     confidence: Optional[float] = None  # New: AI confidence score
     ai_recommendations: List[str] = []  # New: AI recommendations
+    stage_timings: Optional[Dict[str, Any]] = None  # Per-stage scan latency (local decode, AI stages)
+
+class BatchScanRequest(BaseModel):
+    images: List[str] = Field(..., description="Base64 encoded images (data URLs)")
+    auto_add: bool = False
+    additional_info: Optional[Dict[str, Any]] = None
+    context: Optional[Dict[str, Any]] = None
+
+class BatchScanResult(BaseModel):
+    total: int
+    found: int
+    added: int
+    not_found: int
+    errors: int
+    results: List[DeviceScanResult]
 
 class QuickAddDevice(BaseModel):
     serial_number: str
@@ -60,89 +99,230 @@ class QuickAddDevice(BaseModel):
     model: Optional[str] = None
     location: Optional[str] = None
     department: Optional[str] = None
+    assignedTo: Optional[str] = None
+    assignedToUserId: Optional[str] = None  # user_id from user_suggestions
+
+# Symbologies device labels print serial numbers in. EAN/UPC identify a
+# product, not a unit, and QR codes usually hold a URL.
+SERIAL_SYMBOLOGIES = {"CODE128", "CODE39", "CODE93", "DATAMATRIX"}
+SERIAL_PATTERN = re.compile(r"^(?=.*\d)[A-Z0-9][A-Z0-9-]{4,29}$", re.IGNORECASE)
+
+def is_serial_like(code: Dict[str, str]) -> bool:
+    """A decoded code that can stand for a device's serial number on its own"""
+    return code.get("type") in SERIAL_SYMBOLOGIES and bool(SERIAL_PATTERN.match(code["data"]))
+
+async def pick_device_code(codes: List[Dict[str, str]], db) -> Optional[str]:
+    """
+    Prefer a decoded code that matches a known serial number, else the first
+    serial-like one; None if neither (leave it to AI vision).
+    """
+    values = [c["data"] for c in codes]
+    normalized = [n for n in (normalize_serial(v) for v in values) if n]
+    match = await db.assets.find_one(
+        {"serialNormalized": {"$in": normalized}}, {"serialNormalized": 1}
+    ) if normalized else None
+    if match:
+        return next(v for v in values if normalize_serial(v) == match["serialNormalized"])
+    return next((c["data"] for c in codes if is_serial_like(c)), None)
+
+async def record_asset_created(db, asset: Dict[str, Any], source: str):
+    """Audit-chain, announce and count the creation of a scanner-added asset"""
+    publish_event(
+        EventType.ASSET_CREATED,
+        asset_id=str(asset["_id"]), name=asset.get("name"), department=asset.get("department")
+    )
+    await create_audit_record(
+        db=db,
+        asset_id=str(asset["_id"]),
+        field_changed=AUDIT_EVENT_CREATED,
+        old_value=None,
+        new_value=asset_snapshot(asset),
+        changed_by=system_user(),
+        metadata={**asset_audit_metadata(asset), "source": source}
+    )
+    await adjust_user_asset_counts(db, None, asset.get("assignedToUserId"))
+
+def build_new_asset(
+    extracted_id: str,
+    ai_result: Optional[Dict[str, Any]],
+    additional_info: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Build the asset document for an auto-added device"""
+    # Use AI-enriched data if available
+    if ai_result and ai_result.get("device_record"):
+        new_asset = ai_result["device_record"].copy()
+        # Remove extraction_data before inserting
+        extraction_data = new_asset.pop("extraction_data", None)
+        new_asset.pop("serial_number", None)
+        new_asset["serialNumber"] = extracted_id
+        new_asset["createdAt"] = datetime.utcnow()
+        new_asset["updatedAt"] = datetime.utcnow()
+        new_asset["addedBy"] = "AI Agent"
+        new_asset["aiProcessed"] = True
+        if extraction_data:
+            new_asset["extractionData"] = extraction_data
+    else:
+        # Fallback to basic record
+        new_asset = {
+            "name": f"Device {extracted_id[:8] if len(extracted_id) > 8 else extracted_id}",
+            "type": "Unknown Device",
+            "category": "Hardware",
+            "status": "Active",
+            "serialNumber": extracted_id,
+            "tags": [extracted_id],
+            "notes": f"Auto-added via scanner on {datetime.utcnow().isoformat()}",
+            "createdAt": datetime.utcnow(),
+            "updatedAt": datetime.utcnow()
+        }
+    
+    # Apply additional info if provided
+    if additional_info:
+        new_asset.update(additional_info)
+    
+    new_asset["serialNormalized"] = normalize_serial(new_asset.get("serialNumber"))
+    return new_asset
+
+def parse_form_object(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """A multipart form field holding a JSON object; anything else is a 400"""
+    if not value:
+        return None
+    try:
+        parsed = json.loads(value)
+    except json.JSONDecodeError:
+        parsed = None
+    if not isinstance(parsed, dict):
+        raise HTTPException(status_code=400, detail="context and additional_info must be JSON objects")
+    return parsed
 
 def create_scanner_router(get_database, get_current_user, UserResponse, asset_helper):
     """Create scanner router with AI agent integration"""
     
     router = APIRouter(prefix="/api/scanner", tags=["scanner"])
     
-    @router.post("/scan", response_model=DeviceScanResult)
-    async def scan_device(
+    async def similar_assets(db, serial: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Assets whose serial is close to `serial`, tolerating OCR misreads (0/O, 1/I, 5/S...)"""
+        matches = await serial_index.suggest(db, serial, limit=limit)
+        return [{**asset_helper(asset), "matchDistance": distance} for asset, distance in matches]
+    
+    async def perform_scan(
         scan_request: DeviceScanRequest,
-        db=Depends(get_database),
-        #current_user: UserResponse = Depends(get_current_user)
-    ):
+        db,
+        image_bytes: Optional[bytes] = None
+    ) -> DeviceScanResult:
         """
         Enhanced scan with AI agent:
         - AI Vision: Uses OpenRouter for image analysis and device identification
         - Manual: Direct ID entry
+        
+        The image comes either as raw bytes (multipart upload) or as
+        base64 `image_data` in the request.
         """
         
         extracted_id = None
         ai_result = None
+        stage_timings = {}
         
         try:
-            # AI Vision Mode - NEW PRIMARY METHOD
-            if scan_request.scan_type == ScanType.AI_VISION and scan_request.image_data:
-                print("🤖 Processing with AI Vision Agent...")
-                
-                # Get available users for assignment suggestions
-                users = await db.users.find().limit(50).to_list(length=50)
-                user_list = [
-                    {
-                        "name": u.get("name"),
-                        "email": u.get("email"),
-                        "department": u.get("department"),
-                        "role": u.get("role"),
-                        "assetsCount": u.get("assetsCount", 0)
-                    }
-                    for u in users
-                ]
-                
-                # Process with AI agent
-                ai_agent = get_ai_agent()
-                ai_result = await ai_agent.process_scan_workflow(
-                    image_data=scan_request.image_data,
-                    available_users=user_list,
-                    context=scan_request.context
-                )
-                
-                if ai_result.get("status") == "error":
+            if image_bytes is None and scan_request.image_data:
+                try:
+                    image_bytes = image_bytes_from_data_url(scan_request.image_data)
+                except Exception:
                     return DeviceScanResult(
                         status=ScanStatus.ERROR,
                         scan_type=scan_request.scan_type,
-                        message=ai_result.get("message", "AI processing failed"),
+                        message="image_data is not valid base64",
                         suggestions=[]
                     )
+            
+            # Local barcode/QR fast path - only fall back to AI vision if nothing decodes
+            if image_bytes and scan_request.scan_type in [ScanType.AI_VISION, ScanType.BARCODE, ScanType.QR_CODE]:
+                started = time.perf_counter()
+                local_codes = await decode_image_bytes(image_bytes)
+                stage_timings["local_decode"] = {
+                    "ms": round((time.perf_counter() - started) * 1000, 1),
+                    "status": "ok" if local_codes else "no_codes"
+                }
+                if local_codes:
+                    extracted_id = await pick_device_code(local_codes, db)
+                    print(f"📦 Decoded {len(local_codes)} code(s) locally, using {extracted_id}")
+                    if not extracted_id:
+                        stage_timings["local_decode"]["status"] = "no_serial"
+            
+            # Nothing decoded locally: AI vision, manual entry or an error
+            if not extracted_id:
+                # AI Vision Mode - NEW PRIMARY METHOD
+                if scan_request.scan_type == ScanType.AI_VISION and image_bytes:
+                    print("🤖 Processing with AI Vision Agent...")
+                
+                    # Shrink and enhance the photo before uploading it to the vision model
+                    started = time.perf_counter()
+                    ai_image_data, preprocess_info = await preprocess_image(image_bytes)
+                    stage_timings["preprocess"] = {
+                        "ms": round((time.perf_counter() - started) * 1000, 1),
+                        "status": "error" if "error" in preprocess_info else "ok",
+                        **{k: v for k, v in preprocess_info.items() if k != "error"}
+                    }
+                
+                    # Get available users for assignment suggestions
+                    user_list = await load_eligible_users(
+                        db, scan_request.context.get("department") if scan_request.context else None
+                    )
+                
+                    # Process with AI agent
+                    ai_agent = get_ai_agent()
+                    ai_result = await ai_agent.process_scan_workflow(
+                        image_data=ai_image_data,
+                        available_users=user_list,
+                        context=scan_request.context
+                    )
+                    stage_timings.update(ai_result.get("stage_timings", {}))
                 
-                # Extract device info
-                device_record = ai_result.get("device_record", {})
-                extracted_id = device_record.get("serial_number")
+                    if ai_result.get("status") == "error":
+                        return DeviceScanResult(
+                            status=ScanStatus.ERROR,
+                            scan_type=scan_request.scan_type,
+                            message=ai_result.get("message", "AI processing failed"),
+                            suggestions=[],
+                            stage_timings=stage_timings
+                        )
                 
-                if not extracted_id:
+                    # Extract device info
+                    device_record = ai_result.get("device_record", {})
+                    extracted_id = device_record.get("serial_number")
+                
+                    if not extracted_id:
+                        return DeviceScanResult(
+                            status=ScanStatus.ERROR,
+                            scan_type=scan_request.scan_type,
+                            message="Could not extract device ID from image",
+                            extracted_text=ai_result.get("extracted_text"),
+                            suggestions=[],
+                            ai_recommendations=["Try capturing a clearer image", "Ensure serial number/label is visible"],
+                            stage_timings=stage_timings
+                        )
+            
+                # Manual Entry Mode
+                elif scan_request.scan_type == ScanType.MANUAL:
+                    extracted_id = scan_request.manual_id
+                
+                # Barcode/QR modes that could not be decoded locally
+                elif scan_request.scan_type in [ScanType.BARCODE, ScanType.QR_CODE]:
+                    if not image_bytes:
+                        message = "Barcode/QR scanning requires an image"
+                    elif not DECODER_AVAILABLE:
+                        message = "Barcode/QR decoding libraries are not installed. Please use AI Vision mode or Manual entry."
+                    elif stage_timings.get("local_decode", {}).get("status") == "no_serial":
+                        message = "None of the codes read from the image is a known or serial-like ID. Try AI Vision mode."
+                    else:
+                        message = "No barcode or QR code could be read from the image. Try AI Vision mode."
                     return DeviceScanResult(
                         status=ScanStatus.ERROR,
                         scan_type=scan_request.scan_type,
-                        message="Could not extract device ID from image",
-                        extracted_text=ai_result.get("extracted_text"),
+                        message=message,
                         suggestions=[],
-                        ai_recommendations=["Try capturing a clearer image", "Ensure serial number/label is visible"]
+                        stage_timings=stage_timings
                     )
             
-            # Manual Entry Mode
-            elif scan_request.scan_type == ScanType.MANUAL:
-                extracted_id = scan_request.manual_id
-                
-            # Legacy Barcode/QR modes
-            elif scan_request.scan_type in [ScanType.BARCODE, ScanType.QR_CODE]:
-                return DeviceScanResult(
-                    status=ScanStatus.ERROR,
-                    scan_type=scan_request.scan_type,
-                    message="Legacy barcode/QR scanning requires additional libraries. Please use AI Vision mode or Manual entry.",
-                    suggestions=[]
-                ) 
-                  
-            
             if not extracted_id:
                 return DeviceScanResult(
                     status=ScanStatus.ERROR,
@@ -154,7 +334,8 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
             # Search for device in database
             asset = await db.assets.find_one({
                 "$or": [
-                    {"serialNumber": extracted_id},
+                    # A serial with nothing left after normalizing must not match unserialized assets
+                    {"serialNormalized": normalize_serial(extracted_id) or extracted_id},
                     {"_id": ObjectId(extracted_id) if ObjectId.is_valid(extracted_id) else None}
                 ]
             })
@@ -169,7 +350,8 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
                     asset_id=str(asset["_id"]),
                     asset_data=asset_helper(asset),
                     message="Device found in database",
-                    suggestions=[]
+                    suggestions=[],
+                    stage_timings=stage_timings
                 )
                 
                 # Add AI enrichment data if available
@@ -182,41 +364,32 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
             
             # Device NOT found - Auto-add or suggest
             if scan_request.auto_add and extracted_id:
-                # Use AI-enriched data if available
-                if ai_result and ai_result.get("device_record"):
-                    new_asset = ai_result["device_record"].copy()
-                    # Remove extraction_data before inserting
-                    extraction_data = new_asset.pop("extraction_data", None)
-                    new_asset["createdAt"] = datetime.utcnow()
-                    new_asset["updatedAt"] = datetime.utcnow()
-                    new_asset["addedBy"] = "AI Agent"
-                    new_asset["aiProcessed"] = True
-                    if extraction_data:
-                        new_asset["extractionData"] = extraction_data
-                    
-                    # Apply additional info if provided
-                    if scan_request.additional_info:
-                        new_asset.update(scan_request.additional_info)
-                else:
-                    # Fallback to basic record
-                    new_asset = {
-                        "name": f"Device {extracted_id[:8] if len(extracted_id) > 8 else extracted_id}",
-                        "type": "Unknown Device",
-                        "category": "Hardware",
-                        "status": "Active",
-                        "serialNumber": extracted_id,
-                        "tags": [extracted_id],
-                        "notes": f"Auto-added via scanner on {datetime.utcnow().isoformat()}",
-                        "createdAt": datetime.utcnow(),
-                        "updatedAt": datetime.utcnow()
-                    }
-                    
-                    if scan_request.additional_info:
-                        new_asset.update(scan_request.additional_info)
+                new_asset = build_new_asset(extracted_id, ai_result, scan_request.additional_info)
+                try:
+                    await resolve_assignee(db, new_asset)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
                 
-                # Insert into database
-                result = await db.assets.insert_one(new_asset)
+                # Insert into database; a concurrent scan may have added it first
+                try:
+                    await ensure_serial_available(db, new_asset["serialNormalized"])
+                    result = await db.assets.insert_one(new_asset)
+                except DuplicateKeyError:
+                    asset = await db.assets.find_one({"serialNormalized": new_asset["serialNormalized"]})
+                    return DeviceScanResult(
+                        status=ScanStatus.SUCCESS,
+                        scan_type=scan_request.scan_type,
+                        extracted_id=extracted_id,
+                        serial_number=asset.get("serialNumber"),
+                        asset_id=str(asset["_id"]),
+                        asset_data=asset_helper(asset),
+                        message="Device found in database",
+                        suggestions=[],
+                        stage_timings=stage_timings
+                    )
                 created_asset = await db.assets.find_one({"_id": result.inserted_id})
+                serial_index.add(result.inserted_id, new_asset.get("serialNumber"))
+                await record_asset_created(db, created_asset, "scanner auto-add")
                 
                 response = DeviceScanResult(
                     status=ScanStatus.SUCCESS,
@@ -226,7 +399,8 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
                     asset_id=str(result.inserted_id),
                     asset_data=asset_helper(created_asset),
                     message="Device automatically added to database with AI-enriched data",
-                    suggestions=[]
+                    suggestions=[],
+                    stage_timings=stage_timings
                 )
                 
                 # Add AI metadata
@@ -239,20 +413,15 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
                 return response
             
             # Device not found and not auto-adding - provide suggestions
-            suggestions = []
-            if len(extracted_id) > 4:
-                similar_assets = await db.assets.find({
-                    "serialNumber": {"$regex": extracted_id[:4], "$options": "i"}
-                }).limit(5).to_list(length=5)
-                
-                suggestions = [asset_helper(asset) for asset in similar_assets]
+            suggestions = await similar_assets(db, extracted_id)
             
             response = DeviceScanResult(
                 status=ScanStatus.NOT_FOUND,
                 scan_type=scan_request.scan_type,
                 extracted_id=extracted_id,
                 message="Device not found in database. Enable auto-add or use Quick Add form.",
-                suggestions=suggestions
+                suggestions=suggestions,
+                stage_timings=stage_timings
             )
             
             # Add AI enrichment data for user to review before adding
@@ -266,6 +435,8 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
             
             return response
             
+        except HTTPException:
+            raise
         except Exception as e:
             import traceback
             print(f"Error in scan_device: {str(e)}")
@@ -277,6 +448,363 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
                 suggestions=[]
             )
     
+    async def perform_batch_scan(
+        images: List[bytes],
+        auto_add: bool,
+        context: Optional[Dict[str, Any]],
+        additional_info: Optional[Dict[str, Any]],
+        db
+    ) -> BatchScanResult:
+        """
+        Scan many images at once (dock intake):
+        - candidate users are loaded once for the whole batch
+        - extraction runs concurrently, bounded by BATCH_SCAN_CONCURRENCY
+        - all extracted serials are resolved with a single $in query
+        - auto-added devices are written with one insert_many
+        """
+        if additional_info:
+            # One assignee lookup for the whole batch
+            try:
+                additional_info = await resolve_assignee(db, dict(additional_info))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        user_list = await load_eligible_users(db, context.get("department") if context else None)
+        ai_agent = get_ai_agent()
+        semaphore = asyncio.Semaphore(BATCH_SCAN_CONCURRENCY)
+        
+        async def extract(image_bytes: bytes) -> Dict[str, Any]:
+            async with semaphore:
+                codes = await decode_image_bytes(image_bytes)
+                if any(is_serial_like(c) for c in codes):
+                    # Serial-like codes first: the first one is used if none is known
+                    codes.sort(key=lambda c: not is_serial_like(c))
+                    return {"codes": [c["data"] for c in codes], "ai_result": None}
+                if codes:
+                    # Only product/URL codes: usable if one is a known serial
+                    known = await pick_device_code(codes, db)
+                    if known:
+                        return {"codes": [known], "ai_result": None}
+                
+                ai_image_data, _ = await preprocess_image(image_bytes)
+                ai_result = await ai_agent.process_scan_workflow(
+                    image_data=ai_image_data,
+                    available_users=user_list,
+                    context=context
+                )
+                serial = (ai_result.get("device_record") or {}).get("serial_number")
+                return {"codes": [serial] if serial else [], "ai_result": ai_result}
+        
+        extractions = await asyncio.gather(
+            *[extract(image_bytes) for image_bytes in images], return_exceptions=True
+        )
+        
+        # Resolve every candidate serial in one round trip
+        all_codes = {
+            code for item in extractions if isinstance(item, dict) for code in item["codes"]
+        }
+        existing = {}  # serialNormalized -> asset
+        if all_codes:
+            normalized_codes = list({normalize_serial(code) for code in all_codes} - {None})
+            async for asset in db.assets.find({"serialNormalized": {"$in": normalized_codes}}):
+                existing[asset["serialNormalized"]] = asset
+        
+        results: List[Optional[DeviceScanResult]] = [None] * len(images)
+        pending_inserts: Dict[str, Dict[str, Any]] = {}
+        pending_indexes: Dict[str, List[int]] = {}
+        
+        for i, item in enumerate(extractions):
+            scan_type = ScanType.AI_VISION
+            if isinstance(item, Exception):
+                results[i] = DeviceScanResult(
+                    status=ScanStatus.ERROR, scan_type=scan_type, message=f"Scan error: {item}"
+                )
+                continue
+            
+            ai_result = item["ai_result"]
+            if ai_result and ai_result.get("status") == "error":
+                results[i] = DeviceScanResult(
+                    status=ScanStatus.ERROR,
+                    scan_type=scan_type,
+                    message=ai_result.get("message", "AI processing failed"),
+                    stage_timings=ai_result.get("stage_timings")
+                )
+                continue
+            if not item["codes"]:
+                results[i] = DeviceScanResult(
+                    status=ScanStatus.ERROR,
+                    scan_type=scan_type,
+                    message="Could not extract device ID from image",
+                    extracted_text=ai_result.get("extracted_text") if ai_result else None
+                )
+                continue
+            
+            extracted_id = next(
+                (c for c in item["codes"] if normalize_serial(c) in existing), item["codes"][0]
+            )
+            
+            if normalize_serial(extracted_id) in existing:
+                asset = existing[normalize_serial(extracted_id)]
+                results[i] = DeviceScanResult(
+                    status=ScanStatus.SUCCESS,
+                    scan_type=scan_type,
+                    extracted_id=extracted_id,
+                    serial_number=extracted_id,
+                    asset_id=str(asset["_id"]),
+                    asset_data=asset_helper(asset),
+                    message="Device found in database"
+                )
+            elif auto_add:
+                # The same device may appear twice in one batch - add it once
+                key = normalize_serial(extracted_id)
+                if key not in pending_inserts:
+                    pending_inserts[key] = build_new_asset(extracted_id, ai_result, additional_info)
+                pending_indexes.setdefault(key, []).append(i)
+            else:
+                results[i] = DeviceScanResult(
+                    status=ScanStatus.NOT_FOUND,
+                    scan_type=scan_type,
+                    extracted_id=extracted_id,
+                    message="Device not found in database. Enable auto-add or use Quick Add form.",
+                    asset_data=ai_result.get("device_record") if ai_result else None,
+                    user_suggestions=ai_result.get("user_suggestions", []) if ai_result else []
+                )
+            
+            if results[i] is not None and ai_result:
+                results[i].confidence = ai_result.get("confidence")
+                results[i].extracted_text = ai_result.get("extracted_text")
+                results[i].ai_recommendations = ai_result.get("recommendations", [])
+                results[i].stage_timings = ai_result.get("stage_timings")
+        
+        added = 0
+        if pending_inserts:
+            keys = list(pending_inserts)
+            documents = list(pending_inserts.values())
+            duplicate_keys = set()
+            try:
+                await db.assets.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                # Serials added concurrently since the lookup above; the rest were inserted
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") != 11000:
+                        raise
+                    duplicate_keys.add(keys[error["index"]])
+                async for asset in db.assets.find({"serialNormalized": {"$in": list(duplicate_keys)}}):
+                    existing[asset["serialNormalized"]] = asset
+            
+            for key, document in zip(keys, documents):
+                for i in pending_indexes[key]:
+                    ai_result = extractions[i]["ai_result"]
+                    serial = document["serialNumber"]
+                    if key in duplicate_keys:
+                        asset = existing[key]
+                        results[i] = DeviceScanResult(
+                            status=ScanStatus.SUCCESS,
+                            scan_type=ScanType.AI_VISION,
+                            extracted_id=serial,
+                            serial_number=asset.get("serialNumber"),
+                            asset_id=str(asset["_id"]),
+                            asset_data=asset_helper(asset),
+                            message="Device found in database"
+                        )
+                        continue
+                    
+                    added += 1
+                    results[i] = DeviceScanResult(
+                        status=ScanStatus.SUCCESS,
+                        scan_type=ScanType.AI_VISION,
+                        extracted_id=serial,
+                        serial_number=serial,
+                        asset_id=str(document["_id"]),
+                        asset_data=asset_helper(document),
+                        message="Device automatically added to database",
+                        user_suggestions=ai_result.get("user_suggestions", []) if ai_result else [],
+                        confidence=ai_result.get("confidence") if ai_result else None
+                    )
+                if key not in duplicate_keys:
+                    serial_index.add(document["_id"], document.get("serialNumber"))
+            
+            # Each new asset starts its own chain, so these appends run concurrently
+            await asyncio.gather(*[
+                record_asset_created(db, document, "batch scan auto-add")
+                for key, document in zip(keys, documents) if key not in duplicate_keys
+            ])
+        
+        return BatchScanResult(
+            total=len(results),
+            found=sum(
+                1 for r in results
+                if r.status == ScanStatus.SUCCESS and normalize_serial(r.extracted_id) in existing
+            ),
+            added=added,
+            not_found=sum(1 for r in results if r.status == ScanStatus.NOT_FOUND),
+            errors=sum(1 for r in results if r.status == ScanStatus.ERROR),
+            results=results
+        )
+    
+    async def process_scan_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Worker handler for queued scans (JSON requests and multipart uploads)"""
+        scan_request = DeviceScanRequest(**payload["scan_request"])
+        result = await perform_scan(scan_request, get_database(), image_bytes=payload.get("image_bytes"))
+        return result.dict()
+    
+    async def read_scan_upload(
+        image: UploadFile,
+        scan_type: ScanType,
+        auto_add: bool,
+        context: Optional[str],
+        additional_info: Optional[str]
+    ):
+        """(DeviceScanRequest, image bytes) from a multipart scan upload"""
+        scan_request = DeviceScanRequest(
+            scan_type=scan_type,
+            auto_add=auto_add,
+            context=parse_form_object(context),
+            additional_info=parse_form_object(additional_info)
+        )
+        
+        image_bytes = await image.read()
+        if not image_bytes:
+            raise HTTPException(status_code=400, detail="Uploaded image is empty")
+        return scan_request, image_bytes
+    
+    async def enqueue_scan_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            job_id = await _scan_job_queue.enqueue(payload)
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        return {
+            "job_id": job_id,
+            "status": JobStatus.QUEUED,
+            "status_url": f"/api/scanner/scan/jobs/{job_id}",
+            "events_url": f"/api/scanner/scan/jobs/{job_id}/events"
+        }
+    
+    global _scan_job_queue
+    _scan_job_queue = LocalScanJobQueue(handler=process_scan_job)
+    
+    @router.post("/scan", response_model=DeviceScanResult)
+    async def scan_device(
+        scan_request: DeviceScanRequest,
+        db=Depends(get_database),
+        #current_user: UserResponse = Depends(get_current_user)
+    ):
+        """Scan a device and wait for the result"""
+        return await perform_scan(scan_request, db)
+    
+    @router.post("/scan/upload", response_model=DeviceScanResult)
+    async def scan_device_upload(
+        image: UploadFile = File(...),
+        scan_type: ScanType = Form(ScanType.AI_VISION),
+        auto_add: bool = Form(False),
+        context: Optional[str] = Form(None),
+        additional_info: Optional[str] = Form(None),
+        db=Depends(get_database),
+    ):
+        """
+        Scan a device from a multipart binary upload.
+        Avoids base64 inflation and JSON parsing of large photos.
+        `context` and `additional_info` are JSON-encoded objects.
+        """
+        scan_request, image_bytes = await read_scan_upload(image, scan_type, auto_add, context, additional_info)
+        return await perform_scan(scan_request, db, image_bytes=image_bytes)
+    
+    @router.post("/scan/batch", response_model=BatchScanResult)
+    async def scan_devices_batch(
+        batch_request: BatchScanRequest,
+        db=Depends(get_database),
+    ):
+        """Scan a batch of base64 images (e.g. a pallet at the dock). Results are returned per image."""
+        if not batch_request.images:
+            raise HTTPException(status_code=400, detail="No images provided")
+        if len(batch_request.images) > BATCH_SCAN_MAX_IMAGES:
+            raise HTTPException(status_code=400, detail=f"Batch is limited to {BATCH_SCAN_MAX_IMAGES} images")
+        
+        try:
+            images = [image_bytes_from_data_url(image) for image in batch_request.images]
+        except Exception:
+            raise HTTPException(status_code=400, detail="Images must be valid base64")
+        
+        return await perform_batch_scan(
+            images, batch_request.auto_add, batch_request.context, batch_request.additional_info, db
+        )
+    
+    @router.post("/scan/batch/upload", response_model=BatchScanResult)
+    async def scan_devices_batch_upload(
+        images: List[UploadFile] = File(...),
+        auto_add: bool = Form(False),
+        context: Optional[str] = Form(None),
+        additional_info: Optional[str] = Form(None),
+        db=Depends(get_database),
+    ):
+        """Scan a batch of images sent as multipart files. Results are returned per image."""
+        if len(images) > BATCH_SCAN_MAX_IMAGES:
+            raise HTTPException(status_code=400, detail=f"Batch is limited to {BATCH_SCAN_MAX_IMAGES} images")
+        context_dict = parse_form_object(context)
+        additional_dict = parse_form_object(additional_info)
+        
+        image_bytes = [await image.read() for image in images]
+        return await perform_batch_scan(image_bytes, auto_add, context_dict, additional_dict, db)
+    
+    @router.post("/scan/jobs", status_code=202)
+    async def submit_scan_job(scan_request: DeviceScanRequest):
+        """
+        Queue a scan and return a job id right away.
+        Poll GET /scan/jobs/{job_id} or stream GET /scan/jobs/{job_id}/events for the result.
+        """
+        return await enqueue_scan_job({"scan_request": scan_request.dict()})
+    
+    @router.post("/scan/jobs/upload", status_code=202)
+    async def submit_scan_upload_job(
+        image: UploadFile = File(...),
+        scan_type: ScanType = Form(ScanType.AI_VISION),
+        auto_add: bool = Form(False),
+        context: Optional[str] = Form(None),
+        additional_info: Optional[str] = Form(None)
+    ):
+        """
+        Queue a scan of a multipart binary upload (see /scan/upload) and
+        return a job id right away. The image is held only until the job finishes.
+        """
+        scan_request, image_bytes = await read_scan_upload(image, scan_type, auto_add, context, additional_info)
+        return await enqueue_scan_job({"scan_request": scan_request.dict(), "image_bytes": image_bytes})
+    
+    @router.get("/scan/jobs")
+    async def get_scan_queue_stats():
+        """Get scan queue depth and job counts by status"""
+        return _scan_job_queue.stats()
+    
+    @router.get("/scan/jobs/{job_id}")
+    async def get_scan_job(job_id: str, wait: float = 0):
+        """Get scan job status/result. Set `wait` (seconds, max 30) to long-poll until it finishes."""
+        if wait > 0:
+            job = await _scan_job_queue.wait(job_id, timeout=min(wait, 30))
+        else:
+            job = _scan_job_queue.get(job_id)
+        
+        if not job:
+            raise HTTPException(status_code=404, detail="Scan job not found")
+        return job
+    
+    @router.get("/scan/jobs/{job_id}/events")
+    async def stream_scan_job(job_id: str):
+        """Server-Sent Events stream of a scan job's status changes"""
+        if not _scan_job_queue.get(job_id):
+            raise HTTPException(status_code=404, detail="Scan job not found")
+        
+        async def event_stream():
+            async for job in _scan_job_queue.stream(job_id):
+                if job is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {job['status']}\ndata: {json.dumps(jsonable_encoder(job))}\n\n"
+        
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
     @router.post("/quick-add", response_model=dict)
     async def quick_add_device(
         device: QuickAddDevice,
@@ -285,34 +813,69 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
     ):
         """Quickly add a device after scanning"""
         
-        # Check if serial number already exists
-        existing = await db.assets.find_one({"serialNumber": device.serial_number})
-        if existing:
-            raise HTTPException(
-                status_code=400, 
-                detail="Device with this serial number already exists"
-            )
-        
         asset_dict = {
             "name": device.name,
             "type": device.type,
             "category": device.category,
             "status": "Active",
             "serialNumber": device.serial_number,
+            "serialNormalized": normalize_serial(device.serial_number),
             "manufacturer": device.manufacturer,
             "model": device.model,
             "location": device.location,
             "department": device.department,
+            "assignedTo": device.assignedTo,
+            "assignedToUserId": device.assignedToUserId,
             "tags": [device.serial_number],
             "createdAt": datetime.utcnow(),
             "updatedAt": datetime.utcnow(),
         }
+        try:
+            await resolve_assignee(db, asset_dict)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        result = await db.assets.insert_one(asset_dict)
+        # The unique serialNormalized index rejects duplicates atomically
+        try:
+            await ensure_serial_available(db, asset_dict["serialNormalized"])
+            result = await db.assets.insert_one(asset_dict)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=400, 
+                detail="Device with this serial number already exists"
+            )
         new_asset = await db.assets.find_one({"_id": result.inserted_id})
+        serial_index.add(result.inserted_id, asset_dict.get("serialNumber"))
+        await record_asset_created(db, new_asset, "quick-add")
+        
+        # A human-confirmed classification feeds the device catalog
+        await record_observation(
+            db, device.manufacturer, device.model, device.type, device.category, source="assets"
+        )
         
         return asset_helper(new_asset)
     
+    @router.get("/ai-cache/stats")
+    async def get_ai_cache_stats():
+        """Hit-rate metrics for cached AI extraction/enrichment results"""
+        return get_ai_agent().cache.get_stats()
+    
+    @router.get("/ai-client/stats")
+    async def get_ai_client_stats():
+        """OpenRouter client load: in-flight and queued requests, retries, circuit state"""
+        return get_ai_agent().client.get_stats()
+    
+    @router.post("/catalog/rebuild")
+    async def rebuild_catalog(
+        db=Depends(get_database),
+        current_user: UserResponse = Depends(get_current_user)
+    ):
+        """Rebuild the device catalog from existing assets and past enrichment results"""
+        stats = await rebuild_device_catalog(db)
+        if stats is None:
+            raise HTTPException(status_code=409, detail="A device catalog rebuild is already running")
+        return stats
+    
     @router.get("/validate/{serial_number}")
     async def validate_serial_number(
         serial_number: str,
@@ -320,7 +883,8 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
     ):
         """Validate if a serial number exists in database"""
         
-        asset = await db.assets.find_one({"serialNumber": serial_number})
+        normalized = normalize_serial(serial_number)
+        asset = await db.assets.find_one({"serialNormalized": normalized}) if normalized else None
         
         if asset:
             return {
@@ -330,12 +894,7 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
             }
         
         # Find similar devices
-        suggestions = []
-        if len(serial_number) > 3:
-            similar = await db.assets.find({
-                "serialNumber": {"$regex": serial_number[:4], "$options": "i"}
-            }).limit(5).to_list(length=5)
-            suggestions = [asset_helper(asset) for asset in similar]
+        suggestions = await similar_assets(db, serial_number)
         
         return {
             "exists": False,
@@ -356,4 +915,10 @@ def create_scanner_router(get_database, get_current_user, UserResponse, asset_he
         
         return [asset_helper(asset) for asset in recent_assets]
     
-    return router
\ No newline at end of file
+    return router
+
+async def shutdown_scanner():
+    """Stop background scan workers and the decoder pool"""
+    if _scan_job_queue:
+        await _scan_job_queue.close()
+    shutdown_decoder()
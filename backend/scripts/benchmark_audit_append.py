@@ -0,0 +1,93 @@
+# benchmark_audit_append.py
+"""
+Audit append cost per asset update as the number of changed, tracked
+fields grows: one batched chain segment (create_audit_segment) versus one
+append per field (create_audit_record in a loop).
+
+Runs against a real MongoDB in a throwaway database:
+
+    cd backend
+    MONGODB_URL=mongodb://localhost:27017 python scripts/benchmark_audit_append.py --updates 200
+
+Reports wall time and MongoDB round trips per update. The segment path
+should stay at a constant number of round trips regardless of field count.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+
+from pymongo import monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import MONGODB_URL, AUDIT_TRACKED_FIELDS  # noqa: E402
+from utils.audit import create_audit_record, create_audit_segment, system_user  # noqa: E402
+
+BENCHMARK_DATABASE = "itam_audit_benchmark"
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def run_case(db, counter, mode: str, field_count: int, updates: int):
+    user = system_user()
+    fields = AUDIT_TRACKED_FIELDS[:field_count]
+    asset_id = f"bench-{mode}-{field_count}"
+
+    counter.count = 0
+    started = time.perf_counter()
+    for n in range(updates):
+        changes = [(field, f"old-{n}", f"new-{n}") for field in fields]
+        if mode == "segment":
+            await create_audit_segment(db, asset_id, changes, user)
+        else:
+            for field, old_value, new_value in changes:
+                await create_audit_record(db, asset_id, field, old_value, new_value, user)
+    elapsed = time.perf_counter() - started
+
+    return elapsed * 1000 / updates, counter.count / updates
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=200, help="updates per case")
+    parser.add_argument("--max-fields", type=int, default=len(AUDIT_TRACKED_FIELDS))
+    args = parser.parse_args()
+
+    counter = RoundTripCounter()
+    client = AsyncIOMotorClient(MONGODB_URL, event_listeners=[counter])
+    await client.drop_database(BENCHMARK_DATABASE)
+    db = client[BENCHMARK_DATABASE]
+    await db.audit_chain.create_index([("asset_id", 1), ("chain_index", 1)], unique=True)
+    await db.audit_chain_heads.create_index("asset_id", unique=True)
+
+    print(f"{args.updates} updates per case, {datetime.utcnow().isoformat()}")
+    print(f"{'fields':>6} | {'segment ms':>10} {'trips':>6} | {'per-field ms':>12} {'trips':>6}")
+    try:
+        for field_count in range(1, min(args.max_fields, len(AUDIT_TRACKED_FIELDS)) + 1):
+            segment_ms, segment_trips = await run_case(db, counter, "segment", field_count, args.updates)
+            single_ms, single_trips = await run_case(db, counter, "per-field", field_count, args.updates)
+            print(f"{field_count:>6} | {segment_ms:>10.2f} {segment_trips:>6.1f} | {single_ms:>12.2f} {single_trips:>6.1f}")
+    finally:
+        await client.drop_database(BENCHMARK_DATABASE)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,253 @@
+"""
+Minimal in-memory stand-in for the motor collections the tests touch.
+Supports the query/update operators the backend uses, unique indexes
+(_id plus those declared per collection) and the ordered insert_many/BulkWriteError
+behaviour the audit chain relies on. Projections are ignored; aggregate
+only understands $match and a $group counting with $sum.
+"""
+
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+            for op, arg in condition.items():
+                if op == "$not" and _matches(doc, {key: arg}):
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$in" and not (value in arg or (isinstance(value, list) and set(value) & set(arg))):
+                    return False
+                if op == "$nin" and value in arg:
+                    return False
+                if op == "$exists" and (key in doc) != arg:
+                    return False
+                if op in ("$lt", "$lte", "$gt", "$gte"):
+                    if value is None:
+                        return False
+                    if op == "$lt" and not value < arg:
+                        return False
+                    if op == "$lte" and not value <= arg:
+                        return False
+                    if op == "$gt" and not value > arg:
+                        return False
+                    if op == "$gte" and not value >= arg:
+                        return False
+        elif isinstance(value, list) and not isinstance(condition, list):
+            if condition not in value:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeResult:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self._docs = docs
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: (d.get(field) is not None, d.get(field)), reverse=order == -1)
+        return self
+
+    def skip(self, count: int):
+        self._docs = self._docs[count:]
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self._docs = self._docs[:count]
+        return self
+
+    async def to_list(self, length: Optional[int] = None):
+        return copy.deepcopy(self._docs if length is None else self._docs[:length])
+
+    def __aiter__(self):
+        self._iter = iter(copy.deepcopy(self._docs))
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, unique: Tuple[Tuple[str, ...], ...] = (), database: "FakeDatabase" = None, name: str = ""):
+        self.docs: List[Dict[str, Any]] = []
+        self.unique = unique
+        self.database = database
+        self.name = name
+
+    def _check_unique(self, doc: Dict[str, Any], ignore=None):
+        for fields in (("_id",),) + self.unique:
+            if any(doc.get(f) is None for f in fields):
+                continue
+            for other in self.docs:
+                if other is not ignore and all(other.get(f) == doc.get(f) for f in fields):
+                    raise DuplicateKeyError(f"duplicate key on {fields}")
+
+    def find(self, query=None, projection=None, sort=None):
+        cursor = FakeCursor([d for d in self.docs if _matches(d, query or {})])
+        if sort:
+            cursor.sort(sort)
+        return cursor
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        docs = await self.find(query, sort=sort).limit(1).to_list()
+        return docs[0] if docs else None
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(copy.deepcopy(doc))
+        return FakeResult(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        for inserted, doc in enumerate(docs):
+            try:
+                await self.insert_one(doc)
+            except DuplicateKeyError:
+                raise BulkWriteError({
+                    "writeErrors": [{"index": inserted, "code": 11000}],
+                    "nInserted": inserted
+                })
+        return FakeResult(inserted_ids=[d["_id"] for d in docs])
+
+    @staticmethod
+    def _path(doc, field: str):
+        """(parent document, last key) for a dotted field path"""
+        *parents, last = field.split(".")
+        for part in parents:
+            doc = doc.setdefault(part, {})
+        return doc, last
+
+    def _apply(self, doc, update, inserting=False):
+        for field, value in update.get("$set", {}).items():
+            parent, last = self._path(doc, field)
+            parent[last] = value
+        if inserting:
+            doc.update(update.get("$setOnInsert", {}))
+        for field, value in update.get("$inc", {}).items():
+            parent, last = self._path(doc, field)
+            parent[last] = parent.get(last, 0) + value
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=ReturnDocument.BEFORE, **kwargs):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = {k: v for k, v in query.items() if not isinstance(v, dict) and not k.startswith("$")}
+            doc.setdefault("_id", ObjectId())
+            self._apply(doc, update, inserting=True)
+            self._check_unique(doc)
+            self.docs.append(doc)
+            return copy.deepcopy(doc) if return_document == ReturnDocument.AFTER else None
+        before = copy.deepcopy(doc)
+        candidate = copy.deepcopy(doc)
+        self._apply(candidate, update)
+        self._check_unique(candidate, ignore=doc)
+        doc.clear()
+        doc.update(candidate)
+        return copy.deepcopy(doc) if return_document == ReturnDocument.AFTER else before
+
+    async def update_one(self, query, update, upsert=False):
+        doc = await self.find_one_and_update(query, update, upsert=upsert)
+        return FakeResult(matched_count=0 if doc is None else 1)
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=request._upsert)
+        return FakeResult()
+
+    async def delete_one(self, query):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is not None:
+            self.docs.remove(doc)
+        return FakeResult(deleted_count=0 if doc is None else 1)
+
+    async def delete_many(self, query):
+        kept = [d for d in self.docs if not _matches(d, query)]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return FakeResult(deleted_count=deleted)
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    def aggregate(self, pipeline):
+        docs = copy.deepcopy(self.docs)
+        for stage in pipeline:
+            if "$match" in stage:
+                docs = [d for d in docs if _matches(d, stage["$match"])]
+            elif "$group" in stage:
+                spec = stage["$group"]
+                groups: Dict[Any, Dict[str, Any]] = {}
+                for doc in docs:
+                    group_id = {k: doc.get(v.lstrip("$")) for k, v in spec["_id"].items()}
+                    group = groups.setdefault(repr(sorted(group_id.items())), {"_id": group_id})
+                    for field, accumulator in spec.items():
+                        if field != "_id":
+                            group[field] = group.get(field, 0) + accumulator["$sum"]
+                docs = list(groups.values())
+        return FakeCursor(docs)
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        if unique:
+            self.unique = self.unique + ((keys,) if isinstance(keys, str) else (tuple(k for k, _ in keys),))
+
+    async def drop(self):
+        # Like a motor handle, this object stays usable and is recreated empty
+        self.docs = []
+        self.unique = FakeDatabase.UNIQUE.get(self.name, ())
+        self.database._collections[self.name] = self
+
+    async def rename(self, new_name: str, dropTarget: bool = False):
+        collections = self.database._collections
+        if new_name in collections and not dropTarget:
+            raise ValueError(f"target namespace {new_name} exists")
+        collections[new_name] = collections.pop(self.name)
+        self.name = new_name
+
+
+class FakeDatabase:
+    """Collections are created on first access, like a real database"""
+
+    UNIQUE = {
+        "audit_chain": (("asset_id", "chain_index"),),
+        "audit_chain_heads": (("asset_id",),),
+        "audit_checkpoints": (("asset_id",),),
+    }
+
+    def __init__(self):
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self.UNIQUE.get(name, ()), database=self, name=name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+import ai_agent_service
+from ai_providers import AIProvider, OpenAICompatibleProvider, StubProvider, create_provider
+
+
+def test_stub_provider_is_deterministic():
+    provider = create_provider("stub")
+    assert isinstance(provider, StubProvider)
+
+    first = asyncio.run(provider.extract("data:image/png;base64,AAAA"))
+    again = asyncio.run(provider.extract("data:image/png;base64,AAAA"))
+    other = asyncio.run(provider.extract("data:image/png;base64,BBBB"))
+
+    assert first["serial_number"] == again["serial_number"]
+    assert first["serial_number"] != other["serial_number"]
+    assert first["serial_number"].startswith("STUB")
+
+
+def test_stub_provider_enriches_extraction():
+    provider = StubProvider()
+    extracted = asyncio.run(provider.extract("image"))
+    enriched = asyncio.run(provider.enrich(extracted))
+
+    assert enriched["device_type"] == "Laptop"
+    assert enriched["likely_manufacturer"] == "Dell"
+    assert enriched["suggested_name"] == "Dell Latitude 5420"
+    assert enriched["confidence_score"] == 0.9
+
+
+def test_provider_must_implement_both_stages():
+    class ExtractOnly(AIProvider):
+        async def extract(self, image_data):
+            return {}
+
+    with pytest.raises(TypeError):
+        ExtractOnly()
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        create_provider("nope")
+
+
+USERS = [
+    {"_id": "1", "name": "Ada", "email": "ada@example.com", "department": "IT", "role": "Employee"},
+    {"_id": "2", "name": "Brian", "email": "brian@example.com", "department": "IT", "role": "Employee", "assetsCount": 4},
+]
+
+
+def test_rerank_is_skipped_for_providers_without_a_text_model(monkeypatch):
+    monkeypatch.setattr(ai_agent_service, "USER_SUGGEST_LLM_RERANK", True)
+    service = ai_agent_service.AIAgentService(extract_provider=StubProvider(), enrich_provider=StubProvider())
+
+    async def no_remote_calls(*args, **kwargs):
+        raise AssertionError("re-rank must not call OpenRouter")
+    service.client.post = no_remote_calls
+
+    suggestions = asyncio.run(service.suggest_user_assignment({"device_type": "Laptop"}, USERS, "IT", top_k=2))
+    assert [s["user_name"] for s in suggestions] == ["Ada", "Brian"]
+
+
+def test_rerank_uses_the_enrichment_providers_text_model(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": '["Brian", "Ada"]'}}]})
+
+    provider = OpenAICompatibleProvider(
+        name="local_openai",
+        base_url="http://local/v1",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        vision_model="vision",
+        text_model="text",
+        cacheable=False
+    )
+    monkeypatch.setattr(ai_agent_service, "USER_SUGGEST_LLM_RERANK", True)
+    service = ai_agent_service.AIAgentService(extract_provider=StubProvider(), enrich_provider=provider)
+
+    suggestions = asyncio.run(service.suggest_user_assignment({"device_type": "Laptop"}, USERS, "IT", top_k=2))
+    assert [s["user_name"] for s in suggestions] == ["Brian", "Ada"]
+    assert [str(r.url) for r in requests] == ["http://local/v1/chat/completions"]
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from models import AssetUpdate
+from routes.assets import update_asset
+from tests.fake_db import FakeDatabase
+
+
+def seed_asset(db: FakeDatabase, serial: str, **fields) -> str:
+    asset_id = ObjectId()
+    db.assets.docs.append({
+        "_id": asset_id,
+        "name": fields.pop("name", f"Laptop {serial}"),
+        "type": "Laptop",
+        "category": "Hardware",
+        "status": "Active",
+        "serialNumber": serial,
+        "serialNormalized": serial,
+        "createdAt": datetime.utcnow(),
+        "updatedAt": datetime.utcnow(),
+        **fields
+    })
+    return str(asset_id)
+
+
+def test_duplicate_serial_update_leaves_no_audit_record():
+    db = FakeDatabase()
+    seed_asset(db, "SN1")
+    asset_id = seed_asset(db, "SN2", location="HQ")
+
+    async def scenario():
+        with pytest.raises(HTTPException) as raised:
+            await update_asset(asset_id, AssetUpdate(serialNumber="sn-1", location="Lab"), db, None)
+        assert raised.value.status_code == 400
+
+    asyncio.run(scenario())
+
+    assert db.audit_chain.docs == []
+    stored = next(a for a in db.assets.docs if str(a["_id"]) == asset_id)
+    assert stored["serialNumber"] == "SN2"
+    assert stored["location"] == "HQ"
+
+
+def test_successful_update_is_audited_against_the_stored_document():
+    db = FakeDatabase()
+    asset_id = seed_asset(db, "SN3", location="HQ")
+
+    async def scenario():
+        await update_asset(asset_id, AssetUpdate(location="Lab"), db, None)
+
+    asyncio.run(scenario())
+
+    records = [r for r in db.audit_chain.docs if r["asset_id"] == asset_id]
+    assert [(r["field_changed"], r["old_value"], r["new_value"]) for r in records] == [("location", "HQ", "Lab")]
@@ -0,0 +1,21 @@
+import hashlib
+
+from audit_anchoring import leaf_hash, merkle_levels, merkle_proof, proof_path, verify_inclusion
+
+
+def leaves(count: int):
+    return [leaf_hash(hashlib.sha256(str(i).encode()).hexdigest()) for i in range(count)]
+
+
+def test_stored_levels_give_the_same_proof_as_a_rebuild():
+    for count in range(1, 20):
+        tree = leaves(count)
+        levels = merkle_levels(tree)
+        sizes = [len(level) for level in levels]
+        for index in range(count):
+            proof = [
+                {"hash": levels[step["level"]][step["index"]], "position": step["position"]}
+                for step in proof_path(sizes, index)
+            ]
+            assert proof == merkle_proof(tree, index)
+            assert verify_inclusion(tree[index], proof, levels[-1][0])
@@ -0,0 +1,64 @@
+import asyncio
+
+from bson import ObjectId
+
+from utils import audit
+from utils.audit import compute_audit_hash, create_audit_segment, system_user, verify_audit_chain
+from tests.fake_db import FakeDatabase
+
+
+def append_from_another_process(db: FakeDatabase, asset_id: str):
+    """Write the next record directly, leaving this process's cached head stale"""
+    head = max((r for r in db.audit_chain.docs if r["asset_id"] == asset_id), key=lambda r: r["chain_index"])
+    record = {
+        "_id": ObjectId(),
+        "timestamp": head["timestamp"],
+        "asset_id": asset_id,
+        "field_changed": "status",
+        "old_value": "Active",
+        "new_value": "Retired",
+        "changed_by_user_id": "other",
+        "changed_by_email": "other@example.com",
+        "previous_hash": head["current_hash"],
+        "chain_index": head["chain_index"] + 1,
+        "metadata": {}
+    }
+    record["current_hash"] = compute_audit_hash(
+        timestamp=record["timestamp"],
+        asset_id=asset_id,
+        field="status",
+        old_value="Active",
+        new_value="Retired",
+        user_id="other",
+        previous_hash=head["current_hash"]
+    )
+    db.audit_chain.docs.append(record)
+
+
+def test_concurrent_appends_produce_one_contiguous_chain():
+    db = FakeDatabase()
+    asset_id = str(ObjectId())
+    user = system_user()
+
+    async def scenario():
+        await create_audit_segment(db, asset_id, [("location", "HQ", "Lab")], user)
+        append_from_another_process(db, asset_id)
+        await asyncio.gather(*(
+            create_audit_segment(db, asset_id, [("notes", str(i), str(i + 1))] * (1 + i % 3), user)
+            for i in range(20)
+        ))
+        await asyncio.gather(*audit._background_writes)
+        return await verify_audit_chain(db, asset_id, full=True)
+
+    verification = asyncio.run(scenario())
+
+    indexes = sorted(r["chain_index"] for r in db.audit_chain.docs)
+    expected = 2 + sum(1 + i % 3 for i in range(20))
+    assert indexes == list(range(expected))
+    assert verification.is_valid
+    assert verification.total_records == expected
+
+    head = db.audit_chain_heads.docs[0]
+    assert head["last_index"] == expected - 1
+    total = next(s for s in db.audit_stats_daily.docs if s["dimension"] == "total")
+    assert total["count"] == expected - 1
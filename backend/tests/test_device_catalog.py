@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from device_catalog import rebuild_device_catalog, record_observation
+from tests.fake_db import FakeDatabase
+
+
+def seed(db: FakeDatabase):
+    db.assets.docs.append({
+        "manufacturer": "Dell", "model": "Latitude 5420", "type": "Laptop", "category": "Hardware",
+        "createdAt": datetime.utcnow() - timedelta(days=1)
+    })
+
+
+def test_rebuild_counts_each_asset_once():
+    db = FakeDatabase()
+    seed(db)
+
+    stats = asyncio.run(rebuild_device_catalog(db))
+
+    assert stats == {"asset_groups": 1, "enrichment_results": 0, "catalog_entries": 1}
+    entry = db.device_catalog.docs[0]
+    assert entry["key"] == "dell|latitude 5420"
+    assert entry["observations"] == 1
+
+
+def test_observations_recorded_during_a_rebuild_survive_the_swap():
+    db = FakeDatabase()
+    seed(db)
+    scan_assets = db.assets.aggregate
+
+    class LiveWriteDuringScan:
+        """Records a live observation while the rebuild is reading its sources"""
+        def __init__(self, pipeline):
+            self.cursor = scan_assets(pipeline)
+
+        async def to_list(self, length=None):
+            await record_observation(db, "HP", "EliteBook 840", "Laptop", "Hardware", source="enrichment")
+            return await self.cursor.to_list(length)
+
+    db.assets.aggregate = LiveWriteDuringScan
+
+    async def scenario():
+        stats = await rebuild_device_catalog(db)
+        # The lease is released, so a second rebuild may run
+        assert await rebuild_device_catalog(db) is not None
+        return stats
+
+    stats = asyncio.run(scenario())
+
+    assert stats["catalog_entries"] == 2
+    observations = {e["key"]: e["observations"] for e in db.device_catalog.docs}
+    assert observations == {"dell|latitude 5420": 1, "hp|elitebook 840": 1}
+
+
+def test_only_one_rebuild_runs_at_a_time():
+    db = FakeDatabase()
+    db.device_catalog_state.docs.append({
+        "_id": "rebuild", "holder": "another-worker", "started_at": None,
+        "expires_at": datetime.utcnow() + timedelta(minutes=5)
+    })
+
+    assert asyncio.run(rebuild_device_catalog(db)) is None
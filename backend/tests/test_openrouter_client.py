@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from openrouter_client import CircuitBreaker, CircuitOpenError, RateLimitedClient, parse_retry_after
+
+
+def make_client(handler, **kwargs) -> RateLimitedClient:
+    """RateLimitedClient in front of an in-process mock OpenRouter"""
+    transport = httpx.MockTransport(handler)
+    options = {"rate_per_second": 1000, "burst": 100, "max_retries": 0, "breaker_threshold": 2, "breaker_reset": 0.05}
+    options.update(kwargs)
+    return RateLimitedClient(httpx.AsyncClient(transport=transport, base_url="https://mock"), **options)
+
+
+def test_breaker_state_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_request()
+    # Only one trial at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    # A failed trial re-opens immediately
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+def test_client_opens_and_recovers_against_mock_server():
+    responses = iter([503, 503, 200])
+
+    def handler(request):
+        return httpx.Response(next(responses))
+
+    async def scenario():
+        client = make_client(handler)
+        assert (await client.post("/chat")).status_code == 503
+        assert (await client.post("/chat")).status_code == 503
+        with pytest.raises(CircuitOpenError):
+            await client.post("/chat")
+        await asyncio.sleep(0.06)
+        assert (await client.post("/chat")).status_code == 200
+        assert client.breaker.state == CircuitBreaker.CLOSED
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_trial_does_not_wedge_breaker():
+    async def slow_handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200)
+
+    async def scenario():
+        client = make_client(slow_handler)
+        client.breaker.record_failure()
+        client.breaker.record_failure()
+        await asyncio.sleep(0.06)
+        assert client.breaker.state == CircuitBreaker.HALF_OPEN
+
+        # A stage timeout cancels the trial mid-request
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.post("/chat"), timeout=0.01)
+        assert client.breaker.state == CircuitBreaker.OPEN
+
+        await asyncio.sleep(0.06)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200)))
+        assert (await client.post("https://mock/chat")).status_code == 200
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_is_capped():
+    assert parse_retry_after("5") == 5
+    assert parse_retry_after("-3") == 0
+    assert parse_retry_after("99999999", cap=120) == 120
+    assert parse_retry_after("nan") is None
+    assert parse_retry_after("Wed, 21 Oct 2099 07:28:00 GMT", cap=120) == 120
+    assert parse_retry_after("garbage") is None
@@ -0,0 +1,48 @@
+import asyncio
+
+from scan_jobs import JobStatus, LocalScanJobQueue
+
+
+async def echo(payload):
+    return {"size": len(payload["image_bytes"])}
+
+
+def test_queued_upload_payload_reaches_the_handler():
+    async def scenario():
+        queue = LocalScanJobQueue(handler=echo, workers=1)
+        job_id = await queue.enqueue({"image_bytes": b"\x89PNG"})
+        job = await queue.wait(job_id, timeout=1)
+        await queue.close()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job["status"] == JobStatus.COMPLETED
+    assert job["result"] == {"size": 4}
+
+
+def test_expired_job_is_gone_on_poll():
+    async def scenario():
+        queue = LocalScanJobQueue(handler=echo, workers=1, ttl_seconds=0, purge_interval=60)
+        job_id = await queue.enqueue({"image_bytes": b"x"})
+        await queue.wait(job_id, timeout=1)
+        await asyncio.sleep(0.01)
+        polled = queue.get(job_id)
+        await queue.close()
+        return polled, job_id in queue._jobs
+
+    polled, still_stored = asyncio.run(scenario())
+    assert polled is None
+    assert not still_stored
+
+
+def test_expired_jobs_are_purged_on_a_timer():
+    async def scenario():
+        queue = LocalScanJobQueue(handler=echo, workers=1, ttl_seconds=0, purge_interval=0.01)
+        job_id = await queue.enqueue({"image_bytes": b"x"})
+        await queue.wait(job_id, timeout=1)
+        await asyncio.sleep(0.05)
+        stored = dict(queue._jobs)
+        await queue.close()
+        return stored
+
+    assert asyncio.run(scenario()) == {}
@@ -0,0 +1,31 @@
+import asyncio
+
+from scanner_api_simple import is_serial_like, pick_device_code
+from tests.fake_db import FakeDatabase
+
+EAN = {"data": "4006381333931", "type": "EAN13"}
+URL = {"data": "https://support.example.com/product/5CD1234XYZ", "type": "QRCODE"}
+SERIAL = {"data": "5CD1234XYZ", "type": "CODE128"}
+
+
+def test_only_serial_symbologies_are_serial_like():
+    assert is_serial_like(SERIAL)
+    assert not is_serial_like(EAN)
+    assert not is_serial_like(URL)
+    assert not is_serial_like({"data": "NOTICE", "type": "CODE39"})
+
+
+def test_unknown_product_codes_fall_through_to_ai():
+    db = FakeDatabase()
+    assert asyncio.run(pick_device_code([EAN, URL], db)) is None
+
+
+def test_serial_like_code_is_used_when_nothing_is_known():
+    db = FakeDatabase()
+    assert asyncio.run(pick_device_code([EAN, SERIAL], db)) == "5CD1234XYZ"
+
+
+def test_known_serial_wins_in_any_symbology():
+    db = FakeDatabase()
+    db.assets.docs.append({"serialNumber": "4006381333931", "serialNormalized": "4006381333931"})
+    assert asyncio.run(pick_device_code([SERIAL, EAN], db)) == "4006381333931"
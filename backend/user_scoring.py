@@ -0,0 +1,135 @@
+# user_scoring.py
+"""
+Deterministic user-assignment scoring for scanned devices.
+Ranks every eligible user on department match, role/device-type affinity
+and current asset load, using vectorized numpy scoring.
+"""
+
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from models import UserRole, UserStatus
+from ai_providers import classify_device
+
+# Score weights (sum to 1.0)
+DEPARTMENT_WEIGHT = 0.45
+ROLE_AFFINITY_WEIGHT = 0.30
+LOAD_WEIGHT = 0.25
+
+# How well a device type suits each role (0..1); unknown pairs get DEFAULT_AFFINITY
+DEFAULT_AFFINITY = 0.5
+ROLE_DEVICE_AFFINITY = {
+    UserRole.IT_SUPPORT.value: {
+        "Server": 1.0, "Network Device": 1.0, "Laptop": 0.8, "Desktop": 0.7,
+        "Printer": 0.6, "Monitor": 0.5, "Phone": 0.5, "Tablet": 0.5
+    },
+    UserRole.ADMIN.value: {
+        "Server": 0.8, "Network Device": 0.8, "Laptop": 0.7, "Desktop": 0.6,
+        "Printer": 0.4, "Monitor": 0.5, "Phone": 0.6, "Tablet": 0.6
+    },
+    UserRole.MANAGER.value: {
+        "Laptop": 0.9, "Phone": 0.9, "Tablet": 0.8, "Monitor": 0.6,
+        "Desktop": 0.5, "Printer": 0.3, "Server": 0.1, "Network Device": 0.1
+    },
+    UserRole.EMPLOYEE.value: {
+        "Laptop": 0.9, "Desktop": 0.9, "Monitor": 0.8, "Phone": 0.6,
+        "Tablet": 0.6, "Printer": 0.3, "Server": 0.0, "Network Device": 0.0
+    },
+}
+
+CANDIDATE_PROJECTION = {"name": 1, "email": 1, "department": 1, "role": 1, "assetsCount": 1}
+
+
+async def load_eligible_users(db, department: Optional[str] = None, limit: int = 5000) -> List[Dict[str, Any]]:
+    """
+    Active users that may receive a device, optionally limited to one department.
+    Served by the users (status, department) index. At most `limit` users
+    are considered; hitting the limit is logged.
+    """
+    query: Dict[str, Any] = {"status": {"$in": [UserStatus.ACTIVE.value, None]}}
+    if department:
+        query["department"] = department
+
+    users = await db.users.find(query, CANDIDATE_PROJECTION).limit(limit).to_list(length=limit)
+    if len(users) >= limit:
+        scope = f" in {department}" if department else ""
+        print(f"WARNING: eligible users{scope} truncated to {limit}; assignment suggestions ignore the rest")
+    if not users and department:
+        # Nobody in that department - fall back to everyone eligible
+        return await load_eligible_users(db, None, limit)
+
+    return [
+        {
+            "id": str(u["_id"]),
+            "name": u.get("name"),
+            "email": u.get("email"),
+            "department": u.get("department"),
+            "role": u.get("role"),
+            "assetsCount": u.get("assetsCount", 0)
+        }
+        for u in users
+    ]
+
+
+def infer_device_type(device_info: Dict[str, Any]) -> str:
+    """Use an enriched device type if present, else classify the extracted fields"""
+    return device_info.get("device_type") or device_info.get("type") or classify_device(device_info)["device_type"]
+
+
+def score_users(
+    device_info: Dict[str, Any],
+    users: List[Dict[str, Any]],
+    department: Optional[str] = None,
+    top_k: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Rank users for a device. Returns the top_k as
+    [{"user_name", "user_id", "email", "confidence", "reason"}], best first.
+    Ties are broken by name so results are stable.
+    """
+    if not users:
+        return []
+
+    device_type = infer_device_type(device_info)
+
+    departments = np.array([u.get("department") or "" for u in users], dtype=object)
+    roles = [u.get("role") or UserRole.EMPLOYEE.value for u in users]
+    loads = np.array([u.get("assetsCount") or 0 for u in users], dtype=float)
+
+    department_match = (departments == department).astype(float) if department else np.zeros(len(users))
+    affinity = np.array(
+        [ROLE_DEVICE_AFFINITY.get(role, {}).get(device_type, DEFAULT_AFFINITY) for role in roles],
+        dtype=float
+    )
+    # Fewer assets -> higher score, scaled against the busiest candidate
+    max_load = loads.max()
+    load_score = 1.0 - loads / max_load if max_load > 0 else np.ones(len(users))
+
+    scores = (
+        DEPARTMENT_WEIGHT * department_match
+        + ROLE_AFFINITY_WEIGHT * affinity
+        + LOAD_WEIGHT * load_score
+    )
+    if not department:
+        # Department match cannot contribute - renormalize so scores stay in 0..1
+        scores = scores / (1.0 - DEPARTMENT_WEIGHT)
+
+    names = [u.get("name") or "" for u in users]
+    order = sorted(range(len(users)), key=lambda i: (-scores[i], names[i]))[:top_k]
+
+    suggestions = []
+    for i in order:
+        reasons = []
+        if department_match[i]:
+            reasons.append(f"in {department}")
+        reasons.append(f"{roles[i]} suits {device_type} ({affinity[i]:.1f})")
+        reasons.append(f"{int(loads[i])} assets assigned")
+        suggestions.append({
+            "user_name": users[i].get("name"),
+            "user_id": users[i].get("id"),
+            "email": users[i].get("email"),
+            "confidence": round(float(scores[i]), 3),
+            "reason": ", ".join(reasons)
+        })
+    return suggestions
@@ -1,27 +1,69 @@
 from .helpers import (
     asset_helper,
+    normalize_serial,
     user_helper,
     procurement_request_helper,
     audit_record_helper,
-    update_user_asset_count,
+    resolve_assignee,
+    adjust_user_asset_counts,
+    reconcile_user_asset_counts,
     check_and_update_expired_assets,
     check_and_update_compliance_status
 )
 from .audit import (
     compute_audit_hash,
     create_audit_record,
-    verify_audit_chain
+    create_audit_segment,
+    diff_asset_fields,
+    asset_snapshot,
+    asset_audit_metadata,
+    system_user,
+    verify_audit_chain,
+    load_audit_chain,
+    load_audit_page,
+    load_audit_head,
+    stored_verification_status,
+    load_checkpoint,
+    AUDIT_EVENT_CREATED,
+    AUDIT_EVENT_DELETED,
+    AUDIT_STATS_TOTAL,
+    AUDIT_STATS_FIELD,
+    AUDIT_STATS_USER
 )
+from .heartbeat import HeartbeatLoadTracker, heartbeat_tracker
+from .serial_index import SerialIndex, serial_index
 
 __all__ = [
     "asset_helper",
+    "normalize_serial",
     "user_helper",
     "procurement_request_helper",
     "audit_record_helper",
-    "update_user_asset_count",
+    "resolve_assignee",
+    "adjust_user_asset_counts",
+    "reconcile_user_asset_counts",
     "check_and_update_expired_assets",
     "check_and_update_compliance_status",
     "compute_audit_hash",
     "create_audit_record",
-    "verify_audit_chain"
+    "create_audit_segment",
+    "diff_asset_fields",
+    "asset_snapshot",
+    "asset_audit_metadata",
+    "system_user",
+    "AUDIT_EVENT_CREATED",
+    "AUDIT_EVENT_DELETED",
+    "AUDIT_STATS_TOTAL",
+    "AUDIT_STATS_FIELD",
+    "AUDIT_STATS_USER",
+    "verify_audit_chain",
+    "load_audit_chain",
+    "load_audit_page",
+    "load_audit_head",
+    "stored_verification_status",
+    "load_checkpoint",
+    "HeartbeatLoadTracker",
+    "heartbeat_tracker",
+    "SerialIndex",
+    "serial_index"
 ]
@@ -1,7 +1,19 @@
 import hashlib
-from datetime import datetime
-from typing import Optional, Dict, Any
-from models import UserResponse, AuditChainVerification
+import hmac
+import json
+import asyncio
+from collections import OrderedDict, Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from models import UserResponse, UserRole, UserStatus, AuditChainVerification
+from event_bus import publish_event, EventType
+from audit_archive import load_archived_records
+from config import (
+    AUDIT_CHECKPOINT_KEY, AUDIT_APPEND_MAX_RETRIES, AUDIT_HEAD_CACHE_SIZE, AUDIT_TRACKED_FIELDS
+)
 
 def compute_audit_hash(
     timestamp: datetime,
@@ -35,6 +47,390 @@ def compute_audit_hash(
     hash_object = hashlib.sha256(data_string.encode('utf-8'))
     return hash_object.hexdigest()
 
+class KeyedLocks:
+    """One asyncio.Lock per key, dropped once nobody holds or waits on it"""
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: str):
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+class AuditAppendConflict(Exception):
+    """Raised when an append keeps losing the race for the next chain_index"""
+
+_append_locks = KeyedLocks()
+# asset_id -> (last chain_index, last hash) as seen by this process
+_head_cache: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+
+def _cache_head(asset_id: str, last_index: int, last_hash: str):
+    _head_cache[asset_id] = (last_index, last_hash)
+    _head_cache.move_to_end(asset_id)
+    while len(_head_cache) > AUDIT_HEAD_CACHE_SIZE:
+        _head_cache.popitem(last=False)
+
+async def _load_head(db, asset_id: str, from_chain: bool = False) -> Tuple[int, Optional[str]]:
+    """
+    (last chain_index, last hash) for an asset; (-1, None) for an empty chain.
+    The chain itself is authoritative - it is consulted when there is no head
+    document yet (older chains) or after a conflict showed the head is behind.
+    """
+    head = None if from_chain else await db.audit_chain_heads.find_one({"asset_id": asset_id})
+    if head:
+        return head["last_index"], head["last_hash"]
+    latest = await db.audit_chain.find_one(
+        {"asset_id": asset_id},
+        {"chain_index": 1, "current_hash": 1},
+        sort=[("chain_index", -1)]
+    )
+    if latest:
+        return latest["chain_index"], latest["current_hash"]
+    archived = await db.audit_chain_archive.find_one(
+        {"asset_id": asset_id}, {"last_index": 1, "last_hash": 1}, sort=[("first_index", -1)]
+    )
+    if archived:
+        return archived["last_index"], archived["last_hash"]
+    return -1, None
+
+async def load_audit_chain(db, asset_id: str) -> List[Dict[str, Any]]:
+    """An asset's whole chain sorted by chain_index, archived records first"""
+    records = await db.audit_chain.find(
+        {"asset_id": asset_id}
+    ).sort("chain_index", 1).to_list(length=None)
+    if records and records[0]["chain_index"] == 0:
+        return records
+    first_hot = records[0]["chain_index"] if records else None
+    archived = await load_archived_records(
+        db, asset_id, max_index=first_hot - 1 if first_hot is not None else None
+    )
+    return archived + records
+
+async def load_audit_page(
+    db,
+    asset_id: str,
+    after_index: Optional[int] = None,
+    before_index: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 100
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    One page of an asset's chain sorted by chain_index, and whether more
+    records lie beyond it. Pages forward from `after_index`, otherwise
+    backward from `before_index` (or from the head). Archived records are
+    read only when the page reaches below the hot tier.
+    """
+    # Stored timestamps are naive UTC
+    since, until = (
+        t.astimezone(timezone.utc).replace(tzinfo=None) if t and t.tzinfo else t for t in (since, until)
+    )
+    forward = after_index is not None and before_index is None
+    lower = after_index + 1 if after_index is not None else 0
+    upper = before_index - 1 if before_index is not None else None
+    
+    first_hot = await db.audit_chain.find_one(
+        {"asset_id": asset_id}, {"chain_index": 1}, sort=[("chain_index", 1)]
+    )
+    boundary = first_hot["chain_index"] if first_hot else None
+    
+    async def hot(count: int) -> List[Dict[str, Any]]:
+        start = max(lower, boundary) if boundary is not None else None
+        if count <= 0 or start is None or (upper is not None and upper < start):
+            return []
+        query: Dict[str, Any] = {"asset_id": asset_id, "chain_index": {"$gte": start}}
+        if upper is not None:
+            query["chain_index"]["$lte"] = upper
+        if since or until:
+            query["timestamp"] = {}
+            if since:
+                query["timestamp"]["$gte"] = since
+            if until:
+                query["timestamp"]["$lte"] = until
+        return await db.audit_chain.find(query).sort(
+            "chain_index", 1 if forward else -1
+        ).limit(count).to_list(length=count)
+    
+    async def cold(count: int) -> List[Dict[str, Any]]:
+        end = boundary - 1 if boundary is not None else upper
+        if upper is not None and end is not None:
+            end = min(end, upper)
+        if count <= 0 or (end is not None and end < lower):
+            return []
+        return await load_archived_records(
+            db, asset_id, min_index=lower, max_index=end, since=since, until=until,
+            limit=count, descending=not forward
+        )
+    
+    # Fetch one extra record to learn whether another page exists
+    if forward:
+        records = await cold(limit + 1)
+        records += await hot(limit + 1 - len(records))
+    else:
+        records = await hot(limit + 1)
+        records += await cold(limit + 1 - len(records))
+    
+    has_more = len(records) > limit
+    records = records[:limit]
+    if not forward:
+        records.reverse()
+    return records, has_more
+
+async def load_audit_head(db, asset_id: str) -> Tuple[int, Optional[str]]:
+    """(last chain_index, last hash) for an asset; (-1, None) for an empty chain"""
+    return await _load_head(db, asset_id)
+
+async def _advance_head(db, asset_id: str, last_index: int, last_hash: str):
+    """Move the stored head forward; never backwards"""
+    try:
+        await db.audit_chain_heads.find_one_and_update(
+            {"asset_id": asset_id, "last_index": {"$lt": last_index}},
+            {"$set": {"last_index": last_index, "last_hash": last_hash, "updatedAt": datetime.utcnow()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The head document is already at or past this index
+        pass
+    except Exception as e:
+        # A head left behind is repaired by the next append's conflict retry
+        print(f"Could not advance audit chain head for asset {asset_id}: {e}")
+
+# Strong references to in-flight background writes so they are not collected
+_background_writes: set = set()
+
+def _run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_writes.add(task)
+    task.add_done_callback(_background_writes.discard)
+
+def _schedule_head_advance(db, asset_id: str, last_index: int, last_hash: str):
+    """Advance the stored head in the background, off the append's round trip"""
+    _run_in_background(_advance_head(db, asset_id, last_index, last_hash))
+
+# Daily statistics buckets: one document per (dimension, day, key)
+AUDIT_STATS_TOTAL = "total"
+AUDIT_STATS_FIELD = "field"
+AUDIT_STATS_USER = "user"
+
+def audit_stats_day(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m-%d")
+
+def audit_stat_increments(records: List[Dict[str, Any]]) -> Counter:
+    """Counts per (dimension, day, key) for a set of audit records"""
+    increments: Counter = Counter()
+    for record in records:
+        day = audit_stats_day(record["timestamp"])
+        increments[(AUDIT_STATS_TOTAL, day, None)] += 1
+        increments[(AUDIT_STATS_FIELD, day, record["field_changed"])] += 1
+        increments[(AUDIT_STATS_USER, day, record.get("changed_by_email"))] += 1
+    return increments
+
+async def record_audit_stats(db, records: List[Dict[str, Any]]):
+    """Add newly appended records to the daily statistics buckets"""
+    if not records:
+        return
+    try:
+        await db.audit_stats_daily.bulk_write([
+            UpdateOne(
+                {"dimension": dimension, "day": day, "key": key},
+                {"$inc": {"count": count}},
+                upsert=True
+            )
+            for (dimension, day, key), count in audit_stat_increments(records).items()
+        ], ordered=False)
+    except Exception as e:
+        # The records are already written; statistics must not fail the append
+        print(f"Could not update audit statistics: {e}")
+
+def _schedule_audit_stats(db, records: List[Dict[str, Any]]):
+    """Update the statistics buckets in the background, off the append's round trip"""
+    if records:
+        _run_in_background(record_audit_stats(db, records))
+
+# field_changed values for whole-asset events
+AUDIT_EVENT_CREATED = "created"
+AUDIT_EVENT_DELETED = "deleted"
+
+def system_user() -> UserResponse:
+    """Actor recorded for changes made without an authenticated user"""
+    return UserResponse(
+        id="system",
+        name="System",
+        email="system@itam.local",
+        department="System",
+        role=UserRole.ADMIN,
+        permissions=[],
+        status=UserStatus.ACTIVE,
+        createdAt=datetime.utcnow(),
+        updatedAt=datetime.utcnow()
+    )
+
+def _canonical_value(value: Any) -> Any:
+    """Whole floats as ints and lists in a fixed order, so equal values compare equal"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _canonical_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [_canonical_value(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    return value
+
+def audit_value(value: Any) -> Optional[str]:
+    """
+    String form of a field value as stored (and hashed) in the audit chain.
+    1200 and 1200.0 give the same string, and so do lists in any order.
+    """
+    if value is None:
+        return None
+    value = _canonical_value(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, default=str)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def diff_asset_fields(
+    existing: Dict[str, Any],
+    update_data: Dict[str, Any],
+    tracked_fields: List[str] = AUDIT_TRACKED_FIELDS
+) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """[(field, old_value, new_value)] for every tracked field the update changes"""
+    changes = []
+    for field in tracked_fields:
+        if field not in update_data:
+            continue
+        old_value, new_value = audit_value(existing.get(field)), audit_value(update_data[field])
+        if old_value != new_value:
+            changes.append((field, old_value, new_value))
+    return changes
+
+def asset_audit_metadata(asset: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "asset_name": asset.get("name"),
+        "asset_type": asset.get("type"),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+def asset_snapshot(asset: Dict[str, Any], tracked_fields: List[str] = AUDIT_TRACKED_FIELDS) -> str:
+    """Tracked fields of an asset as one JSON value, for create/delete events"""
+    return json.dumps(
+        {field: audit_value(asset.get(field)) for field in tracked_fields if asset.get(field) is not None},
+        sort_keys=True
+    )
+
+def _publish_appended(asset_id: str, records: List[Dict[str, Any]]):
+    for record in records:
+        publish_event(
+            EventType.AUDIT_APPENDED,
+            asset_id=asset_id,
+            field_changed=record["field_changed"],
+            chain_index=record["chain_index"],
+            changed_by_email=record["changed_by_email"]
+        )
+
+async def create_audit_segment(
+    db,
+    asset_id: str,
+    changes: List[Tuple[str, Optional[str], Optional[str]]],
+    changed_by: UserResponse,
+    metadata: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """
+    Append one record per (field, old_value, new_value) as a contiguous
+    chain segment written with a single insert_many.
+    Returns the hashes of the created records.
+    
+    With the head cached in-process the insert is the only round trip
+    (a cold cache adds one head read); the stored head and the daily
+    statistics are updated in the background. Appends for one asset are serialized in-process, and the
+    unique (asset_id, chain_index) index settles races between processes
+    and stale heads: the loser reloads the head from the chain and retries
+    whatever was not yet written on top of it.
+    """
+    if not changes:
+        return []
+    
+    written_records: List[Dict[str, Any]] = []
+    appended = False
+    async with _append_locks.hold(asset_id):
+        cached = _head_cache.get(asset_id)
+        last_index, previous_hash = cached if cached else await _load_head(db, asset_id)
+        
+        for _ in range(AUDIT_APPEND_MAX_RETRIES):
+            timestamp = datetime.utcnow()
+            records = []
+            for field_changed, old_value, new_value in changes:
+                chain_index = last_index + 1 + len(records)
+                
+                # Compute hash for this record
+                current_hash = compute_audit_hash(
+                    timestamp=timestamp,
+                    asset_id=asset_id,
+                    field=field_changed,
+                    old_value=old_value,
+                    new_value=new_value,
+                    user_id=changed_by.id,
+                    previous_hash=previous_hash
+                )
+                
+                # Create audit record
+                records.append({
+                    "timestamp": timestamp,
+                    "asset_id": asset_id,
+                    "field_changed": field_changed,
+                    "old_value": old_value,
+                    "new_value": new_value,
+                    "changed_by_user_id": changed_by.id,
+                    "changed_by_email": changed_by.email,
+                    "previous_hash": previous_hash,
+                    "current_hash": current_hash,
+                    "chain_index": chain_index,
+                    "metadata": metadata or {}
+                })
+                previous_hash = current_hash
+            
+            try:
+                await db.audit_chain.insert_many(records, ordered=True)
+            except BulkWriteError as e:
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+                # Another process appended first; keep what was written and
+                # chain the rest onto the new head
+                written = e.details.get("nInserted", 0)
+                written_records.extend(records[:written])
+                _publish_appended(asset_id, records[:written])
+                changes = changes[written:]
+                _head_cache.pop(asset_id, None)
+                last_index, previous_hash = await _load_head(db, asset_id, from_chain=True)
+                continue
+            
+            written_records.extend(records)
+            _publish_appended(asset_id, records)
+            head = records[-1]
+            _cache_head(asset_id, head["chain_index"], head["current_hash"])
+            _schedule_head_advance(db, asset_id, head["chain_index"], head["current_hash"])
+            appended = True
+            break
+    
+    # Statistics don't need the chain order or the caller to wait
+    _schedule_audit_stats(db, written_records)
+    if appended:
+        return [r["current_hash"] for r in written_records]
+    raise AuditAppendConflict(
+        f"Could not append audit records for asset {asset_id} after {AUDIT_APPEND_MAX_RETRIES} attempts"
+    )
+
 async def create_audit_record(
     db,
     asset_id: str,
@@ -48,67 +444,48 @@ async def create_audit_record(
     Create a new audit chain record with cryptographic hash.
     Returns the hash of the created record.
     """
-    # Get the previous audit record for this asset
-    previous_record = await db.audit_chain.find_one(
-        {"asset_id": asset_id},
-        sort=[("chain_index", -1)]
+    hashes = await create_audit_segment(
+        db, asset_id, [(field_changed, old_value, new_value)], changed_by, metadata
     )
-    
-    previous_hash = previous_record["current_hash"] if previous_record else None
-    chain_index = (previous_record["chain_index"] + 1) if previous_record else 0
-    
-    timestamp = datetime.utcnow()
-    
-    # Compute hash for this record
-    current_hash = compute_audit_hash(
-        timestamp=timestamp,
-        asset_id=asset_id,
-        field=field_changed,
-        old_value=old_value,
-        new_value=new_value,
-        user_id=changed_by.id,
-        previous_hash=previous_hash
+    return hashes[0]
+
+def sign_checkpoint(asset_id: str, last_index: int, last_hash: str) -> str:
+    """HMAC-SHA256 signature so a stored checkpoint cannot be forged or moved"""
+    message = f"{asset_id}|{last_index}|{last_hash}".encode("utf-8")
+    return hmac.new(AUDIT_CHECKPOINT_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+async def load_checkpoint(db, asset_id: str) -> Optional[Dict[str, Any]]:
+    """Return the asset's verification checkpoint if present and its signature is valid"""
+    checkpoint = await db.audit_checkpoints.find_one({"asset_id": asset_id})
+    if not checkpoint:
+        return None
+    expected = sign_checkpoint(asset_id, checkpoint["last_index"], checkpoint["last_hash"])
+    if not hmac.compare_digest(expected, checkpoint.get("signature", "")):
+        print(f" SECURITY ALERT: Invalid audit checkpoint signature for asset {asset_id}")
+        return None
+    return checkpoint
+
+async def save_checkpoint(db, asset_id: str, last_index: int, last_hash: str):
+    await db.audit_checkpoints.update_one(
+        {"asset_id": asset_id},
+        {"$set": {
+            "asset_id": asset_id,
+            "last_index": last_index,
+            "last_hash": last_hash,
+            "signature": sign_checkpoint(asset_id, last_index, last_hash),
+            "verified_at": datetime.utcnow()
+        }},
+        upsert=True
     )
-    
-    # Create audit record
-    audit_record = {
-        "timestamp": timestamp,
-        "asset_id": asset_id,
-        "field_changed": field_changed,
-        "old_value": old_value,
-        "new_value": new_value,
-        "changed_by_user_id": changed_by.id,
-        "changed_by_email": changed_by.email,
-        "previous_hash": previous_hash,
-        "current_hash": current_hash,
-        "chain_index": chain_index,
-        "metadata": metadata or {}
-    }
-    
-    await db.audit_chain.insert_one(audit_record)
-    
-    return current_hash
 
-async def verify_audit_chain(db, asset_id: str) -> AuditChainVerification:
+def verify_records(records: List[Dict[str, Any]], previous_hash: Optional[str]) -> Tuple[int, Optional[int], Optional[str]]:
     """
-    Verify the integrity of the audit chain for an asset.
-    Checks that each record's hash is valid and links correctly to previous.
+    Rehash `records` (sorted by chain_index) starting from `previous_hash`.
+    Returns (verified_count, broken_at_index, error_message).
     """
-    records = await db.audit_chain.find(
-        {"asset_id": asset_id}
-    ).sort("chain_index", 1).to_list(length=None)
-    
-    if not records:
-        return AuditChainVerification(
-            is_valid=True,
-            total_records=0,
-            verified_records=0
-        )
-    
     verified_count = 0
-    previous_hash = None
-    
-    for i, record in enumerate(records):
+    for record in records:
+        i = record["chain_index"]
         # Recompute hash
         computed_hash = compute_audit_hash(
             timestamp=record["timestamp"],
@@ -122,29 +499,169 @@ async def verify_audit_chain(db, asset_id: str) -> AuditChainVerification:
         
         # Verify hash matches
         if computed_hash != record["current_hash"]:
-            return AuditChainVerification(
-                is_valid=False,
-                total_records=len(records),
-                verified_records=verified_count,
-                broken_at_index=i,
-                error_message=f"Hash mismatch at index {i}. Expected {computed_hash}, got {record['current_hash']}"
-            )
+            return verified_count, i, f"Hash mismatch at index {i}. Expected {computed_hash}, got {record['current_hash']}"
         
         # Verify chain link
         if previous_hash != record.get("previous_hash"):
-            return AuditChainVerification(
-                is_valid=False,
-                total_records=len(records),
-                verified_records=verified_count,
-                broken_at_index=i,
-                error_message=f"Chain break at index {i}. Previous hash mismatch."
-            )
+            return verified_count, i, f"Chain break at index {i}. Previous hash mismatch."
         
         verified_count += 1
         previous_hash = record["current_hash"]
     
+    return verified_count, None, None
+
+def anchor_matches(record: Dict[str, Any], checkpoint: Dict[str, Any]) -> bool:
+    """The checkpointed record still hashes to the checkpointed hash"""
+    computed_hash = compute_audit_hash(
+        timestamp=record["timestamp"],
+        asset_id=record["asset_id"],
+        field=record["field_changed"],
+        old_value=record.get("old_value"),
+        new_value=record.get("new_value"),
+        user_id=record["changed_by_user_id"],
+        previous_hash=record.get("previous_hash")
+    )
+    return computed_hash == record["current_hash"] == checkpoint["last_hash"]
+
+async def verify_audit_chain(
+    db,
+    asset_id: str,
+    full: bool = False,
+    records: Optional[List[Dict[str, Any]]] = None
+) -> AuditChainVerification:
+    """
+    Verify the integrity of the audit chain for an asset.
+    Checks that each record's hash is valid and links correctly to previous.
+    
+    By default only records appended after the asset's signed checkpoint are
+    rehashed (plus the checkpointed record itself, against the checkpointed
+    hash); `full=True` re-verifies from genesis, reading archived records
+    too. Pass the asset's already-fetched `records` (sorted by chain_index)
+    to avoid querying the chain again. Breaks are stored in
+    audit_verification_failures for stored_verification_status and drop
+    the checkpoint.
+    """
+    checkpoint = None if full else await load_checkpoint(db, asset_id)
+    
+    if checkpoint:
+        start_index = checkpoint["last_index"]
+        if records is None:
+            tail = await db.audit_chain.find(
+                {"asset_id": asset_id, "chain_index": {"$gte": start_index}}
+            ).sort("chain_index", 1).to_list(length=None)
+        else:
+            tail = [r for r in records if r["chain_index"] >= start_index]
+        
+        anchor = tail[0] if tail else None
+        if anchor is None or anchor["chain_index"] != start_index or not anchor_matches(anchor, checkpoint):
+            return await _record_verification_failure(db, asset_id, AuditChainVerification(
+                is_valid=False,
+                total_records=start_index + len(tail),
+                verified_records=start_index,
+                broken_at_index=start_index,
+                error_message=f"Checkpointed record at index {start_index} is missing or was modified.",
+                mode="incremental"
+            ))
+        
+        to_verify = tail[1:]
+        previous_hash = checkpoint["last_hash"]
+        already_verified = start_index + 1
+        mode = "incremental"
+    else:
+        if records is None:
+            records = await load_audit_chain(db, asset_id)
+        to_verify = records
+        previous_hash = None
+        already_verified = 0
+        mode = "full"
+    
+    total_records = already_verified + len(to_verify)
+    verified_count, broken_at_index, error_message = verify_records(to_verify, previous_hash)
+    
+    if broken_at_index is not None:
+        return await _record_verification_failure(db, asset_id, AuditChainVerification(
+            is_valid=False,
+            total_records=total_records,
+            verified_records=already_verified + verified_count,
+            broken_at_index=broken_at_index,
+            error_message=error_message,
+            mode=mode
+        ))
+    
+    # Advance the checkpoint to the new chain head (or just re-date it).
+    # An incremental pass can't see a break recorded below the checkpoint,
+    # so it must not make that break look resolved.
+    if mode == "full" or not await _unresolved_failure(db, asset_id, checkpoint):
+        if to_verify:
+            head = to_verify[-1]
+            await save_checkpoint(db, asset_id, head["chain_index"], head["current_hash"])
+        elif checkpoint:
+            await save_checkpoint(db, asset_id, checkpoint["last_index"], checkpoint["last_hash"])
+    
+    return AuditChainVerification(
+        is_valid=True,
+        total_records=total_records,
+        verified_records=total_records,
+        mode=mode
+    )
+
+async def _record_verification_failure(
+    db,
+    asset_id: str,
+    verification: AuditChainVerification
+) -> AuditChainVerification:
+    # A break anywhere invalidates the checkpoint, wherever it was found:
+    # incremental runs then fall back to full verification and see it again
+    await db.audit_checkpoints.delete_one({"asset_id": asset_id})
+    await db.audit_verification_failures.insert_one({
+        "job_id": None,
+        "asset_id": asset_id,
+        "total_records": verification.total_records,
+        "broken_at_index": verification.broken_at_index,
+        "error_message": verification.error_message,
+        "detected_at": datetime.utcnow()
+    })
+    return verification
+
+async def _unresolved_failure(db, asset_id: str, checkpoint: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The latest recorded break, unless a clean verification has happened since"""
+    failure = await db.audit_verification_failures.find_one(
+        {"asset_id": asset_id}, sort=[("detected_at", -1)]
+    )
+    if failure and (not checkpoint or failure["detected_at"] > (checkpoint.get("verified_at") or datetime.min)):
+        return failure
+    return None
+
+async def stored_verification_status(db, asset_id: str, total_records: int) -> AuditChainVerification:
+    """
+    Verification status from stored state only - the signed checkpoint and
+    the latest recorded break - without rehashing anything. Records after
+    the checkpoint count as not yet verified; a chain with neither is
+    reported as unverified (is_valid None).
+    """
+    checkpoint = await load_checkpoint(db, asset_id)
+    failure = await _unresolved_failure(db, asset_id, checkpoint)
+    if failure:
+        return AuditChainVerification(
+            is_valid=False,
+            total_records=total_records,
+            verified_records=failure["broken_at_index"] or 0,
+            broken_at_index=failure["broken_at_index"],
+            error_message=failure["error_message"],
+            mode="stored",
+            verified_at=failure["detected_at"]
+        )
+    if not checkpoint:
+        return AuditChainVerification(
+            is_valid=None,
+            total_records=total_records,
+            verified_records=0,
+            mode="stored"
+        )
     return AuditChainVerification(
         is_valid=True,
-        total_records=len(records),
-        verified_records=verified_count
+        total_records=total_records,
+        verified_records=checkpoint["last_index"] + 1,
+        mode="stored",
+        verified_at=checkpoint.get("verified_at")
     )
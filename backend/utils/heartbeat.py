@@ -0,0 +1,48 @@
+import time
+from collections import deque
+from config import (
+    HEARTBEAT_BASE_INTERVAL, HEARTBEAT_MIN_INTERVAL,
+    HEARTBEAT_MAX_INTERVAL, HEARTBEAT_TARGET_RATE
+)
+
+class HeartbeatLoadTracker:
+    """
+    Tracks heartbeat arrivals over a sliding window so the backend can
+    tell agents how long to wait before their next heartbeat.
+    """
+
+    def __init__(self, window_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self._arrivals = deque()
+        self.override_interval = None
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._arrivals and self._arrivals[0] < cutoff:
+            self._arrivals.popleft()
+
+    def record(self):
+        """Record a heartbeat arrival"""
+        now = time.monotonic()
+        self._arrivals.append(now)
+        self._trim(now)
+
+    def current_rate(self) -> float:
+        """Heartbeats per second observed over the window"""
+        self._trim(time.monotonic())
+        return len(self._arrivals) / self.window_seconds
+
+    def suggested_interval(self) -> int:
+        """
+        Scale the base interval by how far ingest load is above target.
+        An operator override (set during incidents) takes precedence.
+        """
+        if self.override_interval:
+            return min(HEARTBEAT_MAX_INTERVAL, max(HEARTBEAT_MIN_INTERVAL, int(self.override_interval)))
+
+        rate = self.current_rate()
+        load_factor = rate / HEARTBEAT_TARGET_RATE if HEARTBEAT_TARGET_RATE > 0 else 1.0
+        interval = HEARTBEAT_BASE_INTERVAL * max(1.0, load_factor)
+        return int(min(HEARTBEAT_MAX_INTERVAL, max(HEARTBEAT_MIN_INTERVAL, interval)))
+
+heartbeat_tracker = HeartbeatLoadTracker()
@@ -1,4 +1,14 @@
 from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+
+def normalize_serial(serial: Optional[str]) -> Optional[str]:
+    """Uppercase serial with whitespace and separators removed; None if nothing is left"""
+    if not serial:
+        return None
+    normalized = "".join(ch for ch in str(serial).upper() if ch.isalnum())
+    return normalized or None
 
 def asset_helper(asset) -> dict:
     return {
@@ -8,6 +18,7 @@ def asset_helper(asset) -> dict:
         "category": asset["category"],
         "status": asset["status"],
         "assignedTo": asset.get("assignedTo"),
+        "assignedToUserId": asset.get("assignedToUserId"),
         "department": asset.get("department"),
         "location": asset.get("location"),
         "purchaseDate": asset.get("purchaseDate"),
@@ -70,8 +81,18 @@ def procurement_request_helper(request) -> dict:
         "updatedAt": request.get("updatedAt")
     }
 
-def audit_record_helper(record) -> dict:
-    """Helper to format audit record for response"""
+def audit_record_helper(record, compact: bool = False) -> dict:
+    """Helper to format audit record for response; `compact` leaves out hashes and metadata"""
+    if compact:
+        return {
+            "id": str(record["_id"]),
+            "timestamp": record["timestamp"].isoformat(),
+            "field_changed": record["field_changed"],
+            "old_value": record.get("old_value"),
+            "new_value": record.get("new_value"),
+            "changed_by_email": record["changed_by_email"],
+            "chain_index": record["chain_index"]
+        }
     return {
         "id": str(record["_id"]),
         "timestamp": record["timestamp"].isoformat(),
@@ -87,13 +108,73 @@ def audit_record_helper(record) -> dict:
         "metadata": record.get("metadata", {})
     }
 
-async def update_user_asset_count(user_name: str, db):
-    """Update the asset count for a user"""
-    count = await db.assets.count_documents({"assignedTo": user_name})
-    await db.users.update_one(
-        {"name": user_name},
-        {"$set": {"assetsCount": count, "updatedAt": datetime.utcnow()}}
-    )
+async def resolve_assignee(db, data: dict) -> dict:
+    """
+    Complete the assignee on an asset document or update in place: an
+    assignedToUserId gets its user's name denormalized into assignedTo, and a
+    bare assignedTo name is resolved to an id when exactly one user has it.
+    Raises ValueError for an unknown user id.
+    """
+    user_id = data.get("assignedToUserId")
+    if user_id:
+        if not ObjectId.is_valid(user_id):
+            raise ValueError("Invalid assignee user ID")
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"name": 1})
+        if not user:
+            raise ValueError("Assignee user not found")
+        data["assignedTo"] = user["name"]
+    elif data.get("assignedTo"):
+        users = await db.users.find({"name": data["assignedTo"]}, {"_id": 1}).limit(2).to_list(length=2)
+        data["assignedToUserId"] = str(users[0]["_id"]) if len(users) == 1 else None
+    elif "assignedTo" in data:
+        # Cleared assignment
+        data["assignedToUserId"] = None
+    return data
+
+async def adjust_user_asset_counts(db, old_user_id: Optional[str], new_user_id: Optional[str]):
+    """Move one asset between two users' assetsCount with atomic $inc; either side may be empty"""
+    if old_user_id == new_user_id:
+        return
+    now = datetime.utcnow()
+    if old_user_id:
+        await db.users.update_one(
+            {"_id": ObjectId(old_user_id)},
+            {"$inc": {"assetsCount": -1}, "$set": {"updatedAt": now}}
+        )
+    if new_user_id:
+        await db.users.update_one(
+            {"_id": ObjectId(new_user_id)},
+            {"$inc": {"assetsCount": 1}, "$set": {"updatedAt": now}}
+        )
+
+async def reconcile_user_asset_counts(db) -> int:
+    """
+    Recount every user's assetsCount from the assets collection and fix
+    any that drifted. Returns the number of users corrected.
+    """
+    # Snapshot users first; a user whose count moves after the snapshot is
+    # skipped by the conditional update and picked up on the next run
+    users = await db.users.find({}, {"assetsCount": 1}).to_list(length=None)
+    counts = {}
+    async for group in db.assets.aggregate([
+        {"$match": {"assignedToUserId": {"$type": "string"}}},
+        {"$group": {"_id": "$assignedToUserId", "count": {"$sum": 1}}}
+    ]):
+        counts[group["_id"]] = group["count"]
+    
+    updates = [
+        UpdateOne(
+            {"_id": user["_id"], "assetsCount": user.get("assetsCount")},
+            {"$set": {"assetsCount": counts.get(str(user["_id"]), 0)}}
+        )
+        for user in users
+        if user.get("assetsCount") != counts.get(str(user["_id"]), 0)
+    ]
+    corrected = 0
+    for start in range(0, len(updates), 1000):
+        result = await db.users.bulk_write(updates[start:start + 1000], ordered=False)
+        corrected += result.modified_count
+    return corrected
 
 async def check_and_update_expired_assets(db):
     """Check warranty dates and update expired assets to Inactive status"""
@@ -0,0 +1,190 @@
+import time
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Tuple
+from bson import ObjectId
+from .helpers import normalize_serial
+
+# Characters OCR commonly confuses, mapped to one canonical form
+OCR_CONFUSIONS = {"O": "0", "Q": "0", "D": "0", "I": "1", "L": "1", "S": "5", "B": "8", "Z": "2", "G": "6"}
+# Substituting a confusable pair costs less than a real edit
+CONFUSION_COST = 0.25
+NGRAM_SIZE = 3
+# How many n-gram candidates get a full edit-distance check
+MAX_CANDIDATES = 200
+# How often changes made by other workers are picked up (by updatedAt)
+REFRESH_SECONDS = 300
+# Overlap between refreshes so writes racing the previous one aren't missed
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+def clean_serial(serial: str) -> str:
+    """Uppercase and drop whitespace/separators"""
+    return normalize_serial(serial) or ""
+
+def canonical_serial(serial: str) -> str:
+    """Cleaned serial with OCR-confusable characters folded together"""
+    return "".join(OCR_CONFUSIONS.get(ch, ch) for ch in clean_serial(serial))
+
+def ngrams(value: str, n: int = NGRAM_SIZE) -> set:
+    padded = f"^{value}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def ocr_edit_distance(a: str, b: str) -> float:
+    """Levenshtein distance where OCR-confusable substitutions are cheap"""
+    if a == b:
+        return 0.0
+    previous = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        current = [float(i)]
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                substitution = 0.0
+            elif OCR_CONFUSIONS.get(ca, ca) == OCR_CONFUSIONS.get(cb, cb):
+                substitution = CONFUSION_COST
+            else:
+                substitution = 1.0
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + substitution
+            ))
+        previous = current
+    return previous[-1]
+
+class SerialIndex:
+    """
+    In-memory trigram index over asset serial numbers.
+    Candidates are gathered by shared n-grams of the OCR-canonical form,
+    then ranked by OCR-aware edit distance.
+    """
+
+    def __init__(self):
+        self._serials: Dict[str, str] = {}  # asset_id -> cleaned serial
+        self._grams: Dict[str, set] = defaultdict(set)
+        self._loaded_at: Optional[float] = None
+        self._synced_at: Optional[datetime] = None  # assets.updatedAt covered so far
+        self._lock = asyncio.Lock()
+        # add/remove calls made while the initial load is running, replayed after it
+        self._pending: Optional[Dict[str, Optional[str]]] = None
+
+    def __len__(self):
+        return len(self._serials)
+
+    def add(self, asset_id, serial: Optional[str]):
+        """Index (or re-index) an asset's serial number"""
+        asset_id = str(asset_id)
+        if self._pending is not None:
+            self._pending[asset_id] = serial
+        self._index(self._serials, self._grams, asset_id, serial)
+
+    def remove(self, asset_id):
+        asset_id = str(asset_id)
+        if self._pending is not None:
+            self._pending[asset_id] = None
+        self._unindex(self._serials, self._grams, asset_id)
+
+    @classmethod
+    def _index(cls, serials: Dict[str, str], grams: Dict[str, set], asset_id: str, serial: Optional[str]):
+        cls._unindex(serials, grams, asset_id)
+        if not serial:
+            return
+        cleaned = clean_serial(serial)
+        if not cleaned:
+            return
+        serials[asset_id] = cleaned
+        for gram in ngrams(canonical_serial(cleaned)):
+            grams[gram].add(asset_id)
+
+    @staticmethod
+    def _unindex(serials: Dict[str, str], grams: Dict[str, set], asset_id: str):
+        cleaned = serials.pop(asset_id, None)
+        if cleaned is None:
+            return
+        for gram in ngrams(canonical_serial(cleaned)):
+            ids = grams.get(gram)
+            if ids:
+                ids.discard(asset_id)
+                if not ids:
+                    del grams[gram]
+
+    async def ensure_loaded(self, db):
+        """
+        Load from the database on first use, then periodically pick up assets
+        changed by other workers since the last sync (deleted ones are
+        dropped when suggest no longer finds them).
+        """
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < REFRESH_SECONDS:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < REFRESH_SECONDS:
+                return
+            started = datetime.utcnow()
+            if self._synced_at is None:
+                await self._load(db)
+            else:
+                async for asset in db.assets.find(
+                    {"updatedAt": {"$gte": self._synced_at - REFRESH_OVERLAP}}, {"serialNumber": 1}
+                ):
+                    self.add(asset["_id"], asset.get("serialNumber"))
+            self._synced_at = started
+            self._loaded_at = time.monotonic()
+
+    async def _load(self, db):
+        """Build the index into fresh dicts and swap them in"""
+        self._pending = {}
+        try:
+            serials: Dict[str, str] = {}
+            grams: Dict[str, set] = defaultdict(set)
+            async for asset in db.assets.find({"serialNumber": {"$nin": [None, ""]}}, {"serialNumber": 1}):
+                self._index(serials, grams, str(asset["_id"]), asset["serialNumber"])
+            for asset_id, serial in self._pending.items():
+                self._index(serials, grams, asset_id, serial)
+            self._serials, self._grams = serials, grams
+        finally:
+            self._pending = None
+
+    def search(self, serial: str, limit: int = 5, max_distance: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Return [(asset_id, distance)] for the closest serials, best first"""
+        query = clean_serial(serial)
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = max(2.0, len(query) / 3)
+
+        counts: Dict[str, int] = defaultdict(int)
+        for gram in ngrams(canonical_serial(query)):
+            for asset_id in self._grams.get(gram, ()):
+                counts[asset_id] += 1
+        candidates = sorted(counts, key=counts.get, reverse=True)[:MAX_CANDIDATES]
+
+        scored = []
+        for asset_id in candidates:
+            distance = ocr_edit_distance(query, self._serials[asset_id])
+            if distance <= max_distance:
+                scored.append((asset_id, distance))
+        scored.sort(key=lambda item: (item[1], self._serials[item[0]]))
+        return scored[:limit]
+
+    async def suggest(self, db, serial: str, limit: int = 5) -> List[Tuple[dict, float]]:
+        """[(asset document, distance)] closest to a (possibly mis-read) serial, best first"""
+        await self.ensure_loaded(db)
+        matches = self.search(serial, limit=limit)
+        if not matches:
+            return []
+        assets = await db.assets.find(
+            {"_id": {"$in": [ObjectId(asset_id) for asset_id, _ in matches]}}
+        ).to_list(length=limit)
+        by_id = {str(a["_id"]): a for a in assets}
+        results = []
+        for asset_id, distance in matches:
+            if asset_id in by_id:
+                results.append((by_id[asset_id], distance))
+            else:
+                # Deleted by another worker since it was indexed
+                self.remove(asset_id)
+        return results
+
+serial_index = SerialIndex()
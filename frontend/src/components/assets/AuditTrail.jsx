@@ -3,7 +3,7 @@ import { useAuditChain } from '../../hooks/useAuditChain';
 import { Shield, ShieldAlert, ShieldOff, Clock, User, Hash, ArrowRight, Loader, AlertTriangle, XCircle } from 'lucide-react';
 
 const AuditTrail = ({ asset }) => {
-  const { auditData, verification, loading, error } = useAuditChain(asset.id);
+  const { auditData, verification, loading, loadingOlder, error, loadOlder } = useAuditChain(asset.id);
 
   if (loading) {
     return (
@@ -34,17 +34,25 @@ const AuditTrail = ({ asset }) => {
     );
   }
 
+  // is_valid is null until the chain has been verified at least once
+  const unverified = verification != null && verification.is_valid == null;
+  const tampered = !unverified && !verification?.is_valid;
+
   return (
     <div className="space-y-4">
       {/* PROMINENT Verification Status - ALWAYS VISIBLE */}
       <div className={`rounded-lg p-6 border-4 shadow-lg ${
-        verification?.is_valid 
-          ? 'bg-green-50 border-green-500' 
-          : 'bg-red-100 border-red-600 animate-pulse'
+        unverified
+          ? 'bg-gray-50 border-gray-400'
+          : verification?.is_valid 
+            ? 'bg-green-50 border-green-500' 
+            : 'bg-red-100 border-red-600 animate-pulse'
       }`}>
         <div className="flex items-start space-x-4">
           <div className="flex-shrink-0">
-            {verification?.is_valid ? (
+            {unverified ? (
+              <ShieldOff className="w-10 h-10 text-gray-500" />
+            ) : verification?.is_valid ? (
               <Shield className="w-10 h-10 text-green-600" />
             ) : (
               <ShieldAlert className="w-10 h-10 text-red-700" />
@@ -52,11 +60,13 @@ const AuditTrail = ({ asset }) => {
           </div>
           <div className="flex-1">
             <h3 className={`text-xl font-bold mb-2 ${
-              verification?.is_valid ? 'text-green-800' : 'text-red-800'
+              unverified ? 'text-gray-700' : verification?.is_valid ? 'text-green-800' : 'text-red-800'
             }`}>
-              {verification?.is_valid 
-                ? '✓ CHAIN VERIFIED - Integrity Intact' 
-                : '⚠️ TAMPERING DETECTED - Chain Compromised!'}
+              {unverified
+                ? 'CHAIN NOT YET VERIFIED'
+                : verification?.is_valid 
+                  ? '✓ CHAIN VERIFIED - Integrity Intact' 
+                  : '⚠️ TAMPERING DETECTED - Chain Compromised!'}
             </h3>
             <div className="grid grid-cols-2 gap-4 text-sm">
               <div>
@@ -69,7 +79,19 @@ const AuditTrail = ({ asset }) => {
               </div>
             </div>
             
-            {!verification?.is_valid && (
+            {verification?.is_valid && verification?.verified_records < verification?.total_records && (
+              <p className="text-sm text-gray-600 mt-3">
+                {verification.total_records - verification.verified_records} newer records are awaiting the next verification run
+              </p>
+            )}
+            
+            {unverified && (
+              <p className="text-sm text-gray-600 mt-3">
+                This chain has not been verified yet; it will be checked on the next verification run
+              </p>
+            )}
+            
+            {tampered && (
               <div className="mt-4 p-4 bg-red-200 rounded-lg border-2 border-red-700">
                 <div className="flex items-start space-x-2">
                   <AlertTriangle className="w-5 h-5 text-red-800 mt-0.5" />
@@ -99,11 +121,21 @@ const AuditTrail = ({ asset }) => {
           Change History ({auditData.total_changes} changes)
         </h3>
         
+        {auditData.has_more && (
+          <button
+            onClick={loadOlder}
+            disabled={loadingOlder}
+            className="mb-4 text-sm text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+          >
+            {loadingOlder ? 'Loading...' : 'Load earlier changes'}
+          </button>
+        )}
+        
         <div className="space-y-4">
-          {auditData.records.map((record, index) => {
+          {auditData.records.map((record) => {
             // Highlight tampered record if verification failed
-            const isTamperedRecord = !verification?.is_valid && 
-                                     index === verification?.broken_at_index;
+            const isTamperedRecord = tampered && 
+                                     record.chain_index === verification?.broken_at_index;
             
             return (
               <div 
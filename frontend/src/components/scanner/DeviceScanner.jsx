@@ -612,7 +612,8 @@ const DeviceScanner = ({
                             onClick={() => {
                               setQuickAddForm(prev => ({ 
                                 ...prev, 
-                                assignedTo: suggestion.user_name 
+                                assignedTo: suggestion.user_name,
+                                assignedToUserId: suggestion.user_id
                               }));
                               if (scanResult.status === 'not_found') {
                                 setShowQuickAdd(true);
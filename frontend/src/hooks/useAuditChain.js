@@ -5,6 +5,7 @@ export const useAuditChain = (assetId) => {
   const [auditData, setAuditData] = useState(null);
   const [verification, setVerification] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [error, setError] = useState(null);
 
   const fetchAuditChain = async () => {
@@ -14,13 +15,11 @@ export const useAuditChain = (assetId) => {
     setError(null);
     
     try {
-      const [auditResponse, verifyResponse] = await Promise.all([
-        apiService.getAuditChain(assetId),
-        apiService.verifyAuditChain(assetId)
-      ]);
+      // Newest page only; the status comes from the stored checkpoint
+      const auditResponse = await apiService.getAuditChain(assetId);
       
       setAuditData(auditResponse);
-      setVerification(verifyResponse);
+      setVerification(auditResponse.verification);
     } catch (err) {
       setError(err.message);
       console.error('Error fetching audit chain:', err);
@@ -29,6 +28,28 @@ export const useAuditChain = (assetId) => {
     }
   };
 
+  const loadOlder = async () => {
+    if (!auditData?.has_more || loadingOlder) return;
+    
+    setLoadingOlder(true);
+    try {
+      const olderResponse = await apiService.getAuditChain(assetId, {
+        before_index: auditData.next_before_index
+      });
+      setAuditData({
+        ...auditData,
+        records: [...olderResponse.records, ...auditData.records],
+        has_more: olderResponse.has_more,
+        next_before_index: olderResponse.next_before_index
+      });
+    } catch (err) {
+      setError(err.message);
+      console.error('Error fetching older audit records:', err);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   useEffect(() => {
     fetchAuditChain();
   }, [assetId]);
@@ -37,7 +58,9 @@ export const useAuditChain = (assetId) => {
     auditData,
     verification,
     loading,
+    loadingOlder,
     error,
+    loadOlder,
     refresh: fetchAuditChain
   };
 };
\ No newline at end of file
@@ -186,8 +186,9 @@ class ApiService {
   }
 
   // Audit methods
-  getAuditChain(assetId) {
-    return this.request(`/audit/asset/${assetId}`);
+  getAuditChain(assetId, params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    return this.request(`/audit/asset/${assetId}${queryString ? '?' + queryString : ''}`);
   }
 
   verifyAuditChain(assetId) {